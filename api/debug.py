@@ -0,0 +1,17 @@
+"""诊断接口。"""
+
+from fastapi import APIRouter, Query
+
+from core.dependencies import LoopDiagnosticsDep
+from models.monitor import LoopDiagnosticsStatus
+
+router = APIRouter()
+
+
+@router.get("/loop", response_model=LoopDiagnosticsStatus)
+async def get_loop_diagnostics(
+    diagnostics: LoopDiagnosticsDep,
+    top_tasks: int = Query(default=20, ge=1, le=200),
+) -> LoopDiagnosticsStatus:
+    """获取事件循环延迟、最近的慢回调（含调用栈）与按协程统计的存活任务。"""
+    return diagnostics.snapshot(top_tasks=top_tasks)
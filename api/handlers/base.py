@@ -2,17 +2,21 @@
 
 from __future__ import annotations
 
-from typing import Protocol, Dict, Any
+from typing import ClassVar, Protocol
 from fastapi import WebSocket
 
 from api.handlers.context import HandlerContext
+from api.messages import InboundMessage
 
 
 class MessageHandler(Protocol):
     """消息处理器接口。"""
 
-    async def handle(self, websocket: WebSocket, message: Dict[str, Any], context: HandlerContext) -> str:
+    # 为 True 时在独立任务中执行，接收循环不被阻塞，连接断开时任务会被取消
+    background: ClassVar[bool] = False
+
+    async def handle(self, websocket: WebSocket, message: InboundMessage, context: HandlerContext) -> bytes:
         """
-        处理消息并返回响应预览字符串。
+        处理消息并返回已发送的响应编码（UTF-8 JSON bytes），供调用方截取日志预览。
         """
         ...
@@ -2,25 +2,35 @@
 
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
-from typing import Dict, Any
 
 from fastapi import WebSocket
 
 from api.handlers.base import MessageHandler
 from api.handlers.context import HandlerContext
+from api.messages import ConnectionInit
+from core import serialization
 from core.monitor.event_types import MonitorEventType
 
 
 class ConnectionInitHandler(MessageHandler):
-    async def handle(self, websocket: WebSocket, message: Dict[str, Any], context: HandlerContext) -> str:
+    async def handle(self, websocket: WebSocket, message: ConnectionInit, context: HandlerContext) -> bytes:
+        data = {"client_id": context.client_id}
+        if context.bind_session is not None:
+            client_id, resume_token, resumed = await context.bind_session(message.resume_token)
+            context.client_id = client_id
+            data = {"client_id": client_id, "resume_token": resume_token, "resumed": resumed}
         response = {
             "type": "connection_ack",
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "data": {"client_id": context.client_id},
+            "data": data,
         }
-        await websocket.send_json(response)
+        encoded = await serialization.send_payload(websocket, response)
+        if data.get("resumed") and context.outbox is not None:
+            # 恢复会话后重发断线期间未确认的回复
+            for payload in context.outbox.pending(context.client_id):
+                await serialization.send_payload(websocket, payload)
+                context.metrics.record_message_sent("conversation_response")
 
         context.metrics.record_message_sent("connection_ack")
         context.event_bus.publish(
@@ -32,4 +42,4 @@ class ConnectionInitHandler(MessageHandler):
             },
         )
 
-        return json.dumps(response)
+        return encoded
@@ -1,11 +1,15 @@
 """消息处理上下文。"""
 
 from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple
+
 from core.interfaces import (
+    ConnectionManagerInterface,
     EventBusInterface,
     MetricsInterface,
     LLMServiceInterface,
     ConversationContextInterface,
+    OutboxInterface,
 )
 
 
@@ -18,3 +22,9 @@ class HandlerContext:
     metrics: MetricsInterface
     llm_service: LLMServiceInterface
     conversation_context: ConversationContextInterface
+    # 连接管理器，用于维护连接标签（如 player:<玩家名>）
+    connections: Optional[ConnectionManagerInterface] = None
+    # 按恢复令牌绑定会话（空串表示新会话），返回 (client_id, 新恢复令牌, 是否恢复了原会话)
+    bind_session: Optional[Callable[[str], Awaitable[Tuple[str, str, bool]]]] = None
+    # 未确认对话回复的发件箱（至少一次投递）
+    outbox: Optional[OutboxInterface] = None
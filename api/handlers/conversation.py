@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 from datetime import datetime, timezone
 from typing import Dict, Any
@@ -11,7 +11,12 @@ from fastapi import WebSocket
 
 from api.handlers.base import MessageHandler
 from api.handlers.context import HandlerContext
+from api.messages import ConversationAck, ConversationRequest
 from api.protocol import CompactProtocol
+from config.settings import settings
+from core import serialization
+from core.llm.admission import LLMPriority
+from core.llm.errors import LLMBusyError
 from core.monitor.event_types import MonitorEventType
 from core.monitor.token_tracker import TokenTracker
 
@@ -20,13 +25,34 @@ logger = logging.getLogger("api.handlers.conversation")
 
 
 class ConversationHandler(MessageHandler):
-    async def handle(self, websocket: WebSocket, message: Dict[str, Any], context: HandlerContext) -> str:
-        standard_message: Dict[str, Any] = CompactProtocol.parse(message)
+    # LLM 调用耗时较长，在独立任务中执行，断线时可被取消
+    background = True
+
+    async def handle(self, websocket: WebSocket, message: ConversationRequest, context: HandlerContext) -> bytes:
+        outbox = context.outbox if message.id else None
+        if outbox is None:
+            return await self._respond(websocket, message, context)
+
+        stored = outbox.get(context.client_id, message.id)
+        if stored is not None:
+            # 重试已生成过的请求：重发保存的回复，不再调用 LLM
+            logger.info("重发未确认的回复: client=%s, message=%s", context.client_id, message.id)
+            context.metrics.record_message_sent("conversation_response")
+            return await serialization.send_payload(websocket, stored)
+        if not outbox.claim(context.client_id, message.id):
+            # 原请求仍在生成，完成后会回复到当前连接
+            logger.info("请求仍在生成中，忽略重试: client=%s, message=%s", context.client_id, message.id)
+            return b""
+        try:
+            return await self._respond(websocket, message, context)
+        finally:
+            outbox.release(context.client_id, message.id)
 
-        player_name: str = str(standard_message.get("playerName") or "玩家")
-        player_message: str = str(standard_message.get("message", "") or "")
-        message_id: str = str(standard_message.get("id", "") or "")
-        companion_name: str = str(standard_message.get("companionName", "AICompanion") or "AICompanion")
+    async def _respond(self, websocket: WebSocket, message: ConversationRequest, context: HandlerContext) -> bytes:
+        player_name = message.player_name
+        player_message = message.message
+        message_id = message.id
+        companion_name = message.companion_name
 
         system_prompt = (
             f"你是 Minecraft 世界中的 AI 伙伴，名字叫 {companion_name}。"
@@ -41,7 +67,14 @@ class ConversationHandler(MessageHandler):
         llm_messages = [{"role": "system", "content": system_prompt}, *history_messages, current_user_message]
 
         default_reply = "抱歉，我暂时无法响应，请稍后再试。"
+        busy_reply = "我现在有点忙，请稍后再问我一次。"
+        timeout_reply = "抱歉，我想得太久了，请再问我一次。"
         reply: str = default_reply
+        # 中途放弃时按 prompt 估算浪费的 token
+        prompt_tokens = sum(TokenTracker.count_tokens(m["content"]) for m in llm_messages)
+        usage_tokens = 0
+        # 只有 LLM 正常回答的回复才放入发件箱，超时/繁忙提示在重试时应重新请求
+        answered = False
 
         context.event_bus.publish(
             MonitorEventType.LLM_REQUEST,
@@ -53,20 +86,33 @@ class ConversationHandler(MessageHandler):
             },
         )
 
-        # 先记录用户消息，确保断线重试时可还原上下文
-        context.conversation_context.add_message(
-            context.client_id,
-            role="user",
-            content=current_user_message["content"],
-            player_name=player_name,
-        )
+        def record_turn(assistant_reply: str) -> None:
+            # 用户消息与回复成对写入历史；取消与超时不写入，历史中不会留下没有回复的用户消息
+            context.conversation_context.add_message(
+                context.client_id,
+                role="user",
+                content=current_user_message["content"],
+                player_name=player_name,
+            )
+            context.conversation_context.add_message(
+                context.client_id,
+                role="assistant",
+                content=assistant_reply,
+            )
 
         try:
-            # 对话场景禁用缓存，避免相同问题返回旧答案
-            llm_response = await context.llm_service.chat_completion(
-                messages=llm_messages,
-                use_cache=False
-            )
+            # 端到端时限覆盖排队与生成；超时后 LLM 调用被取消
+            async with asyncio.timeout(settings.conversation_timeout):
+                # 对话场景禁用精确缓存（历史不同则键不同）；语义缓存按问题本身匹配，启用时复用相近回答
+                llm_response = await context.llm_service.chat_completion(
+                    messages=llm_messages,
+                    use_cache=False,
+                    priority=LLMPriority.PLAYER,
+                    use_semantic_cache=True,
+                )
+            usage = llm_response.get("usage")
+            if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+                usage_tokens = usage["total_tokens"]
             choices = llm_response.get("choices", [])
             first_choice = choices[0] if choices else {}
             if isinstance(first_choice, dict):
@@ -79,11 +125,8 @@ class ConversationHandler(MessageHandler):
             else:
                 reply = str(llm_reply)
 
-            context.conversation_context.add_message(
-                context.client_id,
-                role="assistant",
-                content=reply,
-            )
+            record_turn(reply)
+            answered = True
 
             context.event_bus.publish(
                 MonitorEventType.LLM_RESPONSE,
@@ -95,6 +138,44 @@ class ConversationHandler(MessageHandler):
                     "usage": llm_response.get("usage"),
                 },
             )
+        except asyncio.CancelledError:
+            # 客户端断开：LLM 调用已随任务取消，不再回复
+            context.metrics.record_llm_aborted("cancelled", prompt_tokens)
+            logger.info("客户端已断开，取消 LLM 请求: client=%s, message=%s", context.client_id, message_id)
+            raise
+        except TimeoutError:
+            reply = timeout_reply
+            context.metrics.record_llm_aborted("timeout", prompt_tokens)
+            logger.warning(
+                "LLM 请求超时（%.1fs）: client=%s, message=%s",
+                settings.conversation_timeout,
+                context.client_id,
+                message_id,
+            )
+            context.event_bus.publish(
+                MonitorEventType.LLM_ERROR,
+                {
+                    "client_id": context.client_id,
+                    "message_type": "conversation_request",
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "error": "timeout",
+                },
+                severity="warning",
+            )
+        except LLMBusyError as exc:
+            # 负载削减：快速回复忙碌提示；提问与提示都不写入历史（record_turn 只在有回答时调用）
+            reply = busy_reply
+            logger.warning("LLM 繁忙，已快速拒绝: client=%s, message=%s", context.client_id, message_id)
+            context.event_bus.publish(
+                MonitorEventType.LLM_ERROR,
+                {
+                    "client_id": context.client_id,
+                    "message_type": "conversation_request",
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "error": str(exc),
+                },
+                severity="warning",
+            )
         except Exception as exc:  # noqa: BLE001
             logger.exception("LLM 调用失败: client=%s, message=%s", context.client_id, message_id)
             context.event_bus.publish(
@@ -106,11 +187,9 @@ class ConversationHandler(MessageHandler):
                     "error": str(exc),
                 },
             )
-            context.conversation_context.add_message(
-                context.client_id,
-                role="assistant",
-                content=reply,
-            )
+            # 带 id 的请求不进发件箱，模组会用同一 id 重试：失败提示不写入历史，避免重试时重复写入同一提问
+            if not answered and not message_id:
+                record_turn(reply)
 
         standard_response: Dict[str, Any] = {
             "id": message_id,
@@ -138,5 +217,26 @@ class ConversationHandler(MessageHandler):
             },
         )
 
-        await websocket.send_json(standard_response)
-        return json.dumps(standard_response)
+        if answered and message_id and context.outbox is not None:
+            # 先入发件箱再发送：发送失败时回复保留，重连或重试时重新投递
+            context.outbox.put(context.client_id, message_id, standard_response)
+
+        try:
+            return await serialization.send_payload(websocket, standard_response)
+        except Exception:
+            if answered and message_id and context.outbox is not None:
+                logger.info("回复暂未送达，已保留在发件箱: client=%s, message=%s", context.client_id, message_id)
+                raise
+            # 回复已生成但无法送达，计入浪费的 token
+            context.metrics.record_llm_aborted("undelivered", usage_tokens)
+            raise
+
+
+class ConversationAckHandler(MessageHandler):
+    """conversation_ack：模组确认已收到回复，从发件箱移除。"""
+
+    async def handle(self, websocket: WebSocket, message: ConversationAck, context: HandlerContext) -> bytes:
+        if context.outbox is not None and message.id:
+            if not context.outbox.ack(context.client_id, message.id):
+                logger.debug("确认的回复不在发件箱中: client=%s, message=%s", context.client_id, message.id)
+        return b""
@@ -2,28 +2,28 @@
 
 from __future__ import annotations
 
-import json
 from datetime import datetime, timezone
-from typing import Dict, Any
 
 from fastapi import WebSocket
 
 from api.handlers.base import MessageHandler
 from api.handlers.context import HandlerContext
+from api.messages import GameStateUpdate
+from core import serialization
 from core.monitor.event_types import MonitorEventType
 
 
 class GameStateHandler(MessageHandler):
-    async def handle(self, websocket: WebSocket, message: Dict[str, Any], context: HandlerContext) -> str:
-        game_state = message.get("data", {})
-        player_name = game_state.get("player_name", "Unknown")
-
+    async def handle(self, websocket: WebSocket, message: GameStateUpdate, context: HandlerContext) -> bytes:
         response = {
             "type": "game_state_ack",
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "data": {"status": "received", "player": player_name},
+            "data": {"status": "received", "player": message.player_name},
         }
-        await websocket.send_json(response)
+        if message.id:
+            # 回显请求 id，模组可据此对应请求与确认
+            response["id"] = message.id
+        encoded = await serialization.send_payload(websocket, response)
         context.metrics.record_message_sent("game_state_ack")
         context.event_bus.publish(
             MonitorEventType.MESSAGE_SENT,
@@ -33,4 +33,4 @@ class GameStateHandler(MessageHandler):
                 "timestamp": response["timestamp"],
             },
         )
-        return json.dumps(response)
+        return encoded
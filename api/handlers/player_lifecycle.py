@@ -2,24 +2,31 @@
 
 from __future__ import annotations
 
-import json
 import logging
 from datetime import datetime, timezone
-from typing import Dict, Any
 
 from fastapi import WebSocket
 
 from api.handlers.base import MessageHandler
 from api.handlers.context import HandlerContext
+from api.messages import PlayerConnected, PlayerDisconnected
+from core import serialization
 from core.monitor.event_types import MonitorEventType
 
 logger = logging.getLogger("api.handlers.player_lifecycle")
 
 
+def player_tag(player_name: str) -> str:
+    """玩家标签，用于按玩家分组向模组连接发送消息。"""
+    return f"player:{player_name}"
+
+
 class PlayerConnectedHandler(MessageHandler):
-    async def handle(self, websocket: WebSocket, message: Dict[str, Any], context: HandlerContext) -> str:
-        player_name = str(message.get("playerName") or "玩家")
+    async def handle(self, websocket: WebSocket, message: PlayerConnected, context: HandlerContext) -> bytes:
+        player_name = message.player_name
         session = context.conversation_context.create_session(context.client_id, player_name)
+        if context.connections is not None:
+            context.connections.tag(context.client_id, player_tag(player_name))
         logger.info("玩家进入世界，已创建对话会话: client=%s, player=%s", context.client_id, player_name)
 
         response = {
@@ -28,7 +35,7 @@ class PlayerConnectedHandler(MessageHandler):
             "playerName": player_name,
             "sessionStartedAt": session.started_at.isoformat(),
         }
-        await websocket.send_json(response)
+        encoded = await serialization.send_payload(websocket, response)
 
         context.metrics.record_message_sent("player_connected_ack")
         context.event_bus.publish(
@@ -39,13 +46,15 @@ class PlayerConnectedHandler(MessageHandler):
                 "timestamp": response["timestamp"],
             },
         )
-        return json.dumps(response)
+        return encoded
 
 
 class PlayerDisconnectedHandler(MessageHandler):
-    async def handle(self, websocket: WebSocket, message: Dict[str, Any], context: HandlerContext) -> str:
-        player_name = str(message.get("playerName") or "玩家")
+    async def handle(self, websocket: WebSocket, message: PlayerDisconnected, context: HandlerContext) -> bytes:
+        player_name = message.player_name
         context.conversation_context.clear_session(context.client_id)
+        if context.connections is not None:
+            context.connections.untag(context.client_id, player_tag(player_name))
         logger.info("玩家离开世界，已清空会话: client=%s, player=%s", context.client_id, player_name)
 
         response = {
@@ -53,7 +62,7 @@ class PlayerDisconnectedHandler(MessageHandler):
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "playerName": player_name,
         }
-        await websocket.send_json(response)
+        encoded = await serialization.send_payload(websocket, response)
 
         context.metrics.record_message_sent("player_disconnected_ack")
         context.event_bus.publish(
@@ -64,4 +73,4 @@ class PlayerDisconnectedHandler(MessageHandler):
                 "timestamp": response["timestamp"],
             },
         )
-        return json.dumps(response)
+        return encoded
@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
-import asyncio
-
 from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
 
-from core.dependencies import LLMDep, MetricsDep
-from core.interfaces import LLMServiceInterface, MetricsInterface
+from core.dependencies import DrainDep, LLMDep, LLMHealthDep, MetricsDep, PrewarmDep
+from core.interfaces import (
+    DrainControllerInterface,
+    LLMHealthInterface,
+    LLMServiceInterface,
+    MetricsInterface,
+    PrewarmInterface,
+)
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -20,22 +24,51 @@ async def liveness() -> dict:
 
 
 @router.get("/readiness")
-async def readiness(metrics: MetricsDep, llm: LLMDep):
-    """就绪探针：检查核心依赖状态。"""
+async def readiness(
+    metrics: MetricsDep,
+    llm: LLMDep,
+    llm_health: LLMHealthDep,
+    drain: DrainDep,
+    prewarm: PrewarmDep,
+):
+    """就绪探针：检查核心依赖状态，预热或排空中返回 503。"""
     checks = {
+        "prewarm": _check_prewarm(prewarm),
+        "drain": _check_drain(drain),
         "websocket": _check_websocket(metrics),
-        "llm": await _check_llm(llm),
+        "llm": _check_llm(llm, llm_health),
     }
     all_healthy = all(item["status"] == "healthy" for item in checks.values())
+    if prewarm.warming:
+        overall = "warming"
+    else:
+        overall = "healthy" if all_healthy else "unhealthy"
     status_code = (
         status.HTTP_200_OK if all_healthy else status.HTTP_503_SERVICE_UNAVAILABLE
     )
     return JSONResponse(
         status_code=status_code,
-        content={"status": "healthy" if all_healthy else "unhealthy", "checks": checks},
+        content={"status": overall, "checks": checks},
     )
 
 
+def _check_prewarm(prewarm: PrewarmInterface) -> dict:
+    """预热完成前不接收流量；预热步骤失败不阻止就绪，首次调用时会再次建立。"""
+    result = prewarm.status()
+    return {
+        **result,
+        "status": "warming" if prewarm.warming else "healthy",
+    }
+
+
+def _check_drain(drain: DrainControllerInterface) -> dict:
+    """排空开始后不再接收新流量。"""
+    return {
+        "status": "unhealthy" if drain.draining else "healthy",
+        "draining": drain.draining,
+    }
+
+
 def _check_websocket(metrics: MetricsInterface) -> dict:
     """检查 WebSocket 连接状态。"""
     conn_status = metrics.get_connection_status()
@@ -45,16 +78,23 @@ def _check_websocket(metrics: MetricsInterface) -> dict:
     }
 
 
-async def _check_llm(llm: LLMServiceInterface) -> dict:
-    """简易 LLM 探活，避免高成本调用。"""
-    try:
-        # 轻量级探测：只构造参数，不必强制调用外部服务
-        wait_task = asyncio.sleep(0)  # 协程挂起确保接口兼容
-        await wait_task
-        has_key = bool(llm.config.get("api_key"))
-        return {
-            "status": "healthy" if has_key else "degraded",
-            "api_key_present": has_key,
-        }
-    except Exception as exc:  # noqa: BLE001
-        return {"status": "unhealthy", "error": str(exc)}
+def _check_llm(llm: LLMServiceInterface, llm_health: LLMHealthInterface) -> dict:
+    """读取后台探测的缓存结果，不在探针请求中调用外部服务。"""
+    has_key = bool(llm.config.api_key)
+    if not has_key:
+        return {"status": "degraded", "api_key_present": False}
+    endpoints = llm_health.snapshot()
+    if not endpoints:
+        # 未启用探测或尚未配置可探测的端点，只能确认 API Key 存在
+        return {"status": "healthy", "api_key_present": True, "endpoints": {}}
+    if any(item.healthy is False for item in endpoints.values()):
+        overall = "unhealthy"
+    elif any(item.healthy is None for item in endpoints.values()):
+        overall = "degraded"
+    else:
+        overall = "healthy"
+    return {
+        "status": overall,
+        "api_key_present": True,
+        "endpoints": {name: item.model_dump(mode="json") for name, item in endpoints.items()},
+    }
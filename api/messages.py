@@ -0,0 +1,234 @@
+"""模组协议的强类型消息结构与解码器。
+
+WebSocket 收到的原始 dict 通过 ``decode_message`` 一次遍历即可：
+- 展开紧凑短键 / 蛇形别名 / 旧版 ``data`` 嵌套（映射表复用 ``CompactProtocol``）；
+- 按消息类型构造 ``slots`` 数据类，并在构造时完成类型与长度校验；
+- 填充默认值，处理器直接读取属性，无需再 ``str(x.get(...) or default)``。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Dict, List, Optional, Union
+
+from api.protocol import CompactProtocol
+from api.validation import MESSAGE_MAX_LENGTH, PLAYER_NAME_MAX_LENGTH
+
+DEFAULT_PLAYER_NAME = "玩家"
+DEFAULT_COMPANION_NAME = "AICompanion"
+
+
+class MessageDecodeError(ValueError):
+    """消息字段缺失或类型不合法。"""
+
+
+# 任意写法的键名 → 标准长字段名（短键优先，与 CompactProtocol.parse 一致）
+_KEY_MAP: Dict[str, str] = {**CompactProtocol.FIELD_ALIASES, **CompactProtocol.SHORT_TO_LONG}
+
+
+@dataclass(slots=True)
+class ConnectionInit:
+    """connection_init：模组建立连接后的握手。"""
+
+    type: ClassVar[str] = "connection_init"
+
+    id: str = ""
+    # 上次 connection_ack 下发的恢复令牌，重连时出示以接管原会话
+    resume_token: str = ""
+
+
+@dataclass(slots=True)
+class GameStateUpdate:
+    """game_state_update：游戏状态快照，``data`` 原样保留。"""
+
+    type: ClassVar[str] = "game_state_update"
+
+    id: str = ""
+    data: Dict[str, Any] = field(default_factory=dict)
+    player_name: str = "Unknown"
+
+
+@dataclass(slots=True)
+class ConversationRequest:
+    """conversation_request：玩家对 AI 伙伴说的话。"""
+
+    type: ClassVar[str] = "conversation_request"
+
+    id: str = ""
+    player_name: str = DEFAULT_PLAYER_NAME
+    message: str = ""
+    companion_name: str = DEFAULT_COMPANION_NAME
+    action: Optional[List[Dict[str, Any]]] = None
+    timestamp: Optional[str] = None
+    position: Optional[Dict[str, Any]] = None
+    health: Optional[float] = None
+
+
+@dataclass(slots=True)
+class ConversationAck:
+    """conversation_ack：模组确认已收到 ``id`` 对应的 conversation_response。"""
+
+    type: ClassVar[str] = "conversation_ack"
+
+    id: str = ""
+
+
+@dataclass(slots=True)
+class PlayerConnected:
+    """player_connected：玩家进入世界。"""
+
+    type: ClassVar[str] = "player_connected"
+
+    id: str = ""
+    player_name: str = DEFAULT_PLAYER_NAME
+
+
+@dataclass(slots=True)
+class PlayerDisconnected:
+    """player_disconnected：玩家离开世界。"""
+
+    type: ClassVar[str] = "player_disconnected"
+
+    id: str = ""
+    player_name: str = DEFAULT_PLAYER_NAME
+
+
+@dataclass(slots=True)
+class UnknownMessage:
+    """未注册的消息类型，仅保留类型名供错误提示。"""
+
+    type: str = "unknown"
+    id: str = ""
+
+
+InboundMessage = Union[
+    ConnectionInit,
+    GameStateUpdate,
+    ConversationRequest,
+    ConversationAck,
+    PlayerConnected,
+    PlayerDisconnected,
+    UnknownMessage,
+]
+
+
+# ============ 字段校验 ============
+
+def _text(fields: Dict[str, Any], key: str, default: str, max_length: int | None = None) -> str:
+    """读取文本字段：缺失/空串回退默认值，数字转字符串，其余类型报错。"""
+    value = fields.get(key)
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        text = str(value)
+    else:
+        raise MessageDecodeError(f"{key} 必须是字符串")
+    if max_length is not None and len(text) > max_length:
+        raise MessageDecodeError(f"{key} 长度不能超过 {max_length}")
+    return text
+
+
+def _optional(fields: Dict[str, Any], key: str, expected: type) -> Any:
+    value = fields.get(key)
+    if value is None or isinstance(value, expected):
+        return value
+    raise MessageDecodeError(f"{key} 类型错误，期望 {expected.__name__}")
+
+
+def _number(fields: Dict[str, Any], key: str) -> Optional[float]:
+    value = fields.get(key)
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    raise MessageDecodeError(f"{key} 必须是数字")
+
+
+# ============ 各类型构造 ============
+
+def _build_connection_init(fields: Dict[str, Any], raw: Dict[str, Any]) -> ConnectionInit:
+    return ConnectionInit(id=_text(fields, "id", ""), resume_token=_text(fields, "resumeToken", "", 64))
+
+
+def _build_game_state(fields: Dict[str, Any], raw: Dict[str, Any]) -> GameStateUpdate:
+    data = raw.get("data")
+    if data is None:
+        data = {}
+    elif not isinstance(data, dict):
+        raise MessageDecodeError("data 必须是字典类型")
+    return GameStateUpdate(
+        id=_text(fields, "id", ""),
+        data=data,
+        player_name=_text(fields, "playerName", "Unknown", PLAYER_NAME_MAX_LENGTH),
+    )
+
+
+def _build_conversation(fields: Dict[str, Any], raw: Dict[str, Any]) -> ConversationRequest:
+    return ConversationRequest(
+        id=_text(fields, "id", ""),
+        player_name=_text(fields, "playerName", DEFAULT_PLAYER_NAME, PLAYER_NAME_MAX_LENGTH),
+        message=_text(fields, "message", "", MESSAGE_MAX_LENGTH),
+        companion_name=_text(fields, "companionName", DEFAULT_COMPANION_NAME),
+        action=_optional(fields, "action", list),
+        timestamp=_optional(fields, "timestamp", str),
+        position=_optional(fields, "position", dict),
+        health=_number(fields, "health"),
+    )
+
+
+def _build_conversation_ack(fields: Dict[str, Any], raw: Dict[str, Any]) -> ConversationAck:
+    return ConversationAck(id=_text(fields, "id", ""))
+
+
+def _build_player_connected(fields: Dict[str, Any], raw: Dict[str, Any]) -> PlayerConnected:
+    return PlayerConnected(
+        id=_text(fields, "id", ""),
+        player_name=_text(fields, "playerName", DEFAULT_PLAYER_NAME, PLAYER_NAME_MAX_LENGTH),
+    )
+
+
+def _build_player_disconnected(fields: Dict[str, Any], raw: Dict[str, Any]) -> PlayerDisconnected:
+    return PlayerDisconnected(
+        id=_text(fields, "id", ""),
+        player_name=_text(fields, "playerName", DEFAULT_PLAYER_NAME, PLAYER_NAME_MAX_LENGTH),
+    )
+
+
+_BUILDERS = {
+    ConnectionInit.type: _build_connection_init,
+    GameStateUpdate.type: _build_game_state,
+    ConversationRequest.type: _build_conversation,
+    ConversationAck.type: _build_conversation_ack,
+    PlayerConnected.type: _build_player_connected,
+    PlayerDisconnected.type: _build_player_disconnected,
+}
+
+
+def decode_message(raw: Any) -> InboundMessage:
+    """将 JSON 解析后的原始帧解码为对应的消息结构。
+
+    字段优先级与 ``CompactProtocol.parse`` 相同：顶层字段覆盖旧版 ``data`` 内的同名字段。
+    """
+    if not isinstance(raw, dict):
+        raise MessageDecodeError("消息必须是 JSON 对象")
+
+    fields: Dict[str, Any] = {}
+    data_obj = raw.get("data")
+    if isinstance(data_obj, dict):
+        for key, value in data_obj.items():
+            fields[_KEY_MAP.get(key, key)] = value
+    for key, value in raw.items():
+        if key != "data":
+            fields[_KEY_MAP.get(key, key)] = value
+
+    msg_type = fields.get("type")
+    if not isinstance(msg_type, str) or not msg_type:
+        return UnknownMessage()
+    msg_type = CompactProtocol.TYPE_MAP.get(msg_type, msg_type)
+
+    builder = _BUILDERS.get(msg_type)
+    if builder is None:
+        return UnknownMessage(type=msg_type, id=str(fields.get("id") or ""))
+    return builder(fields, raw)
@@ -3,14 +3,13 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from typing import Dict, Set
 import asyncio
-import json
 from uuid import uuid4
 import logging
 
+from core import serialization
 from core.monitor.event_types import MonitorEventType
 from api.validation import MonitorCommand
-from api.rate_limiter import WebSocketRateLimiter
-from core.dependencies import EventBusDep, MetricsDep
+from core.dependencies import EventBusDep, MetricsDep, MonitorRateLimiterDep
 
 router = APIRouter()
 logger = logging.getLogger("api.monitor_ws")
@@ -18,15 +17,13 @@ logger = logging.getLogger("api.monitor_ws")
 # 活跃监控客户端集合，避免重复推送
 active_monitor_clients: Set[WebSocket] = set()
 
-# 监控 WebSocket 速率限制器（每分钟最多 30 条命令）
-monitor_rate_limiter = WebSocketRateLimiter(max_messages=30, window_seconds=60)
-
 
 @router.websocket('/ws/monitor')
 async def monitor_websocket(
     websocket: WebSocket,
     event_bus: EventBusDep,
     metrics: MetricsDep,
+    monitor_rate_limiter: MonitorRateLimiterDep,
 ) -> None:
     '''
     前端监控专用 WebSocket 端点
@@ -67,7 +64,7 @@ async def monitor_websocket(
             data = await websocket.receive_text()
             
             # 检查速率限制
-            if not monitor_rate_limiter.check_rate_limit(client_id):
+            if not await monitor_rate_limiter.check_rate_limit(client_id):
                 await websocket.send_json({
                     'type': 'error', 
                     'message': '命令发送过快，请稍后再试（限制：30条/分钟）'
@@ -75,11 +72,11 @@ async def monitor_websocket(
                 continue
 
             try:
-                command_dict = json.loads(data)
+                command_dict = serialization.loads(data)
                 # 使用 Pydantic 验证命令
                 validated_cmd = MonitorCommand(**command_dict)
                 command_type = validated_cmd.type
-            except json.JSONDecodeError:
+            except serialization.JSONDecodeError:
                 await websocket.send_json({'type': 'error', 'message': '无效指令格式'})
                 continue
             except Exception as e:
@@ -105,22 +102,24 @@ async def monitor_websocket(
         logger.error('[ERR] Monitor WebSocket error: %s', exc)
     finally:
         # 清理客户端状态并通知事件总线
-        monitor_rate_limiter.clear(client_id)
+        await monitor_rate_limiter.clear(client_id)
         active_monitor_clients.discard(websocket)
         event_bus.publish(MonitorEventType.FRONTEND_DISCONNECTED, {'client_id': client_id})
 
 
 async def broadcast_event_to_monitors(event: Dict) -> None:
     '''广播事件到所有监控客户端'''
+    if not active_monitor_clients:
+        return
     disconnected: Set[WebSocket] = set()
 
+    # 只编码一次，所有客户端复用同一份文本帧
+    encoded = serialization.dumps({'type': 'event', 'event': event})
+
     # 向所有在线监控客户端推送事件
     for client in list(active_monitor_clients):
         try:
-            await client.send_json({
-                'type': 'event',
-                'event': event
-            })
+            await serialization.send_encoded(client, encoded)
         except Exception:
             disconnected.add(client)
 
@@ -129,7 +128,21 @@ async def broadcast_event_to_monitors(event: Dict) -> None:
         active_monitor_clients.discard(client)
 
 
-def register_monitor_subscriptions(event_bus) -> None:
-    """在应用启动时注册事件总线订阅，将事件转发给前端监控连接。"""
+def register_monitor_subscriptions(event_bus, cluster=None) -> None:
+    """在应用启动时注册事件总线订阅，将事件转发给前端监控连接。
+
+    传入集群路由时，本 worker 的事件同时转发给其他 worker，
+    其他 worker 的事件也会推送到本 worker 的监控连接。
+    """
+    def _schedule_broadcast(event: Dict) -> None:
+        # 无监控客户端时不创建任务，避免每个事件都产生一次空调度
+        if active_monitor_clients:
+            asyncio.create_task(broadcast_event_to_monitors(event))
+        if cluster is not None:
+            asyncio.create_task(cluster.publish_event(event))
+
     for event_type in MonitorEventType:
-        event_bus.subscribe(event_type, lambda event: asyncio.create_task(broadcast_event_to_monitors(event)))
+        event_bus.subscribe(event_type, _schedule_broadcast)
+
+    if cluster is not None:
+        cluster.set_event_handler(broadcast_event_to_monitors)
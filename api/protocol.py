@@ -55,6 +55,8 @@ class CompactProtocol:
         "health": "health",
         "hp": "health",
         "id": "id",
+        "resumeToken": "resumeToken",
+        "resume_token": "resumeToken",
         "timestamp": "timestamp",
         "type": "type",
     }
@@ -1,82 +1,245 @@
 """WebSocket 速率限制器"""
 
-from collections import defaultdict, deque
-from datetime import datetime, timedelta, timezone
-from typing import Dict
+import logging
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+from core.monitor.token_tracker import TokenTracker
+from core.storage.interfaces import RateLimitStorage
+
+logger = logging.getLogger("api.rate_limiter")
+
+
+class _Bucket:
+    """单个客户端的令牌桶状态，仅保存两个数值。"""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float) -> None:
+        self.tokens = tokens
+        self.updated_at = updated_at
 
 
 class WebSocketRateLimiter:
     """
     WebSocket 连接速率限制器
-    
-    使用滑动窗口算法限制消息发送频率，防止:
+
+    使用令牌桶算法限制消息发送频率，防止:
     - DoS 攻击
     - 资源耗尽
     - 意外的消息洪水
+
+    每个客户端只保存「剩余令牌 + 上次更新时间」两个数值，基于 ``time.monotonic()``
+    按需补充令牌；不同消息类型可配置不同消耗（如对话请求远贵于状态同步）。
+    长时间空闲（令牌已回满）的客户端会被周期性清理。
     """
-    
-    def __init__(self, max_messages: int = 100, window_seconds: int = 60):
+
+    # 空闲客户端清理的最小间隔（秒）
+    SWEEP_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        max_messages: int = 100,
+        window_seconds: int = 60,
+        costs: Optional[Mapping[str, float]] = None,
+    ):
         """
         初始化速率限制器
-        
+
         Args:
-            max_messages: 时间窗口内最大允许的消息数
-            window_seconds: 时间窗口大小（秒）
+            max_messages: 时间窗口内最大允许的消息数（即桶容量）
+            window_seconds: 时间窗口大小（秒），桶从空到满所需时间
+            costs: 按消息类型配置的令牌消耗，未配置的类型消耗 1
         """
         self.max_messages = max_messages
-        self.window = timedelta(seconds=window_seconds)
-        self.message_times: Dict[str, deque] = defaultdict(deque)
-    
-    def check_rate_limit(self, client_id: str) -> bool:
+        self.window_seconds = window_seconds
+        self.capacity = float(max_messages)
+        self.refill_rate = self.capacity / window_seconds if window_seconds > 0 else float("inf")
+        self.costs: Dict[str, float] = dict(costs or {})
+        self._buckets: Dict[str, _Bucket] = {}
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+
+    def cost_of(self, message_type: Optional[str]) -> float:
+        """返回指定消息类型的令牌消耗。"""
+        if message_type is None:
+            return 1.0
+        return self.costs.get(message_type, 1.0)
+
+    def _refill(self, bucket: _Bucket, now: float) -> None:
+        elapsed = now - bucket.updated_at
+        if elapsed > 0:
+            bucket.tokens = min(self.capacity, bucket.tokens + elapsed * self.refill_rate)
+            bucket.updated_at = now
+
+    def check_rate_limit(self, client_id: str, message_type: Optional[str] = None) -> bool:
         """
-        检查客户端是否超过速率限制
-        
+        检查客户端是否超过速率限制，未超限时扣除对应令牌
+
         Args:
             client_id: 客户端唯一标识
-            
+            message_type: 消息类型，用于查询令牌消耗
+
         Returns:
             True 如果未超限，False 如果已超限
         """
-        now = datetime.now(timezone.utc)
-        
-        # 清理超出时间窗口的旧记录
-        while (self.message_times[client_id] and 
-               now - self.message_times[client_id][0] > self.window):
-            self.message_times[client_id].popleft()
-        
-        # 检查是否超过限制
-        if len(self.message_times[client_id]) >= self.max_messages:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._evict_idle(now)
+
+        cost = self.cost_of(message_type)
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = _Bucket(self.capacity, now)
+            self._buckets[client_id] = bucket
+        else:
+            self._refill(bucket, now)
+
+        if bucket.tokens < cost:
             return False
-        
-        # 记录本次消息时间
-        self.message_times[client_id].append(now)
+
+        bucket.tokens -= cost
         return True
-    
+
+    def _evict_idle(self, now: float) -> None:
+        """清理令牌已回满的客户端：它们的状态与新客户端等价，无需保留。"""
+        idle = [
+            client_id
+            for client_id, bucket in self._buckets.items()
+            if self.refill_rate <= 0
+            or now - bucket.updated_at >= (self.capacity - bucket.tokens) / self.refill_rate
+        ]
+        for client_id in idle:
+            del self._buckets[client_id]
+        self._next_sweep = now + self.SWEEP_INTERVAL
+
     def clear(self, client_id: str) -> None:
         """
         清除客户端的速率限制记录
-        
+
         Args:
             client_id: 客户端唯一标识
         """
-        self.message_times.pop(client_id, None)
-    
+        self._buckets.pop(client_id, None)
+
     def get_remaining_quota(self, client_id: str) -> int:
         """
         获取客户端剩余配额
-        
+
         Args:
             client_id: 客户端唯一标识
-            
+
         Returns:
-            剩余可发送的消息数量
+            剩余可发送的消息数量（按消耗为 1 计算）
+        """
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            return self.max_messages
+        self._refill(bucket, time.monotonic())
+        return max(0, int(bucket.tokens))
+
+    def tracked_clients(self) -> int:
+        """当前仍持有状态的客户端数量。"""
+        return len(self._buckets)
+
+
+class SharedRateLimiter:
+    """
+    多 worker 共享的速率限制器
+
+    先用本地令牌桶预检：本地拒绝的消息在全局也必然超限，无需访问存储；
+    本地放行后再通过 RateLimitStorage（Redis GCRA 脚本）做全局判定。
+    未配置存储时退化为纯本地限流。
+    """
+
+    def __init__(
+        self,
+        local: WebSocketRateLimiter,
+        storage: Optional[RateLimitStorage] = None,
+        namespace: str = "mod",
+    ):
+        """
+        Args:
+            local: 本地令牌桶，容量/速率/消耗配置同时用于全局判定
+            storage: 共享限流存储，None 表示仅本地限流
+            namespace: 限流键前缀，区分模组与监控连接
+        """
+        self.local = local
+        self.storage = storage
+        self.namespace = namespace
+
+    def _key(self, client_id: str) -> str:
+        return f"ratelimit:{self.namespace}:{client_id}"
+
+    async def check_rate_limit(self, client_id: str, message_type: Optional[str] = None) -> bool:
+        """检查客户端是否超过速率限制（本地预检 + 全局判定）。"""
+        if not self.local.check_rate_limit(client_id, message_type):
+            return False
+        if self.storage is None:
+            return True
+        try:
+            allowed, _ = await self.storage.acquire(
+                self._key(client_id),
+                cost=self.local.cost_of(message_type),
+                rate=self.local.refill_rate,
+                burst=self.local.capacity,
+            )
+        except Exception as exc:  # noqa: BLE001
+            # 存储不可用时放行，避免限流组件故障导致全部消息被拒
+            logger.warning("全局限流检查失败，已降级为本地限流: %s", exc)
+            return True
+        return allowed
+
+    async def clear(self, client_id: str) -> None:
+        """清除客户端的本地与全局限流记录。"""
+        self.local.clear(client_id)
+        if self.storage is not None:
+            try:
+                await self.storage.reset(self._key(client_id))
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("清除全局限流记录失败: %s", exc)
+
+
+class LLMSpendLimiter:
+    """
+    全局 LLM Token 消耗限制器（tokens/分钟）
+
+    调用前按 prompt 估算值预扣，调用后按实际 usage 补记差额，
+    所有 worker 共享同一个预算。
+    """
+
+    KEY = "ratelimit:llm_tokens"
+
+    def __init__(self, tokens_per_minute: int, storage: RateLimitStorage):
+        self.tokens_per_minute = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.burst = float(tokens_per_minute)
+        self.storage = storage
+
+    @staticmethod
+    def estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+        """按 TokenTracker 的字符估算口径估算 prompt token 数。"""
+        return sum(TokenTracker.count_tokens(str(m.get("content", ""))) for m in messages) + 1
+
+    async def try_acquire(self, tokens: int) -> bool:
+        """预扣 token，预算不足时返回 False。"""
+        try:
+            allowed, _ = await self.storage.acquire(
+                self.KEY, cost=tokens, rate=self.rate, burst=self.burst
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("LLM Token 预算检查失败，已放行: %s", exc)
+            return True
+        return allowed
+
+    async def record(self, tokens: int) -> None:
+        """补记实际消耗与预扣的差额（不受预算限制，超支部分会推迟后续请求）；
+        负数表示退还：预估偏高，或请求未发出 / 未完成。
         """
-        now = datetime.now(timezone.utc)
-        
-        # 清理过期记录
-        while (self.message_times[client_id] and 
-               now - self.message_times[client_id][0] > self.window):
-            self.message_times[client_id].popleft()
-        
-        used = len(self.message_times[client_id])
-        return max(0, self.max_messages - used)
+        if tokens == 0:
+            return
+        try:
+            await self.storage.acquire(
+                self.KEY, cost=tokens, rate=self.rate, burst=self.burst, force=True
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("LLM Token 消耗记账失败: %s", exc)
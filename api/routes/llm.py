@@ -3,16 +3,18 @@
 该路由接收玩家消息，通过 LLMService 调用真实大模型，并返回响应。
 """
 
-import json
+import asyncio
 import logging
-from pathlib import Path
 from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, ConfigDict, Field
 
 from api.protocol import CompactProtocol
+from core import serialization
 from core.dependencies import LLMDep
+from core.llm.admission import LLMPriority
+from core.llm.errors import LLMBusyError, LLMRateLimitedError
 
 logger = logging.getLogger("api.routes.llm")
 
@@ -73,26 +75,35 @@ async def handle_player_request(payload: ConversationRequest, llm: LLMDep) -> Di
     standard_request: Dict[str, Any] = payload.model_dump(
         by_alias=True, exclude_none=True
     )
-    masked_payload = standard_request.copy()
-    llm_config_log = standard_request.get("llmConfig")
-    if llm_config_log:
-        masked_payload["llmConfig"] = llm_config_log.copy()
-        if llm_config_log.get("apiKey"):
-            masked_payload["llmConfig"]["apiKey"] = _mask_api_key(llm_config_log.get("apiKey"))
-    logger.info("收到玩家 LLM 请求: payload=%s", masked_payload)
+    # 完整请求/响应内容只在 DEBUG 级别输出，INFO 下不做复制与脱敏
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        masked_payload = standard_request.copy()
+        llm_config_log = standard_request.get("llmConfig")
+        if llm_config_log:
+            masked_payload["llmConfig"] = llm_config_log.copy()
+            if llm_config_log.get("apiKey"):
+                masked_payload["llmConfig"]["apiKey"] = _mask_api_key(llm_config_log.get("apiKey"))
+        logger.debug("收到玩家 LLM 请求: payload=%s", masked_payload)
 
     try:
         
-        # 如果前端提供了 LLM 配置，则覆盖后端默认配置
+        # 如果前端提供了 LLM 配置，仅对本次请求覆盖后端配置，不修改共享快照
+        config = llm.config
         if payload.llmConfig:
-            logger.info(f"使用前端提供的 LLM 配置: provider={payload.llmConfig.get('provider')}, model={payload.llmConfig.get('model')}")
-            llm.config["provider"] = payload.llmConfig.get("provider", llm.config["provider"])
-            llm.config["model"] = payload.llmConfig.get("model", llm.config["model"])
-            llm.config["api_key"] = payload.llmConfig.get("apiKey", llm.config["api_key"])
-            llm.config["base_url"] = payload.llmConfig.get("baseUrl", llm.config["base_url"])
-
-        api_key = llm.config.get("api_key")
-        if not api_key:
+            logger.info(
+                "使用前端提供的 LLM 配置: provider=%s, model=%s",
+                payload.llmConfig.get("provider"),
+                payload.llmConfig.get("model"),
+            )
+            config = config.with_overrides(
+                provider=payload.llmConfig.get("provider"),
+                model=payload.llmConfig.get("model"),
+                api_key=payload.llmConfig.get("apiKey"),
+                base_url=payload.llmConfig.get("baseUrl"),
+            )
+
+        if not config.api_key:
             logger.error("LLM 请求失败：API Key 未配置")
             raise HTTPException(status_code=400, detail="API Key 未配置")
         
@@ -107,16 +118,19 @@ async def handle_player_request(payload: ConversationRequest, llm: LLMDep) -> Di
         ]
 
         # 2. 调用 LLM 服务（禁用缓存，确保每次对话都是新生成的）
-        logger.info("LLM 消息内容: %s", messages)
-        response = await llm.chat_completion(messages=messages, use_cache=False)
+        logger.debug("LLM 消息内容: %s", messages)
+        response = await llm.chat_completion(
+            messages=messages, use_cache=False, priority=LLMPriority.DASHBOARD, config=config
+        )
 
         # 3. 解析响应
         llm_reply = response["choices"][0]["message"]["content"]
-        try:
-            response_preview = json.dumps(response, ensure_ascii=False)
-        except TypeError:
-            response_preview = str(response)
-        logger.info("LLM 原始响应（前 200 字符）: %s", response_preview[:200])
+        if debug:
+            try:
+                response_preview = serialization.preview(serialization.dumps(response), 200)
+            except TypeError:
+                response_preview = str(response)[:200]
+            logger.debug("LLM 原始响应（前 200 字符）: %s", response_preview)
         
         # 4. 构造标准响应
         standard_response: Dict[str, Any] = {
@@ -130,19 +144,22 @@ async def handle_player_request(payload: ConversationRequest, llm: LLMDep) -> Di
         # 5. 协议转换 (保持兼容性)
         compact_response = CompactProtocol.compact(standard_response)
         expanded_response = CompactProtocol.parse(compact_response)
-        logger.info("LLM 响应: %s", expanded_response)
+        logger.debug("LLM 响应: %s", expanded_response)
 
         return expanded_response
+    except LLMRateLimitedError as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+    except LLMBusyError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
     except Exception as exc:
         logger.exception("处理 LLM 请求失败: %s", exc)
         raise HTTPException(status_code=500, detail=f"LLM 处理失败: {str(exc)}") from exc
 
 
 @router.post("/config")
-async def save_llm_config(payload: LLMConfigRequest, llm: LLMDep, request: Request) -> Dict[str, str]:
-    """保存 LLM 配置并刷新后端依赖。"""
+async def save_llm_config(payload: LLMConfigRequest, llm: LLMDep) -> Dict[str, Any]:
+    """保存 LLM 配置并热重载。"""
 
-    settings_path = Path("config/settings.json")
     try:
         logger.info(
             "收到 LLM 配置保存请求: provider=%s, model=%s, baseUrl=%s, apiKey=%s",
@@ -152,50 +169,17 @@ async def save_llm_config(payload: LLMConfigRequest, llm: LLMDep, request: Reque
             _mask_api_key(payload.apiKey),
         )
 
-        config_data: Dict[str, Any] = {}
-        if settings_path.exists():
-            with open(settings_path, "r", encoding="utf-8") as file:
-                loaded = json.load(file)
-                if isinstance(loaded, dict):
-                    config_data = loaded
-        else:
-            settings_path.parent.mkdir(parents=True, exist_ok=True)
-
-        llm_section = config_data.get("llm", {})
-        if not isinstance(llm_section, dict):
-            llm_section = {}
-
-        llm_section.update(
-            {
-                "provider": payload.provider,
-                "model": payload.model,
-                "api_key": payload.apiKey,
-                "base_url": payload.baseUrl,
-            }
+        # 原子写入配置文件并替换共享快照，进行中的请求继续使用旧快照
+        config = await asyncio.to_thread(
+            llm.config_store.update,
+            provider=payload.provider,
+            model=payload.model,
+            api_key=payload.apiKey,
+            base_url=payload.baseUrl,
         )
-        config_data["llm"] = llm_section
-
-        with open(settings_path, "w", encoding="utf-8") as file:
-            json.dump(config_data, file, ensure_ascii=False, indent=2)
-
-        # 热重载 HTTP 路由使用的 LLM 实例
-        if hasattr(llm, "_load_config"):
-            try:
-                llm.config = llm._load_config()  # type: ignore[attr-defined]
-                logger.info("HTTP 路由 LLM 配置已重新加载")
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("HTTP 路由 LLM 配置热加载失败: %s", exc)
-
-        # 热重载 WebSocket 使用的 LLM 实例
-        if hasattr(request.app.state, "llm_service"):
-            try:
-                if hasattr(request.app.state.llm_service, "_load_config"):
-                    request.app.state.llm_service.config = request.app.state.llm_service._load_config()
-                    logger.info("✅ WebSocket LLM 配置已重新加载")
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("WebSocket LLM 配置热加载失败: %s", exc)
+        logger.info("✅ LLM 配置已重新加载: version=%d", config.version)
 
-        return {"status": "ok", "message": "配置已保存"}
+        return {"status": "ok", "message": "配置已保存", "version": config.version}
     except Exception as exc:  # noqa: BLE001
         logger.exception("保存 LLM 配置失败: %s", exc)
         raise HTTPException(status_code=500, detail="保存 LLM 配置失败，请稍后重试") from exc
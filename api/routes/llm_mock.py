@@ -64,7 +64,7 @@ async def handle_player_request(payload: ConversationRequest, llm: LLMDep) -> Di
         ]
 
         # 2. 调用 LLM 服务
-        logger.info(f"调用 LLM: {messages}")
+        logger.debug("调用 LLM: %s", messages)
         response = await llm.chat_completion(messages=messages)
         
         # 3. 解析响应
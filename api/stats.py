@@ -3,7 +3,7 @@
 from fastapi import APIRouter
 
 from core.dependencies import MetricsDep
-from models.monitor import TokenTrendStats
+from models.monitor import LLMRequestStats, TokenTrendStats
 
 router = APIRouter()
 
@@ -14,6 +14,12 @@ async def get_token_trend(metrics: MetricsDep) -> TokenTrendStats:
     return metrics.get_token_trend()
 
 
+@router.get("/llm", response_model=LLMRequestStats)
+async def get_llm_stats(metrics: MetricsDep) -> LLMRequestStats:
+    """获取 LLM 并发、排队耗时与负载削减统计。"""
+    return metrics.get_llm_stats()
+
+
 @router.post("/token-trend/test")
 async def inject_test_tokens(metrics: MetricsDep, tokens: int = 100) -> dict:
     """测试用：注入指定数量的 token 到当前小时统计。"""
@@ -0,0 +1,211 @@
+"""模组流量录制。
+
+录制开启时，``/ws`` 收到的每个原始帧连同到达时间写入 gzip 压缩的 JSON 行文件，
+供 ``scripts/replay_traffic.py`` 按原速、N 倍速或最快速度回放，用于复现线上变慢的问题。
+
+文件格式（每行一个 JSON 对象）：
+- 首行为文件头：``{"format": "mc-traffic", "version": 1, "started_at": ..., "redacted": ...}``
+- 之后每行一个事件：``{"t": 相对开始的秒数, "c": 连接序号, "k": "open"|"in"|"close", "d": 帧文本}``
+
+开启脱敏时，``id``/``type``/``timestamp`` 原样保留，玩家与伙伴名称替换为稳定的假名
+（同一名字总是得到同一假名），其余字符串按字符替换（ASCII → ``x``，其他 → ``中``），
+保持消息结构与长度不变。
+
+录制线程只从队列取事件，脱敏、编码与压缩都不在事件循环中执行；未开启录制时
+``record`` 只是一次属性判断。
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Optional, Tuple
+
+from api.protocol import CompactProtocol
+from core import serialization
+from models.monitor import TrafficCaptureStatus
+
+logger = logging.getLogger("api.traffic_capture")
+
+CAPTURE_FORMAT = "mc-traffic"
+CAPTURE_VERSION = 1
+
+# 脱敏时原样保留的字段（标准字段名）
+_KEEP_FIELDS = frozenset({"id", "type", "timestamp"})
+# 替换为稳定假名的字段
+_NAME_FIELDS = frozenset({"playerName", "companionName"})
+
+# (相对秒数, 连接序号, 事件类型, 帧文本)
+_Event = Tuple[float, int, str, Optional[str]]
+_STOP = None
+
+
+def _field_name(key: str) -> str:
+    """把短键、别名统一为标准字段名。"""
+    key = CompactProtocol.SHORT_TO_LONG.get(key, key)
+    return CompactProtocol.FIELD_ALIASES.get(key, key)
+
+
+def _mask_text(text: str) -> str:
+    return "".join("x" if ch.isascii() else "中" for ch in text)
+
+
+def _pseudonym(name: str) -> str:
+    return "p-" + hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]
+
+
+def _redact(value: Any, field: str = "") -> Any:
+    if isinstance(value, dict):
+        return {key: _redact(item, _field_name(key)) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_redact(item, field) for item in value]
+    if isinstance(value, str):
+        if field in _KEEP_FIELDS:
+            return value
+        if field in _NAME_FIELDS:
+            return _pseudonym(value)
+        return _mask_text(value)
+    return value
+
+
+def redact_frame(text: str) -> str:
+    """脱敏一个原始帧；非 JSON 帧整体按字符替换。"""
+    try:
+        payload = serialization.loads(text)
+    except serialization.JSONDecodeError:
+        return _mask_text(text)
+    return serialization.dumps_text(_redact(payload))
+
+
+class TrafficCapture:
+    """``/ws`` 入站帧录制器，由 lifespan 创建，经 API 开启与停止。"""
+
+    def __init__(self, directory: str = "captures", redact: bool = True, max_frames: int = 100_000) -> None:
+        """
+        Args:
+            directory: 录制文件所在目录
+            redact: 是否脱敏帧内容
+            max_frames: 单次录制的最大帧数，达到后自动停止，避免占满磁盘
+        """
+        self.directory = Path(directory)
+        self.redact = redact
+        self.max_frames = max_frames
+        self._queue: Optional["queue.SimpleQueue[Optional[_Event]]"] = None
+        self._writer: Optional[threading.Thread] = None
+        self._path: Optional[str] = None
+        self._started = 0.0
+        self._started_at: Optional[datetime] = None
+        self._frames = 0
+        self._connections = itertools.count(1)
+
+    @property
+    def enabled(self) -> bool:
+        return self._queue is not None
+
+    def start(self, name: Optional[str] = None) -> TrafficCaptureStatus:
+        """开始录制到录制目录下的 ``name``（已在录制时先停止当前录制）。
+
+        未指定文件名时按时间与进程号生成（多 worker 各写各的文件）。文件名含路径时抛出
+        ``ValueError``，文件无法创建时抛出 ``OSError``。
+        """
+        started_at = datetime.now(timezone.utc)
+        if name is None:
+            name = f"traffic-{started_at:%Y%m%d-%H%M%S}-{os.getpid()}.jsonl.gz"
+        elif not name or Path(name).name != name or name in (".", ".."):
+            raise ValueError(f"录制文件名无效: {name!r}")
+        self.stop()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = str(self.directory / name)
+        stream = gzip.open(path, "wb")
+        header = {
+            "format": CAPTURE_FORMAT,
+            "version": CAPTURE_VERSION,
+            "started_at": started_at.isoformat(),
+            "redacted": self.redact,
+        }
+        stream.write(serialization.dumps(header) + b"\n")
+        events: "queue.SimpleQueue[Optional[_Event]]" = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._write, args=(events, stream, self.redact), name="traffic-capture", daemon=True
+        )
+        self._writer.start()
+        self._path = path
+        self._started = time.monotonic()
+        self._started_at = started_at
+        self._frames = 0
+        self._queue = events
+        logger.info("开始录制模组流量: %s (redact=%s)", path, self.redact)
+        return self.status()
+
+    def stop(self) -> TrafficCaptureStatus:
+        """停止录制；写入线程在后台写完剩余事件后关闭文件。"""
+        events, self._queue = self._queue, None
+        if events is not None:
+            events.put(_STOP)
+            logger.info("停止录制模组流量: %s (frames=%d)", self._path, self._frames)
+        return self.status()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """等待写入线程结束（服务关闭时调用，确保文件完整）。"""
+        self.stop()
+        if self._writer is not None:
+            self._writer.join(timeout)
+            self._writer = None
+
+    def open_connection(self) -> int:
+        """登记一个新连接，返回其序号（未录制时也分配，序号在进程内唯一）。"""
+        conn = next(self._connections)
+        self._put(conn, "open", None)
+        return conn
+
+    def record(self, conn: int, data: str) -> None:
+        """记录一个入站帧。"""
+        if self._queue is None:
+            return
+        self._put(conn, "in", data)
+        self._frames += 1
+        if self._frames >= self.max_frames:
+            logger.warning("流量录制达到帧数上限 %d，自动停止", self.max_frames)
+            self.stop()
+
+    def close_connection(self, conn: int) -> None:
+        self._put(conn, "close", None)
+
+    def _put(self, conn: int, kind: str, data: Optional[str]) -> None:
+        events = self._queue
+        if events is not None:
+            events.put((time.monotonic() - self._started, conn, kind, data))
+
+    @staticmethod
+    def _write(events: "queue.SimpleQueue[Optional[_Event]]", stream: IO[bytes], redact: bool) -> None:
+        try:
+            while True:
+                event = events.get()
+                if event is _STOP:
+                    return
+                offset, conn, kind, data = event
+                line: dict = {"t": round(offset, 4), "c": conn, "k": kind}
+                if data is not None:
+                    line["d"] = redact_frame(data) if redact else data
+                stream.write(serialization.dumps(line) + b"\n")
+        except Exception:  # noqa: BLE001
+            logger.exception("写入流量录制文件失败，录制已中断")
+        finally:
+            stream.close()
+
+    def status(self) -> TrafficCaptureStatus:
+        return TrafficCaptureStatus(
+            enabled=self.enabled,
+            path=self._path,
+            started_at=self._started_at,
+            frames=self._frames,
+            redact=self.redact,
+        )
@@ -4,6 +4,10 @@ from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, validator
 
+# 模组消息字段长度限制（api/messages.py 解码时使用同一组常量）
+PLAYER_NAME_MAX_LENGTH = 100
+MESSAGE_MAX_LENGTH = 1000
+
 
 class ModMessageBase(BaseModel):
     """模组消息基础模型"""
@@ -36,8 +40,8 @@ class ConversationRequestMessage(ModMessageBase):
     """对话请求消息"""
 
     type: Literal["conversation_request"]
-    playerName: Optional[str] = Field(None, min_length=1, max_length=100)
-    message: Optional[str] = Field(None, max_length=1000)
+    playerName: Optional[str] = Field(None, min_length=1, max_length=PLAYER_NAME_MAX_LENGTH)
+    message: Optional[str] = Field(None, max_length=MESSAGE_MAX_LENGTH)
     companionName: Optional[str] = None
     action: Optional[List[Dict[str, Any]]] = None
     timestamp: Optional[str] = None
@@ -53,8 +57,8 @@ class ModMessage(BaseModel):
     id: Optional[str] = None
 
     # conversation_request 特有字段
-    playerName: Optional[str] = Field(None, min_length=1, max_length=100)
-    message: Optional[str] = Field(None, max_length=1000)
+    playerName: Optional[str] = Field(None, min_length=1, max_length=PLAYER_NAME_MAX_LENGTH)
+    message: Optional[str] = Field(None, max_length=MESSAGE_MAX_LENGTH)
     companionName: Optional[str] = None
     action: Optional[List[Dict[str, Any]]] = None
     timestamp: Optional[str] = None
@@ -70,6 +74,24 @@ class ModMessage(BaseModel):
         return v
 
 
+class BroadcastRequest(BaseModel):
+    """群发请求（用于 /api/ws/broadcast）"""
+
+    message: ModMessage
+    # 目标连接 ID，与 tags 取并集；两者都为空时发给全部连接
+    client_ids: Optional[List[str]] = None
+    # 目标标签，如 player:Steve
+    tags: Optional[List[str]] = None
+
+
+class TrafficCaptureRequest(BaseModel):
+    """流量录制开关（用于 /api/ws/capture）"""
+
+    enabled: bool
+    # 录制文件名（位于录制目录下），为空时自动生成
+    name: Optional[str] = None
+
+
 class MonitorCommand(BaseModel):
     """监控WebSocket命令"""
 
@@ -1,36 +1,86 @@
-import json
+import asyncio
 from datetime import datetime, timezone
+from functools import partial
 from uuid import uuid4
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 
+from core import serialization
 from core.monitor.event_types import MonitorEventType
-from api.protocol import CompactProtocol
-from api.validation import ModMessage
-from api.rate_limiter import WebSocketRateLimiter
+from api.messages import MessageDecodeError, decode_message
+from api.validation import BroadcastRequest, ModMessage, TrafficCaptureRequest
 from core.monitor.token_tracker import TokenTracker
 from core.dependencies import (
+    ClusterDep,
     EventBusDep,
     MetricsDep,
     ConnectionManagerDep,
     LLMDep,
     ConversationContextDep,
+    DrainDep,
+    IdleReaperDep,
+    ModRateLimiterDep,
+    OutboxDep,
+    SessionResumeDep,
+    TrafficCaptureDep,
 )
 from config.settings import settings
+from models.monitor import DrainStatus, SendResult, TrafficCaptureStatus
+from api.handlers.base import MessageHandler
 from api.handlers.registry import get_handler
 from api.handlers.context import HandlerContext
+from api.messages import InboundMessage
+from core.interfaces import ConversationContextInterface, OutboxInterface, RateLimiterInterface
+from core.monitor.session_resume import ResumableSession
 
 router = APIRouter()
 logger = logging.getLogger("api.websocket")
 
-# WebSocket 速率限制器（配置驱动）
-mod_rate_limiter = WebSocketRateLimiter(
-    max_messages=settings.rate_limit_messages, window_seconds=settings.rate_limit_window
+DRAINING_MESSAGE = "服务即将重启，请稍后重新连接"
+
+CONVERSATION_BUSY_MESSAGE = "上一条消息还在处理中，请稍后再试"
+
+RATE_LIMIT_MESSAGE = (
+    f"消息发送过快，请稍后再试（限制：{settings.rate_limit_messages}条/{settings.rate_limit_window}秒）"
 )
 
 
+async def _run_in_background(
+    handler: MessageHandler,
+    websocket: WebSocket,
+    inbound: InboundMessage,
+    context: HandlerContext,
+    lock: asyncio.Lock,
+) -> None:
+    """在独立任务中执行耗时处理器，同一会话持锁逐个执行；异常只记录不外抛。"""
+    async with lock:
+        context.metrics.record_llm_task_started()
+        try:
+            encoded = await handler.handle(websocket, inbound, context)
+            if encoded and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("→ Sent to %s: %s...", context.client_id, serialization.preview(encoded))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("后台处理失败: client=%s, type=%s, error=%s", context.client_id, inbound.type, exc)
+        finally:
+            context.metrics.record_llm_task_finished()
+
+
+async def _release_client_state(
+    client_id: str,
+    mod_rate_limiter: RateLimiterInterface,
+    conversation_context: ConversationContextInterface,
+    outbox: OutboxInterface,
+) -> None:
+    """清理随会话保留的状态：限流、对话历史与未确认的回复。"""
+    await mod_rate_limiter.clear(client_id)
+    conversation_context.clear_session(client_id)
+    outbox.clear(client_id)
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
@@ -39,15 +89,39 @@ async def websocket_endpoint(
     conn_mgr: ConnectionManagerDep,
     llm_service: LLMDep,
     conversation_context: ConversationContextDep,
+    mod_rate_limiter: ModRateLimiterDep,
+    cluster: ClusterDep,
+    idle_reaper: IdleReaperDep,
+    drain: DrainDep,
+    session_resume: SessionResumeDep,
+    outbox: OutboxDep,
+    capture: TrafficCaptureDep,
 ):
     """
     WebSocket 端点
     当前实现：解析模组消息并触发监控事件
     TODO: 集成 LLM、记忆系统、决策引擎
     """
+    if drain.draining:
+        # 排空中不再接受新连接（握手阶段关闭即拒绝），模组应连接其他实例
+        await websocket.close(code=1013, reason=DRAINING_MESSAGE)
+        return
+
     client_id = f"mod-{uuid4()}"
     await websocket.accept()
     conn_mgr.add(client_id, websocket)
+    try:
+        await cluster.register(client_id)
+    except Exception as exc:  # noqa: BLE001
+        # 集群登记失败（如 Redis 不可用）：撤销本地登记并关闭连接，模组稍后重连
+        logger.error("[ERR] 集群登记失败，关闭连接: client=%s, error=%s", client_id, exc)
+        conn_mgr.remove(client_id)
+        try:
+            await websocket.close(code=1011, reason="服务暂不可用，请稍后重新连接")
+        except Exception:  # noqa: BLE001
+            pass
+        return
+    capture_conn = capture.open_connection()
     logger.info("[OK] Client connected: %s", client_id)
     connection_timestamp = datetime.now(timezone.utc).isoformat()
     event_bus.publish(
@@ -55,32 +129,117 @@ async def websocket_endpoint(
         {"client_id": client_id, "timestamp": connection_timestamp},
     )
     metrics.set_mod_connected(client_id)
+    # 可恢复会话：持有恢复令牌、发送端与仍在执行的后台处理任务
+    session: ResumableSession = session_resume.open(client_id, websocket)
+
+    # 空闲超时：关闭连接并中断阻塞在 receive_text 上的循环（半开连接收不到关闭帧）
+    endpoint_task = asyncio.current_task()
+    reaped = False
+
+    async def reap() -> None:
+        nonlocal reaped
+        reaped = True
+        try:
+            await asyncio.wait_for(websocket.close(code=1001, reason="空闲超时"), timeout=1.0)
+        except Exception:  # noqa: BLE001
+            pass
+        if endpoint_task is not None:
+            endpoint_task.cancel()
+
+    idle_reaper.watch(client_id, reap)
+
+    def owns_session() -> bool:
+        """会话被新连接接管后，本连接不再负责清理与断开通知。"""
+        return session.relay.websocket is websocket
+
+    async def adopt(previous: ResumableSession) -> None:
+        """接管原会话：注销临时 client_id，新连接改用原 client_id 登记。"""
+        nonlocal client_id, session
+        provisional, provisional_session = client_id, session
+        old_websocket = previous.relay.websocket
+        live = conn_mgr.get(previous.client_id) is not None
+        # 先转移发送端，旧连接的处理任务随即改发到新连接
+        previous.relay.websocket = websocket
+        for task in list(provisional_session.tasks):
+            previous.track(task)
+        session_resume.discard(provisional_session)
+        idle_reaper.unwatch(provisional)
+        conn_mgr.remove(provisional)
+        await cluster.unregister(provisional)
+        await _release_client_state(provisional, mod_rate_limiter, conversation_context, outbox)
+
+        client_id, session = previous.client_id, previous
+        conn_mgr.add(client_id, websocket, tags=previous.tags)
+        previous.tags.clear()
+        await cluster.register(client_id)
+        idle_reaper.watch(client_id, reap)
+        metrics.set_mod_connected(client_id)
+        event_bus.publish(
+            MonitorEventType.MOD_CONNECTED,
+            {
+                "client_id": client_id,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "resumed": True,
+            },
+        )
+        logger.info("[OK] Session resumed: %s (was %s)", client_id, provisional)
+        if live and old_websocket is not websocket:
+            # 旧连接可能是半开连接，尽力关闭即可
+            try:
+                await asyncio.wait_for(old_websocket.close(code=1000, reason="会话已在新连接恢复"), timeout=1.0)
+            except Exception:  # noqa: BLE001
+                pass
+
+    async def bind_session(token: str) -> Tuple[str, str, bool]:
+        if not token:
+            return client_id, session.token, False
+        previous = session_resume.redeem(token)
+        if previous is None:
+            # 本地没有该令牌：可能是排空前其他进程签发的令牌，会话快照在状态存储中
+            return client_id, session.token, await drain.redeem(token, client_id)
+        if previous is not session:
+            await adopt(previous)
+        return client_id, session.token, True
 
     try:
         while True:
             # 接收消息
             data = await websocket.receive_text()
-            
+            idle_reaper.touch(client_id)
+            capture.record(capture_conn, data)
+            logger.debug("← Received from %s: %s...", client_id, data[:100])
+
+            # 先解码再限流：令牌消耗取决于消息类型
+            inbound = None
+            decode_error: str | None = None
+            try:
+                inbound = decode_message(serialization.loads(data))
+                msg_type = inbound.type
+            except serialization.JSONDecodeError:
+                msg_type = "invalid_json"
+            except MessageDecodeError as exc:
+                msg_type = "invalid_message"
+                decode_error = str(exc)
+
             # 检查速率限制
-            if not mod_rate_limiter.check_rate_limit(client_id):
+            if not await mod_rate_limiter.check_rate_limit(client_id, msg_type):
                 error_response = {
                     "type": "error",
-                    "data": {"message": "消息发送过快，请稍后再试（限制：100条/分钟）"},
+                    "data": {"message": RATE_LIMIT_MESSAGE},
                 }
-                await websocket.send_json(error_response)
+                if inbound is not None and inbound.id:
+                    error_response["id"] = inbound.id
+                await serialization.send_payload(websocket, error_response)
                 continue  # 跳过此消息，但不断开连接
 
-            logger.debug("← Received from %s: %s...", client_id, data[:100])
-            try:
-                # 解析来自 Mod 的 JSON 消息
-                message = json.loads(data)
-            except json.JSONDecodeError:
+            if inbound is None and decode_error is None:
                 error_response = {
                     "type": "error",
                     "data": {"message": "无法解析 JSON 数据"},
                 }
-                await websocket.send_json(error_response)
-                logger.debug("→ Sent to %s: %s...", client_id, json.dumps(error_response)[:100])
+                encoded = await serialization.send_payload(websocket, error_response)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("→ Sent to %s: %s...", client_id, serialization.preview(encoded))
                 error_timestamp = datetime.now(timezone.utc).isoformat()
                 event_bus.publish(
                     MonitorEventType.MESSAGE_RECEIVED,
@@ -104,15 +263,12 @@ async def websocket_endpoint(
                 )
                 continue
 
-            # 预解析：统一紧凑/标准/旧版 data 结构，确保路由基于长类型值
-            try:
-                normalized_msg = CompactProtocol.parse(message)
-            except Exception:
+            if inbound is None:
                 error_payload = {
                     "type": "error",
-                    "data": {"message": "无法解析协议字段"},
+                    "data": {"message": f"无法解析协议字段: {decode_error}"},
                 }
-                await websocket.send_json(error_payload)
+                await serialization.send_payload(websocket, error_payload)
                 metrics.record_message_sent("error")
                 event_bus.publish(
                     MonitorEventType.MESSAGE_SENT,
@@ -124,7 +280,6 @@ async def websocket_endpoint(
                 )
                 continue
 
-            msg_type = normalized_msg.get("type", "unknown")
             timestamp = datetime.now(timezone.utc).isoformat()
             preview = data[:100]
             event_bus.publish(
@@ -146,10 +301,33 @@ async def websocket_endpoint(
                 metrics=metrics,
                 llm_service=llm_service,
                 conversation_context=conversation_context,
+                connections=conn_mgr,
+                bind_session=bind_session,
+                outbox=outbox,
             )
-            response_preview = None
-            if handler:
-                response_preview = await handler.handle(websocket, normalized_msg, context)
+            encoded_response: bytes | None = None
+            if handler and handler.background and drain.draining:
+                # 排空中只等待已有对话完成，不再开始新的耗时处理
+                await serialization.send_payload(
+                    websocket, {"type": "error", "data": {"message": DRAINING_MESSAGE}}
+                )
+                metrics.record_message_sent("error")
+            elif handler and handler.background and len(session.tasks) >= settings.conversation_max_pending:
+                # 同一连接的对话逐个执行，排队过多时直接拒绝，避免单个模组堆积大量 LLM 请求
+                busy_payload: Dict[str, Any] = {"type": "error", "data": {"message": CONVERSATION_BUSY_MESSAGE}}
+                if inbound.id:
+                    busy_payload["id"] = inbound.id
+                await serialization.send_payload(websocket, busy_payload)
+                metrics.record_message_sent("error")
+            elif handler and handler.background:
+                # 经会话发送端回复：断线重连恢复会话后，回复发到新连接
+                task = asyncio.create_task(
+                    _run_in_background(handler, session.relay, inbound, context, session.handler_lock)
+                )
+                session.track(task)
+                drain.track(task)
+            elif handler:
+                encoded_response = await handler.handle(session.relay, inbound, context)
             else:
                 error_payload = {
                     "type": "error",
@@ -158,8 +336,7 @@ async def websocket_endpoint(
                         "client_id": client_id,
                     },
                 }
-                await websocket.send_json(error_payload)
-                response_preview = json.dumps(error_payload)
+                encoded_response = await serialization.send_payload(websocket, error_payload)
                 metrics.record_message_sent("error")
                 event_bus.publish(
                     MonitorEventType.MESSAGE_SENT,
@@ -170,21 +347,50 @@ async def websocket_endpoint(
                     },
                 )
 
-            if response_preview:
-                logger.debug("→ Sent to %s: %s...", client_id, response_preview[:100])
+            if encoded_response and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("→ Sent to %s: %s...", client_id, serialization.preview(encoded_response))
 
     except WebSocketDisconnect:
         logger.warning("[ERR] Client disconnected: %s", client_id)
-        event_bus.publish(
-            MonitorEventType.MOD_DISCONNECTED,
-            {"client_id": client_id, "timestamp": datetime.now(timezone.utc).isoformat()},
-        )
-        metrics.set_mod_disconnected()
+        if owns_session():
+            event_bus.publish(
+                MonitorEventType.MOD_DISCONNECTED,
+                {"client_id": client_id, "timestamp": datetime.now(timezone.utc).isoformat()},
+            )
+            metrics.set_mod_disconnected()
+    except asyncio.CancelledError:
+        if not reaped:
+            raise
+        # 空闲回收触发的取消：按正常断开处理，不再向上传播
+        asyncio.current_task().uncancel()
+        if owns_session():
+            event_bus.publish(
+                MonitorEventType.MOD_DISCONNECTED,
+                {
+                    "client_id": client_id,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "reason": "idle_timeout",
+                },
+            )
+            metrics.set_mod_disconnected()
     except Exception as e:
         logger.error("[ERR] WebSocket error for %s: %s", client_id, e)
     finally:
-        mod_rate_limiter.clear(client_id)
-        conn_mgr.remove(client_id)
+        capture.close_connection(capture_conn)
+        if owns_session():
+            idle_reaper.unwatch(client_id)
+            session.tags = conn_mgr.get_tags(client_id)
+            conn_mgr.remove(client_id)
+            await cluster.unregister(client_id)
+            # 会话在宽限期内保留（限流、对话历史与进行中的处理），等待模组凭令牌恢复
+            release = partial(_release_client_state, client_id, mod_rate_limiter, conversation_context, outbox)
+            if not session_resume.park(session, release):
+                # 不保留会话：取消仍在等待 LLM 的请求，避免向已断开的连接发送并浪费 token
+                for task in list(session.tasks):
+                    task.cancel()
+                if session.tasks:
+                    await asyncio.gather(*session.tasks, return_exceptions=True)
+                await release()
 
 
 
@@ -195,32 +401,28 @@ async def send_json_to_mod(
     event_bus: EventBusDep,
     metrics: MetricsDep,
     conn_mgr: ConnectionManagerDep,
+    cluster: ClusterDep,
 ):
     """
     从 Web UI 转发原始 JSON 消息到当前已连接的模组。
     主要用于开发阶段临时调试通信链路。
+    多 worker 部署时，目标模组可能连接在其他 worker 上，由集群层转发。
     """
-    if conn_mgr.count() == 0:
-        raise HTTPException(status_code=503, detail="当前没有任何模组通过 WebSocket 连接")
-
-    # 优先使用 MetricsCollector 记录的模组连接 ID
+    # 优先使用 MetricsCollector 记录的模组连接 ID（仅限本 worker 上的连接）
     connection_status = metrics.get_connection_status()
     target_id = connection_status.mod_client_id
 
     if not target_id or not conn_mgr.get(target_id):
-        # 回退：选择任意一个活跃连接
-        ids = conn_mgr.get_all_ids()
+        # 回退：本 worker 上任意一个活跃连接，其次是集群中任意一个连接
+        ids = conn_mgr.get_all_ids() or list(await cluster.list_clients())
         target_id = ids[0] if ids else None
 
     if not target_id:
-        raise HTTPException(status_code=503, detail="找不到可用的模组连接")
-
-    websocket = conn_mgr.get(target_id)
-    if websocket is None:
-        raise HTTPException(status_code=503, detail="模组连接已失效，请重新连接后重试")
+        raise HTTPException(status_code=503, detail="当前没有任何模组通过 WebSocket 连接")
 
     # 将前端提供的 JSON 原样下发给模组（已通过 Pydantic 验证）
-    await websocket.send_json(message.model_dump(exclude_none=True))
+    if not await cluster.send_to_client(target_id, message.model_dump(exclude_none=True)):
+        raise HTTPException(status_code=503, detail="模组连接已失效，请重新连接后重试")
 
     msg_type = message.type
     metrics.record_message_sent(msg_type)
@@ -234,3 +436,79 @@ async def send_json_to_mod(
     )
 
     return {"status": "ok", "target": target_id, "type": msg_type}
+
+
+@router.post("/api/ws/broadcast", response_model=SendResult)
+async def broadcast_to_mods(
+    request: BroadcastRequest,
+    event_bus: EventBusDep,
+    metrics: MetricsDep,
+    conn_mgr: ConnectionManagerDep,
+) -> SendResult:
+    """
+    向多个模组连接群发消息（本 worker 上的连接）。
+    指定 client_ids 或 tags（如 player:Steve）时只发给匹配的连接，均未指定时发给全部连接。
+    """
+    payload = request.message.model_dump(exclude_none=True)
+    if request.client_ids or request.tags:
+        result = await conn_mgr.multicast(
+            payload,
+            client_ids=request.client_ids or (),
+            tags=request.tags or (),
+            timeout=settings.broadcast_send_timeout,
+        )
+    else:
+        result = await conn_mgr.broadcast(payload, timeout=settings.broadcast_send_timeout)
+
+    msg_type = request.message.type
+    for _ in result.delivered:
+        metrics.record_message_sent(msg_type)
+    event_bus.publish(
+        MonitorEventType.MESSAGE_SENT,
+        {
+            "client_id": "broadcast",
+            "message_type": msg_type,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "delivered": len(result.delivered),
+            "failed": len(result.failed),
+        },
+    )
+    return result
+
+
+@router.get("/api/ws/capture", response_model=TrafficCaptureStatus)
+async def get_capture_status(capture: TrafficCaptureDep) -> TrafficCaptureStatus:
+    """查询流量录制状态。"""
+    return capture.status()
+
+
+@router.post("/api/ws/capture", response_model=TrafficCaptureStatus)
+async def toggle_capture(request: TrafficCaptureRequest, capture: TrafficCaptureDep) -> TrafficCaptureStatus:
+    """
+    开始或停止录制模组入站帧（用于回放复现性能问题）。
+    录制文件写入录制目录，可用 scripts/replay_traffic.py 回放。
+    """
+    if not request.enabled:
+        return capture.stop()
+    try:
+        return await asyncio.to_thread(capture.start, request.name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except OSError as exc:
+        raise HTTPException(status_code=500, detail=f"无法创建录制文件: {exc}") from exc
+
+
+@router.get("/api/ws/drain", response_model=DrainStatus)
+async def get_drain_status(drain: DrainDep) -> DrainStatus:
+    """查询排空状态。"""
+    return drain.status()
+
+
+@router.post("/api/ws/drain", response_model=DrainStatus)
+async def start_drain(drain: DrainDep) -> DrainStatus:
+    """
+    开始排空（用于零停机重启）：停止接受新连接、就绪探针返回 503，
+    等待进行中的对话完成后交接会话并关闭全部连接。立即返回，可轮询 GET 查看进度。
+    """
+    drain.start()
+    return drain.status()
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Literal
+from typing import Dict, Literal
 
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -11,9 +11,55 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     """全局配置"""
 
+    # 服务进程数：大于 1 时多个 worker 通过 SO_REUSEPORT 共享端口（建议配合 redis 存储后端）
+    workers: int = 1
+
+    # 模组连接心跳：协议层 ping 间隔/超时（秒），以及无任何消息时的回收时限（秒）
+    ws_ping_interval: float = 20.0
+    ws_ping_timeout: float = 20.0
+    ws_idle_timeout: float = 120.0
+    # 断线后保留会话等待重连恢复的时长（秒），0 表示断开即清理
+    ws_resume_grace: float = 60.0
+    # 未确认对话回复：每个连接最多保留条数与保留时长（秒）
+    outbox_max_pending: int = 32
+    outbox_ttl: float = 600.0
+
+    # 优雅排空：等待进行中对话的最长时间（秒）与会话恢复令牌有效期（秒）
+    drain_timeout: float = 25.0
+    drain_resume_ttl: int = 300
+
+    # 模组流量录制（供 scripts/replay_traffic.py 回放）：录制文件目录、是否启动即录制、是否脱敏
+    traffic_capture_dir: str = "captures"
+    traffic_capture_on_start: bool = False
+    traffic_capture_redact: bool = True
+    # 单次录制的最大帧数，达到后自动停止
+    traffic_capture_max_frames: int = 100_000
+
+    # 启动预热：开始监听后并发导入 LiteLLM、建立服务商与 Redis 连接，完成前就绪探针返回 warming
+    prewarm_enabled: bool = True
+    # 单个预热步骤的最长时间（秒）
+    prewarm_timeout: float = 30.0
+
+    # 事件循环诊断：是否持续采样循环延迟、采样间隔（秒），延迟超过告警值（毫秒）时推送 loop_lag 监控事件
+    loop_diagnostics_enabled: bool = True
+    loop_lag_interval: float = 0.5
+    loop_lag_warn_ms: float = 100.0
+    # 慢回调阈值（毫秒）：事件循环被阻塞超过该时长时记录调用栈，0 表示关闭检测
+    loop_slow_callback_ms: float = 0.0
+
+    # 群发时单个连接的发送时限（秒）
+    broadcast_send_timeout: float = 2.0
+
     # 存储配置
     storage_backend: Literal["memory", "redis"] = "memory"
     redis_url: str = "redis://localhost:6379"
+    # Redis 连接池上限
+    redis_max_connections: int = 20
+    # 缓存值超过该字节数时压缩存储（0 表示不压缩）
+    redis_cache_compress_threshold: int = 1024
+    # 热点缓存键的进程内副本：最大条目数与有效期（秒），任一为 0 时关闭
+    redis_local_cache_size: int = 256
+    redis_local_cache_ttl: float = 30.0
 
     # LLM 配置（新增）
     llm_provider: str = "openai"
@@ -21,17 +67,57 @@ class Settings(BaseSettings):
     llm_api_key: str = ""
     llm_base_url: str = ""
 
+    # LLM 并发控制：在途调用上限与最长排队时间（秒）
+    llm_max_in_flight: int = 8
+    llm_queue_timeout: float = 10.0
+    # 单次对话请求的端到端时限（秒，含排队与生成）
+    conversation_timeout: float = 30.0
+    # 每个连接同时执行或等待中的对话数上限（同一连接的对话逐个执行），超出时直接回复繁忙
+    conversation_max_pending: int = 3
+
     # LLM 缓存配置
     llm_cache_enabled: bool = True
     llm_cache_ttl: int = 3600  # 秒
+    # 检查 config/settings.json 变化并热重载 LLM 配置的间隔（秒），0 表示不监视
+    llm_config_poll_interval: float = 2.0
+    # 按配置（provider/model/base_url）缓存的 LLM 客户端数量上限，超出时淘汰最久未用的
+    llm_client_pool_size: int = 8
+    # 客户端连接池中空闲连接的保留时长（秒）
+    llm_keepalive_expiry: float = 120.0
+    # 服务商端点健康探测：正常/失败时的探测间隔（秒）、单次时限（秒）与判定不可用的连续失败次数
+    llm_probe_enabled: bool = True
+    llm_probe_interval: float = 30.0
+    llm_probe_failure_interval: float = 5.0
+    llm_probe_timeout: float = 5.0
+    llm_probe_failure_threshold: int = 2
+    # 语义缓存：相近的玩家问题复用回答（默认关闭，建议安装 numpy）
+    llm_semantic_cache_enabled: bool = False
+    llm_semantic_cache_threshold: float = 0.9  # 余弦相似度阈值
+    llm_semantic_cache_ttl: int = 600  # 秒
+    llm_semantic_cache_capacity: int = 512  # 每个伙伴人设的最大条目数
+    llm_semantic_cache_max_namespaces: int = 64  # 最多保留的伙伴人设数，超出后淘汰最久未使用的
 
     # 监控配置
     event_history_size: int = 100
     rate_limit_messages: int = 100
     rate_limit_window: int = 60
+    # 按消息类型的令牌消耗（未列出的类型消耗 1），环境变量使用 JSON 格式
+    rate_limit_costs: Dict[str, float] = {"conversation_request": 5.0}
+    monitor_rate_limit_messages: int = 30
+    monitor_rate_limit_window: int = 60
+    # 全局 LLM Token 预算（tokens/分钟，所有 worker 共享），0 表示不限制
+    llm_tokens_per_minute: int = 0
 
     # 日志配置（新增）
     log_level: str = "INFO"
+    # 日志文件路径（按大小轮转），为空时只输出到控制台
+    log_file: str = ""
+    # 日志格式："text" 为可读文本，"json" 为每行一条 JSON
+    log_format: str = "text"
+    # 同一条日志模板每秒最多输出的条数（按 logger 区分，ERROR 及以上不受限），0 表示不限速
+    log_rate_limit: float = 10.0
+    # 日志限速的突发容量
+    log_rate_burst: int = 20
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1 @@
+"""集群层包：跨 worker 的连接注册表与消息路由。"""
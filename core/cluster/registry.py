@@ -0,0 +1,217 @@
+"""跨 worker 的连接注册表与消息路由。
+
+多 worker 部署时，模组连接只存在于接受它的那个进程中。注册表记录 client_id → worker_id，
+需要向某个模组发消息时：
+- 连接在本进程：直接发送；
+- 连接在其他 worker：通过 pub/sub 投递到该 worker 的专属频道，由它转发给模组。
+
+监控事件同样经 pub/sub 广播，任一 worker 上的监控页面都能看到全部 worker 的事件。
+单进程部署使用 ``LocalCluster``，行为与引入集群层之前一致。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core import serialization
+from core.interfaces import ConnectionManagerInterface
+from core.storage.redis import redis_from_url
+
+logger = logging.getLogger("core.cluster.registry")
+
+EventHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def default_worker_id() -> str:
+    """主机名 + 进程号，在同一集群内唯一。"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+async def _send_local(connections: ConnectionManagerInterface, client_id: str, payload: Any) -> bool:
+    websocket = connections.get(client_id)
+    if websocket is None:
+        return False
+    await serialization.send_payload(websocket, payload)
+    return True
+
+
+class LocalCluster:
+    """单进程集群替身：注册表即本地连接表，不做跨进程转发。"""
+
+    def __init__(self, connections: ConnectionManagerInterface, worker_id: Optional[str] = None) -> None:
+        self.connections = connections
+        self.worker_id = worker_id or default_worker_id()
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    async def register(self, client_id: str) -> None:
+        return None
+
+    async def unregister(self, client_id: str) -> None:
+        return None
+
+    async def list_clients(self) -> Dict[str, str]:
+        return {client_id: self.worker_id for client_id in self.connections.get_all_ids()}
+
+    async def send_to_client(self, client_id: str, payload: Any) -> bool:
+        return await _send_local(self.connections, client_id, payload)
+
+    async def publish_event(self, event: Dict[str, Any]) -> None:
+        # 本进程的事件已由本地订阅者广播，无需转发
+        return None
+
+    def set_event_handler(self, handler: EventHandler) -> None:
+        return None
+
+
+class RedisCluster:
+    """
+    基于 Redis 的集群路由
+
+    - ``cluster:clients`` 哈希表保存 client_id → worker_id；
+    - ``cluster:worker:{worker_id}`` 频道接收发给本 worker 上模组的消息；
+    - ``cluster:monitor`` 频道在所有 worker 之间转发监控事件。
+    """
+
+    CLIENTS_KEY = "cluster:clients"
+    MONITOR_CHANNEL = "cluster:monitor"
+    # 没有其他 worker 收听监控频道时的转发暂停时长（秒）
+    PEER_IDLE_BACKOFF = 5.0
+
+    def __init__(
+        self,
+        connections: ConnectionManagerInterface,
+        url: str = "redis://localhost:6379",
+        worker_id: Optional[str] = None,
+        client: Any = None,
+    ) -> None:
+        if client is None:
+            client = redis_from_url(url, decode_responses=False)
+        self._redis = client
+        self.connections = connections
+        self.worker_id = worker_id or default_worker_id()
+        self._owned: set[str] = set()
+        self._event_handler: Optional[EventHandler] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+        self._peers_idle_until = 0.0
+
+    @property
+    def worker_channel(self) -> str:
+        return f"cluster:worker:{self.worker_id}"
+
+    async def start(self) -> None:
+        """启动订阅任务，订阅建立（或等待超时）后返回。"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+            try:
+                await asyncio.wait_for(self._subscribed.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                # Redis 暂不可用时不阻塞启动，订阅任务会在后台持续重连
+                logger.warning("集群订阅尚未建立，跨 worker 消息暂不可用")
+
+    async def stop(self) -> None:
+        """停止订阅并清理本 worker 登记的连接。"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._owned:
+            await self._redis.hdel(self.CLIENTS_KEY, *self._owned)
+            self._owned.clear()
+        await self._redis.aclose()
+
+    async def register(self, client_id: str) -> None:
+        self._owned.add(client_id)
+        await self._redis.hset(self.CLIENTS_KEY, client_id, self.worker_id)
+
+    async def unregister(self, client_id: str) -> None:
+        self._owned.discard(client_id)
+        # 仅删除仍归属本 worker 的登记，避免误删重连到其他 worker 的同名连接
+        owner = await self._redis.hget(self.CLIENTS_KEY, client_id)
+        if owner is not None and owner.decode("utf-8") == self.worker_id:
+            await self._redis.hdel(self.CLIENTS_KEY, client_id)
+
+    async def list_clients(self) -> Dict[str, str]:
+        mapping = await self._redis.hgetall(self.CLIENTS_KEY)
+        return {k.decode("utf-8"): v.decode("utf-8") for k, v in mapping.items()}
+
+    async def send_to_client(self, client_id: str, payload: Any) -> bool:
+        """发送到模组所在的 worker；目标不存在或所在 worker 已下线时返回 False。"""
+        if await _send_local(self.connections, client_id, payload):
+            return True
+        owner = await self._redis.hget(self.CLIENTS_KEY, client_id)
+        if owner is None:
+            return False
+        owner_id = owner.decode("utf-8")
+        if owner_id == self.worker_id:
+            # 登记残留（连接已断开但尚未注销）
+            return False
+        envelope = serialization.dumps({"client_id": client_id, "payload": payload})
+        receivers = await self._redis.publish(f"cluster:worker:{owner_id}", envelope)
+        if receivers == 0:
+            # 所属 worker 已退出，清理残留登记
+            logger.warning("目标 worker 不在线，清理连接登记: client=%s, worker=%s", client_id, owner_id)
+            await self._redis.hdel(self.CLIENTS_KEY, client_id)
+            return False
+        return True
+
+    async def publish_event(self, event: Dict[str, Any]) -> None:
+        # 最近一次发布只有本 worker 在收听时，暂停转发一段时间，避免单 worker 部署空转
+        now = time.monotonic()
+        if now < self._peers_idle_until:
+            return
+        envelope = serialization.dumps({"worker_id": self.worker_id, "event": event})
+        try:
+            receivers = await self._redis.publish(self.MONITOR_CHANNEL, envelope)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("转发监控事件失败: %s", exc)
+            return
+        if receivers <= 1:
+            self._peers_idle_until = now + self.PEER_IDLE_BACKOFF
+
+    def set_event_handler(self, handler: EventHandler) -> None:
+        self._event_handler = handler
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.worker_channel, self.MONITOR_CHANNEL)
+                self._subscribed.set()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._dispatch(message["channel"].decode("utf-8"), message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("集群订阅中断，1 秒后重连: %s", exc)
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:  # noqa: BLE001
+                    pass
+
+    async def _dispatch(self, channel: str, data: bytes) -> None:
+        try:
+            envelope = serialization.loads(data)
+            if channel == self.MONITOR_CHANNEL:
+                if envelope.get("worker_id") != self.worker_id and self._event_handler is not None:
+                    await self._event_handler(envelope["event"])
+            elif not await _send_local(self.connections, envelope["client_id"], envelope["payload"]):
+                logger.warning("转发目标不在本 worker: client=%s", envelope.get("client_id"))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("处理集群消息失败: channel=%s, error=%s", channel, exc)
@@ -11,8 +11,18 @@ from core.interfaces import (
     EventBusInterface,
     MetricsInterface,
     LLMServiceInterface,
+    LLMHealthInterface,
+    ClusterInterface,
     ConnectionManagerInterface,
     ConversationContextInterface,
+    DrainControllerInterface,
+    IdleReaperInterface,
+    LoopDiagnosticsInterface,
+    OutboxInterface,
+    PrewarmInterface,
+    SessionResumeInterface,
+    RateLimiterInterface,
+    TrafficCaptureInterface,
 )
 from core.storage.interfaces import CacheStorage
 
@@ -32,10 +42,46 @@ def get_llm_service(conn: HTTPConnection) -> LLMServiceInterface:
     return conn.app.state.llm_service
 
 
+def get_llm_health(conn: HTTPConnection) -> LLMHealthInterface:
+    return conn.app.state.llm_health
+
+
 def get_connection_manager(conn: HTTPConnection) -> ConnectionManagerInterface:
     return conn.app.state.connection_manager
 
 
+def get_cluster(conn: HTTPConnection) -> ClusterInterface:
+    return conn.app.state.cluster
+
+
+def get_idle_reaper(conn: HTTPConnection) -> IdleReaperInterface:
+    return conn.app.state.idle_reaper
+
+
+def get_drain_controller(conn: HTTPConnection) -> DrainControllerInterface:
+    return conn.app.state.drain
+
+
+def get_traffic_capture(conn: HTTPConnection) -> TrafficCaptureInterface:
+    return conn.app.state.traffic_capture
+
+
+def get_loop_diagnostics(conn: HTTPConnection) -> LoopDiagnosticsInterface:
+    return conn.app.state.loop_diagnostics
+
+
+def get_prewarm(conn: HTTPConnection) -> PrewarmInterface:
+    return conn.app.state.prewarm
+
+
+def get_session_resume(conn: HTTPConnection) -> SessionResumeInterface:
+    return conn.app.state.session_resume
+
+
+def get_outbox(conn: HTTPConnection) -> OutboxInterface:
+    return conn.app.state.outbox
+
+
 def get_cache_storage(conn: HTTPConnection) -> CacheStorage:
     return conn.app.state.cache_storage
 
@@ -44,10 +90,29 @@ def get_conversation_context(conn: HTTPConnection) -> ConversationContextInterfa
     return conn.app.state.conversation_context
 
 
+def get_mod_rate_limiter(conn: HTTPConnection) -> RateLimiterInterface:
+    return conn.app.state.mod_rate_limiter
+
+
+def get_monitor_rate_limiter(conn: HTTPConnection) -> RateLimiterInterface:
+    return conn.app.state.monitor_rate_limiter
+
+
 # 类型别名，便于在路由上直接声明
 EventBusDep = Annotated[EventBusInterface, Depends(get_event_bus)]
 MetricsDep = Annotated[MetricsInterface, Depends(get_metrics)]
 LLMDep = Annotated[LLMServiceInterface, Depends(get_llm_service)]
+LLMHealthDep = Annotated[LLMHealthInterface, Depends(get_llm_health)]
 ConnectionManagerDep = Annotated[ConnectionManagerInterface, Depends(get_connection_manager)]
+ClusterDep = Annotated[ClusterInterface, Depends(get_cluster)]
+IdleReaperDep = Annotated[IdleReaperInterface, Depends(get_idle_reaper)]
+DrainDep = Annotated[DrainControllerInterface, Depends(get_drain_controller)]
+TrafficCaptureDep = Annotated[TrafficCaptureInterface, Depends(get_traffic_capture)]
+LoopDiagnosticsDep = Annotated[LoopDiagnosticsInterface, Depends(get_loop_diagnostics)]
+PrewarmDep = Annotated[PrewarmInterface, Depends(get_prewarm)]
+SessionResumeDep = Annotated[SessionResumeInterface, Depends(get_session_resume)]
+OutboxDep = Annotated[OutboxInterface, Depends(get_outbox)]
 CacheStorageDep = Annotated[CacheStorage, Depends(get_cache_storage)]
 ConversationContextDep = Annotated[ConversationContextInterface, Depends(get_conversation_context)]
+ModRateLimiterDep = Annotated[RateLimiterInterface, Depends(get_mod_rate_limiter)]
+MonitorRateLimiterDep = Annotated[RateLimiterInterface, Depends(get_monitor_rate_limiter)]
@@ -0,0 +1,161 @@
+"""优雅排空：零停机重启前的连接交接。
+
+排空开始后：
+1. 不再接受新的 ``/ws`` 连接，就绪探针返回 503，负载均衡把新流量导向其他实例；
+2. 等待进行中的对话处理完成，最长 ``timeout`` 秒；
+3. 把每个连接的会话快照写入状态存储，向模组发送 ``server_draining`` 消息（附恢复令牌），
+   然后并发关闭全部连接。1000 个连接的交接耗时取决于最慢的单个连接，而不是连接总数。
+
+跨重启恢复会话需要共享的状态存储（redis 后端）；内存后端的快照只在本进程内有效。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import secrets
+from datetime import datetime, timezone
+from typing import Optional, Set
+
+from core import serialization
+from core.interfaces import ConnectionManagerInterface, ConversationContextInterface
+from core.storage.interfaces import StateStorage
+from models.monitor import DrainStatus
+
+logger = logging.getLogger("core.drain")
+
+RESUME_KEY_PREFIX = "session:resume:"
+
+# 1012 Service Restart：提示客户端稍后重连
+DRAIN_CLOSE_CODE = 1012
+
+
+def resume_key(token: str) -> str:
+    return f"{RESUME_KEY_PREFIX}{token}"
+
+
+class DrainController:
+    """排空控制器，由 lifespan 创建并在退出前调用 ``drain``。"""
+
+    def __init__(
+        self,
+        connections: ConnectionManagerInterface,
+        conversation_context: ConversationContextInterface,
+        state_storage: StateStorage,
+        timeout: float = 25.0,
+        resume_ttl: int = 300,
+        close_timeout: float = 2.0,
+    ) -> None:
+        """
+        Args:
+            timeout: 等待进行中对话处理的最长时间（秒）
+            resume_ttl: 会话快照与恢复令牌的有效期（秒）
+            close_timeout: 单个连接发送通知与关闭的时限（秒）
+        """
+        self.connections = connections
+        self.conversation_context = conversation_context
+        self.state_storage = state_storage
+        self.timeout = timeout
+        self.resume_ttl = resume_ttl
+        self.close_timeout = close_timeout
+        self._tasks: Set[asyncio.Task] = set()
+        self._started_at: Optional[datetime] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._resume_tokens_issued = 0
+
+    @property
+    def draining(self) -> bool:
+        return self._started_at is not None
+
+    def track(self, task: asyncio.Task) -> None:
+        """登记进行中的对话处理任务，排空时等待其完成。"""
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def start(self) -> None:
+        """开始排空（幂等），不等待完成。"""
+        if self._drain_task is None:
+            self._started_at = datetime.now(timezone.utc)
+            self._drain_task = asyncio.create_task(self._drain())
+
+    async def drain(self) -> None:
+        """开始排空并等待完成；重复调用会等待同一次排空。"""
+        self.start()
+        assert self._drain_task is not None
+        await asyncio.shield(self._drain_task)
+
+    async def redeem(self, token: str, client_id: str) -> bool:
+        """用排空时签发的令牌把会话快照恢复到 ``client_id`` 下；令牌只能使用一次。"""
+        key = resume_key(token)
+        try:
+            snapshot = await self.state_storage.get_state(key)
+            if snapshot is None:
+                return False
+            await self.state_storage.delete_state(key)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("读取会话快照失败: client=%s, error=%s", client_id, exc)
+            return False
+        self.conversation_context.restore_session(client_id, snapshot)
+        return True
+
+    def status(self) -> DrainStatus:
+        return DrainStatus(
+            draining=self.draining,
+            started_at=self._started_at,
+            completed=self._drain_task is not None and self._drain_task.done(),
+            in_flight=len(self._tasks),
+            connections=self.connections.count(),
+            resume_tokens_issued=self._resume_tokens_issued,
+        )
+
+    async def _drain(self) -> None:
+        logger.info(
+            "开始排空: connections=%d, in_flight=%d", self.connections.count(), len(self._tasks)
+        )
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=self.timeout)
+            if pending:
+                logger.warning("排空等待超时，仍有 %d 个对话处理未完成，将随连接关闭取消", len(pending))
+
+        client_ids = self.connections.get_all_ids()
+        await asyncio.gather(*(self._hand_off(client_id) for client_id in client_ids))
+        logger.info("排空完成: 已交接 %d 个连接", len(client_ids))
+
+    async def _hand_off(self, client_id: str) -> None:
+        websocket = self.connections.get(client_id)
+        if websocket is None:
+            return
+        token = await self._save_session(client_id)
+        notice = {
+            "type": "server_draining",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "data": {
+                "reason": "server_restart",
+                "resume_token": token,
+                "resume_ttl": self.resume_ttl if token else 0,
+            },
+        }
+        try:
+            await asyncio.wait_for(serialization.send_payload(websocket, notice), timeout=self.close_timeout)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("发送排空通知失败: client=%s, error=%s", client_id, exc or type(exc).__name__)
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=DRAIN_CLOSE_CODE, reason="服务重启，请重新连接"),
+                timeout=self.close_timeout,
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("关闭连接失败: client=%s, error=%s", client_id, exc or type(exc).__name__)
+
+    async def _save_session(self, client_id: str) -> Optional[str]:
+        snapshot = self.conversation_context.export_session(client_id)
+        if snapshot is None:
+            return None
+        token = secrets.token_urlsafe(24)
+        try:
+            await self.state_storage.set_state(resume_key(token), snapshot, ttl=self.resume_ttl)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("保存会话快照失败: client=%s, error=%s", client_id, exc)
+            return None
+        self._resume_tokens_issued += 1
+        return token
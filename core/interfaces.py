@@ -5,10 +5,23 @@
 
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, List, Optional, Protocol
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Protocol
 
+from core.llm.config import LLMConfig, LLMConfigStore
 from core.monitor.event_types import MonitorEventType
-from models.monitor import ConnectionStatus, MessageStats, TokenTrendStats
+from core.monitor.session_resume import ResumableSession
+from models.monitor import (
+    ConnectionStatus,
+    DrainStatus,
+    LLMEndpointHealth,
+    LLMRequestStats,
+    LoopDiagnosticsStatus,
+    MessageStats,
+    SendResult,
+    TokenTrendStats,
+    TrafficCaptureStatus,
+)
 
 
 class EventBusInterface(Protocol):
@@ -53,27 +66,76 @@ class MetricsInterface(Protocol):
 
     def get_token_trend(self) -> TokenTrendStats: ...
 
+    def set_llm_queue_depth(self, in_flight: int, queued: int) -> None: ...
+
+    def record_llm_queue_wait(self, priority: str, seconds: float) -> None: ...
+
+    def record_llm_rejected(self, priority: str) -> None: ...
+
+    def record_llm_task_started(self) -> None: ...
+
+    def record_llm_task_finished(self) -> None: ...
+
+    def record_llm_aborted(self, reason: str, wasted_tokens: int) -> None: ...
+
+    def record_semantic_cache_lookup(self, hit: bool) -> None: ...
+
+    def set_semantic_cache_size(self, entries: int) -> None: ...
+
+    def get_llm_stats(self) -> LLMRequestStats: ...
+
     def reset_stats(self) -> None: ...
 
 
 class LLMServiceInterface(Protocol):
     """LLM 服务接口，封装 chat completion 能力。"""
 
-    config: Dict[str, Any]
+    config_store: LLMConfigStore
+
+    @property
+    def config(self) -> LLMConfig: ...
 
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        config: Optional[LLMConfig] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]: ...
 
 
+class RateLimiterInterface(Protocol):
+    """消息速率限制接口（可由多个 worker 共享状态）。"""
+
+    async def check_rate_limit(self, client_id: str, message_type: Optional[str] = None) -> bool: ...
+
+    async def clear(self, client_id: str) -> None: ...
+
+
+class LLMSpendLimiterInterface(Protocol):
+    """全局 LLM Token 预算接口。"""
+
+    @staticmethod
+    def estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int: ...
+
+    async def try_acquire(self, tokens: int) -> bool: ...
+
+    async def record(self, tokens: int) -> None: ...
+
+
+class LLMHealthInterface(Protocol):
+    """LLM 端点健康探测接口：后台探测并缓存结果，读取为 O(1)。"""
+
+    def snapshot(self) -> Dict[str, LLMEndpointHealth]: ...
+
+    def is_available(self, endpoint: str) -> bool: ...
+
+
 class ConnectionManagerInterface(Protocol):
     """WebSocket 连接管理接口，抽象活跃连接存取。"""
 
-    def add(self, client_id: str, websocket: Any) -> None: ...
+    def add(self, client_id: str, websocket: Any, tags: Iterable[str] = ()) -> None: ...
 
     def remove(self, client_id: str) -> None: ...
 
@@ -83,6 +145,139 @@ class ConnectionManagerInterface(Protocol):
 
     def count(self) -> int: ...
 
+    def tag(self, client_id: str, *tags: str) -> None: ...
+
+    def untag(self, client_id: str, *tags: str) -> None: ...
+
+    def get_tags(self, client_id: str) -> set[str]: ...
+
+    async def multicast(
+        self,
+        payload: Any,
+        client_ids: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        timeout: float | None = None,
+    ) -> SendResult: ...
+
+    async def broadcast(
+        self, payload: Any, exclude: Iterable[str] = (), timeout: float | None = None
+    ) -> SendResult: ...
+
+
+class IdleReaperInterface(Protocol):
+    """空闲连接回收接口：登记连接、记录活跃、超时回调。"""
+
+    def watch(self, client_id: str, on_expire: Callable[[], Awaitable[None]]) -> None: ...
+
+    def touch(self, client_id: str) -> None: ...
+
+    def unwatch(self, client_id: str) -> None: ...
+
+
+class OutboxInterface(Protocol):
+    """未确认对话回复的发件箱接口。"""
+
+    def claim(self, client_id: str, request_id: str) -> bool: ...
+
+    def release(self, client_id: str, request_id: str) -> None: ...
+
+    def put(self, client_id: str, request_id: str, payload: Dict[str, Any]) -> None: ...
+
+    def get(self, client_id: str, request_id: str) -> Optional[Dict[str, Any]]: ...
+
+    def ack(self, client_id: str, request_id: str) -> bool: ...
+
+    def pending(self, client_id: str) -> List[Dict[str, Any]]: ...
+
+    def clear(self, client_id: str) -> None: ...
+
+
+class DrainControllerInterface(Protocol):
+    """排空控制接口：停止接收新连接、等待进行中的处理并交接会话。"""
+
+    @property
+    def draining(self) -> bool: ...
+
+    def track(self, task: asyncio.Task) -> None: ...
+
+    def start(self) -> None: ...
+
+    async def drain(self) -> None: ...
+
+    async def redeem(self, token: str, client_id: str) -> bool: ...
+
+    def status(self) -> DrainStatus: ...
+
+
+class TrafficCaptureInterface(Protocol):
+    """流量录制接口：记录 /ws 入站帧供回放。"""
+
+    @property
+    def enabled(self) -> bool: ...
+
+    def start(self, name: Optional[str] = None) -> TrafficCaptureStatus: ...
+
+    def stop(self) -> TrafficCaptureStatus: ...
+
+    def open_connection(self) -> int: ...
+
+    def record(self, conn: int, data: str) -> None: ...
+
+    def close_connection(self, conn: int) -> None: ...
+
+    def status(self) -> TrafficCaptureStatus: ...
+
+
+class LoopDiagnosticsInterface(Protocol):
+    """事件循环诊断接口：循环延迟、慢回调与存活任务统计。"""
+
+    def snapshot(self, top_tasks: int = 20) -> LoopDiagnosticsStatus: ...
+
+
+class PrewarmInterface(Protocol):
+    """启动预热接口：后台并发执行预热步骤并报告进度。"""
+
+    @property
+    def warming(self) -> bool: ...
+
+    def status(self) -> Dict[str, Any]: ...
+
+
+class SessionResumeInterface(Protocol):
+    """会话恢复接口：签发恢复令牌、断开后保留会话、重连时兑换令牌。"""
+
+    def open(self, client_id: str, websocket: Any) -> ResumableSession: ...
+
+    def get(self, client_id: str) -> Optional[ResumableSession]: ...
+
+    def redeem(self, token: str) -> Optional[ResumableSession]: ...
+
+    def park(self, session: ResumableSession, release: Callable[[], Awaitable[None]]) -> bool: ...
+
+    def discard(self, session: ResumableSession) -> None: ...
+
+
+class ClusterInterface(Protocol):
+    """集群路由接口：跨 worker 登记连接、投递模组消息与转发监控事件。"""
+
+    worker_id: str
+
+    async def start(self) -> None: ...
+
+    async def stop(self) -> None: ...
+
+    async def register(self, client_id: str) -> None: ...
+
+    async def unregister(self, client_id: str) -> None: ...
+
+    async def list_clients(self) -> Dict[str, str]: ...
+
+    async def send_to_client(self, client_id: str, payload: Any) -> bool: ...
+
+    async def publish_event(self, event: Dict[str, Any]) -> None: ...
+
+    def set_event_handler(self, handler: Callable[[Dict[str, Any]], Awaitable[None]]) -> None: ...
+
 
 class ConversationContextInterface(Protocol):
     """会话上下文接口，管理游戏玩家的历史消息。"""
@@ -95,6 +290,10 @@ class ConversationContextInterface(Protocol):
 
     def get_history(self, client_id: str) -> List[Dict[str, Any]]: ...
 
+    def export_session(self, client_id: str) -> Optional[Dict[str, Any]]: ...
+
+    def restore_session(self, client_id: str, snapshot: Dict[str, Any]): ...
+
     def clear_session(self, client_id: str) -> None: ...
 
     def has_session(self, client_id: str) -> bool: ...
@@ -0,0 +1,143 @@
+"""LLM 调用准入控制。
+
+限制同时在途的 ``litellm.acompletion`` 数量，超出部分按优先级排队：
+在线玩家对话 > 控制台调试 > 后台任务。预计排队时间超过上限时直接拒绝（快速返回“忙碌”），
+避免突发流量触发服务商的 429 风暴。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, List, Optional, Tuple
+
+from core.interfaces import MetricsInterface
+from core.llm.errors import LLMBusyError
+
+logger = logging.getLogger("core.llm.admission")
+
+
+class LLMPriority(IntEnum):
+    """LLM 请求优先级，数值越小越优先。"""
+
+    PLAYER = 0
+    DASHBOARD = 1
+    BACKGROUND = 2
+
+
+class LLMAdmissionController:
+    """基于优先级队列的 LLM 并发控制器。"""
+
+    # 服务耗时指数滑动平均的平滑系数
+    EWMA_ALPHA = 0.2
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        max_queue_wait: float = 10.0,
+        metrics: Optional[MetricsInterface] = None,
+    ) -> None:
+        """
+        Args:
+            max_in_flight: 同时在途的 LLM 调用上限
+            max_queue_wait: 允许的最长排队时间（秒），预计或实际超出时拒绝
+            metrics: 可选的指标收集器，记录排队耗时与拒绝次数
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue_wait = max_queue_wait
+        self.metrics = metrics
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # 初始估计 1 秒，随真实调用逐步修正
+        self._avg_service_time = 1.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    def estimate_wait(self, priority: LLMPriority) -> float:
+        """估算新请求的排队时间：前方排队数 / 并发数 × 平均服务耗时。"""
+        ahead = sum(1 for p, _, fut in self._waiters if p <= priority and not fut.done())
+        return (ahead + 1) / self.max_in_flight * self._avg_service_time
+
+    def _publish_gauges(self) -> None:
+        if self.metrics is not None:
+            self.metrics.set_llm_queue_depth(self._in_flight, self.queued)
+
+    def _reject(self, priority: LLMPriority, reason: str) -> LLMBusyError:
+        if self.metrics is not None:
+            self.metrics.record_llm_rejected(priority.name.lower())
+        logger.warning("LLM 请求被拒绝: priority=%s, reason=%s", priority.name, reason)
+        return LLMBusyError(reason)
+
+    async def acquire(self, priority: LLMPriority) -> float:
+        """获取调用许可，返回排队耗时（秒）；无法在时限内获得时抛出 ``LLMBusyError``。"""
+        if self._in_flight < self.max_in_flight and not self.queued:
+            self._in_flight += 1
+            self._record_wait(priority, 0.0)
+            return 0.0
+
+        if self.estimate_wait(priority) > self.max_queue_wait:
+            raise self._reject(priority, "预计排队时间超过上限")
+
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), fut))
+        self._publish_gauges()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(fut, timeout=self.max_queue_wait)
+        except asyncio.TimeoutError:
+            # 超时与放行同时发生时，许可已经转交给本请求，照常使用
+            if not (fut.done() and not fut.cancelled()):
+                self._publish_gauges()
+                raise self._reject(priority, "排队超时") from None
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 许可已转交但调用方被取消，归还给下一个等待者
+                self.release()
+            raise
+
+        waited = time.monotonic() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        """归还许可：优先转交给最高优先级的等待者。"""
+        if service_time is not None:
+            self._avg_service_time += self.EWMA_ALPHA * (service_time - self._avg_service_time)
+
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                # 许可直接转交，在途计数保持不变
+                fut.set_result(None)
+                self._publish_gauges()
+                return
+        self._in_flight = max(0, self._in_flight - 1)
+        self._publish_gauges()
+
+    def _record_wait(self, priority: LLMPriority, waited: float) -> None:
+        if self.metrics is not None:
+            self.metrics.record_llm_queue_wait(priority.name.lower(), waited)
+        self._publish_gauges()
+
+    @asynccontextmanager
+    async def slot(self, priority: LLMPriority) -> AsyncIterator[float]:
+        """``async with controller.slot(priority):`` 包裹一次 LLM 调用。"""
+        waited = await self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
@@ -1,18 +1,69 @@
-"""LLM 缓存键生成工具。"""
+"""LLM 缓存键生成工具。
+
+缓存键覆盖所有影响输出的参数（模型、温度、max_tokens、provider、api_base 及其他透传参数），
+消息逐条以规范 JSON 写入摘要，不必先把整段历史序列化成一个大字符串。
+
+缓存键不涉及安全边界，使用比 SHA-256 更快的 BLAKE2b（输出仍为 64 位十六进制）。
+"""
 
 from __future__ import annotations
 
 import hashlib
-import json
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+from core import serialization
+
+CACHE_KEY_PREFIX = "llm:cache:"
+
+# 消息之间的分隔符：紧凑 JSON 中不会出现裸换行，拼接结果无歧义
+_SEPARATOR = b"\n"
+
+
+def split_system(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """拆分开头的 system 消息与后续对话。
+
+    system 提示词随伙伴人设变化，作为参数参与缓存键；对话部分按顺序逐条摘要。
+    """
+    index = 0
+    while index < len(messages) and messages[index].get("role") == "system":
+        index += 1
+    return messages[:index], messages[index:]
+
+
+class CacheKeyBuilder:
+    """对话消息的流式摘要。"""
+
+    __slots__ = ("_digest",)
+
+    def __init__(self) -> None:
+        self._digest = hashlib.blake2b(digest_size=32)
+
+    def extend(self, messages: Iterable[Mapping[str, Any]]) -> "CacheKeyBuilder":
+        """追加消息到摘要，返回自身便于链式调用。"""
+        for message in messages:
+            self._digest.update(serialization.dumps_canonical(message))
+            self._digest.update(_SEPARATOR)
+        return self
+
+    def key(self, params: Mapping[str, Any]) -> str:
+        """结合请求参数生成缓存键，不修改当前摘要状态。"""
+        digest = self._digest.copy()
+        digest.update(b"\x00")
+        digest.update(serialization.dumps_canonical(params))
+        return f"{CACHE_KEY_PREFIX}{digest.hexdigest()}"
+
+
+def build_cache_key(messages: List[Dict[str, Any]], params: Mapping[str, Any]) -> str:
+    """生成缓存键。
+
+    Args:
+        messages: 完整消息列表
+        params: 影响输出的请求参数（不含 messages、api_key、请求头）
+    """
+    system, dialog = split_system(messages)
+    return CacheKeyBuilder().extend(dialog).key({**params, "system": system})
 
 
-def generate_cache_key(messages: List[Dict[str, Any]], model: str, temperature: float) -> str:
+def generate_cache_key(messages: List[Dict[str, Any]], model: str, temperature: float, **params: Any) -> str:
     """为 LLM 请求生成稳定的缓存键。"""
-    payload = {
-        "messages": messages,
-        "model": model,
-        "temperature": temperature,
-    }
-    content = json.dumps(payload, sort_keys=True, ensure_ascii=False)
-    return f"llm:cache:{hashlib.sha256(content.encode()).hexdigest()}"
+    return build_cache_key(messages, {"model": model, "temperature": temperature, **params})
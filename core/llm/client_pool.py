@@ -0,0 +1,165 @@
+"""按配置划分的 LLM 客户端池。
+
+控制台可以为单次请求指定不同的 provider / model / base_url。每种配置对应池中的一个客户端：
+编译好的请求模板、独立的 HTTP 连接池（保持与该服务商的长连接），以及 OpenAI 兼容协议下
+复用该连接池的 SDK 客户端。池按最近使用（LRU）淘汰，容量有限；在控制台切换模型不会
+改动共享配置，切回用过的配置时也不必重新编译模板、重新握手。
+
+淘汰的客户端如仍有请求在使用，等最后一个请求结束后再关闭连接池。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from core.llm.config import LLMConfig
+
+logger = logging.getLogger("core.llm.client_pool")
+
+# 决定客户端的配置项（API Key 不参与，同一服务端点的不同 Key 共用连接池）
+_KEY_FIELDS = ("provider", "model", "base_url", "api_version")
+# 每个客户端最多保留的 SDK 客户端数（按 API Key，LRU）：请求可以自带任意 Key，不能无限缓存
+_MAX_SDK_CLIENTS = 2
+
+
+def client_key(config: LLMConfig) -> str:
+    """配置的客户端键：provider、model、base_url（及 api_version）的摘要。"""
+    raw = "\x1f".join(str(getattr(config, name)) for name in _KEY_FIELDS)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMClient:
+    """一种配置对应的模板与连接。"""
+
+    def __init__(self, key: str, template: Any, session_factory: Callable[[], Any]) -> None:
+        self.key = key
+        self.template = template
+        self._session_factory = session_factory
+        self._session: Any = None
+        # API Key → SDK 客户端（共用本客户端的连接池），按最近使用的顺序排列
+        self._sdk_clients: "OrderedDict[str, Any]" = OrderedDict()
+        self.in_use = 0
+        self.evicted = False
+
+    @property
+    def session(self) -> Any:
+        """本配置专用的 HTTP 连接池，首次使用时创建。"""
+        if self._session is None:
+            self._session = self._session_factory()
+        return self._session
+
+    def sdk_client(self, api_key: str) -> Optional[Any]:
+        """OpenAI 兼容协议下复用连接池的 SDK 客户端，作为 ``client`` 传给 LiteLLM；其他协议或无 Key 时返回 None。"""
+        if self.template.provider != "openai" or not api_key:
+            return None
+        client = self._sdk_clients.get(api_key)
+        if client is not None:
+            self._sdk_clients.move_to_end(api_key)
+        else:
+            from openai import AsyncOpenAI  # LiteLLM 的依赖，导入 LiteLLM 后已加载
+
+            client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=self.template.params.get("api_base"),
+                http_client=self.session,
+            )
+            self._sdk_clients[api_key] = client
+            # 淘汰的 SDK 客户端不关闭：连接池属于本客户端，仍被其他 SDK 客户端共用
+            while len(self._sdk_clients) > _MAX_SDK_CLIENTS:
+                self._sdk_clients.popitem(last=False)
+        return client
+
+    async def aclose(self) -> None:
+        self._sdk_clients.clear()
+        session, self._session = self._session, None
+        if session is not None:
+            await session.aclose()
+
+
+class LLMClientPool:
+    """按配置缓存 ``LLMClient``，LRU 淘汰。"""
+
+    def __init__(
+        self,
+        compile_template: Callable[[LLMConfig], Any],
+        session_factory: Callable[[], Any],
+        max_size: int = 8,
+    ) -> None:
+        """
+        Args:
+            compile_template: 根据配置编译请求模板
+            session_factory: 创建 HTTP 连接池
+            max_size: 最多保留的客户端数量
+        """
+        self._compile_template = compile_template
+        self._session_factory = session_factory
+        self.max_size = max(1, max_size)
+        self._clients: "OrderedDict[str, LLMClient]" = OrderedDict()
+        self._closing: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get(self, config: LLMConfig) -> LLMClient:
+        """取得配置对应的客户端（不存在时创建），并标记为最近使用。"""
+        key = client_key(config)
+        client = self._clients.get(key)
+        if client is not None:
+            self.hits += 1
+            self._clients.move_to_end(key)
+            return client
+        self.misses += 1
+        client = LLMClient(key, self._compile_template(config), self._session_factory)
+        self._clients[key] = client
+        while len(self._clients) > self.max_size:
+            _, evicted = self._clients.popitem(last=False)
+            self._evict(evicted)
+        return client
+
+    def acquire(self, config: LLMConfig) -> LLMClient:
+        """取得客户端并登记使用，使用结束后必须调用 ``release``。"""
+        client = self.get(config)
+        client.in_use += 1
+        return client
+
+    def release(self, client: LLMClient) -> None:
+        client.in_use -= 1
+        if client.evicted and client.in_use == 0:
+            self._close_later(client)
+
+    def _evict(self, client: LLMClient) -> None:
+        self.evictions += 1
+        client.evicted = True
+        logger.info("LLM 客户端池已满，淘汰最久未用的配置: model=%s", client.template.params.get("model"))
+        if client.in_use == 0:
+            self._close_later(client)
+
+    def _close_later(self, client: LLMClient) -> None:
+        if client._session is None:
+            client._sdk_clients.clear()
+            return
+        task = asyncio.create_task(client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._clients),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    async def close(self) -> None:
+        """关闭全部客户端的连接池（服务关闭时调用）。"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients), *self._closing, return_exceptions=True)
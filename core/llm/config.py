@@ -0,0 +1,204 @@
+"""LLM 配置快照与热重载。
+
+配置以不可变、带版本号的 ``LLMConfig`` 快照提供。``LLMConfigStore`` 持有当前快照：
+读取只是一次属性访问，无需加锁；重载（文件变化或 API 保存）时构造新快照并整体替换引用，
+正在处理的请求继续使用它开始时取得的快照。单次请求的覆盖（如前端携带的 ``llmConfig``）
+通过 ``with_overrides`` 生成请求专用的副本，不会影响共享快照。
+
+配置来源优先级：环境变量（含 .env） > ``config/settings.json`` 的 ``llm`` 段 > 默认值。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("core.llm.config")
+
+SETTINGS_PATH = Path("config/settings.json")
+
+# 字段 → 环境变量
+_ENV_VARS = {
+    "provider": "LLM_PROVIDER",
+    "model": "LLM_MODEL",
+    "api_key": "LLM_API_KEY",
+    "base_url": "LLM_BASE_URL",
+    "api_version": "LLM_API_VERSION",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class LLMConfig:
+    """LLM 配置快照（不可变）。"""
+
+    provider: str = "openai"
+    model: str = "gpt-4"
+    api_key: str = ""
+    base_url: str = ""
+    api_version: str = ""
+    # 每次替换快照时递增，便于日志与监控确认生效的配置
+    version: int = 0
+
+    def with_overrides(self, **overrides: Optional[str]) -> "LLMConfig":
+        """返回应用了请求级覆盖的副本；值为 None 的项保持不变。"""
+        changes = {key: value for key, value in overrides.items() if value is not None}
+        return replace(self, **changes) if changes else self
+
+    def same_settings(self, other: "LLMConfig") -> bool:
+        """除版本号外是否完全相同。"""
+        return all(getattr(self, name) == getattr(other, name) for name in _ENV_VARS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def read_llm_section(path: Path = SETTINGS_PATH, strict: bool = False) -> Dict[str, Any]:
+    """读取 settings.json 的 ``llm`` 段，文件不存在时返回空字典。
+
+    文件无效时 ``strict`` 为 False 返回空字典（启动时回退到默认值），否则抛出异常（热重载时保留旧配置）。
+    """
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:  # noqa: BLE001
+        if strict:
+            raise
+        logger.error("加载 settings.json 失败: %s", e)
+        return {}
+    section = data.get("llm", {}) if isinstance(data, dict) else {}
+    return section if isinstance(section, dict) else {}
+
+
+def load_llm_config(path: Path = SETTINGS_PATH, version: int = 0, strict: bool = False) -> LLMConfig:
+    """按 环境变量 > 配置文件 > 默认值 构造配置快照。"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    file_config = read_llm_section(path, strict=strict)
+    defaults = LLMConfig()
+    values = {
+        name: os.getenv(env_var, file_config.get(name, getattr(defaults, name)))
+        for name, env_var in _ENV_VARS.items()
+    }
+    return LLMConfig(**values, version=version)
+
+
+class LLMConfigStore:
+    """持有当前配置快照，负责原子替换、持久化与文件监视。"""
+
+    def __init__(
+        self,
+        initial: Optional[LLMConfig] = None,
+        path: Path = SETTINGS_PATH,
+        poll_interval: float = 2.0,
+    ) -> None:
+        """
+        Args:
+            initial: 初始快照；为空时从环境变量与配置文件加载
+            path: 配置文件路径
+            poll_interval: 检查配置文件变化的间隔（秒），0 表示不监视
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self._current = initial if initial is not None else load_llm_config(path)
+        self._mtime = self._stat()
+        # 只串行化写入方（重载与保存），读取方不加锁
+        self._write_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def current(self) -> LLMConfig:
+        return self._current
+
+    def _stat(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _swap(self, candidate: LLMConfig) -> LLMConfig:
+        """候选配置与当前不同时以新版本号替换，返回生效的快照。"""
+        current = self._current
+        if candidate.same_settings(current):
+            return current
+        self._current = replace(candidate, version=current.version + 1)
+        logger.info(
+            "LLM 配置已更新: version=%d, provider=%s, model=%s",
+            self._current.version,
+            self._current.provider,
+            self._current.model,
+        )
+        return self._current
+
+    def reload(self) -> LLMConfig:
+        """重新读取环境变量与配置文件。"""
+        with self._write_lock:
+            self._mtime = self._stat()
+            return self._swap(load_llm_config(self.path, strict=True))
+
+    def update(self, **changes: str) -> LLMConfig:
+        """把修改写入配置文件（保留其他段落）并替换当前快照。"""
+        unknown = set(changes) - set(_ENV_VARS)
+        if unknown:
+            raise ValueError(f"未知的 LLM 配置项: {sorted(unknown)}")
+        with self._write_lock:
+            data: Dict[str, Any] = {}
+            if self.path.exists():
+                with open(self.path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                if isinstance(loaded, dict):
+                    data = loaded
+            section = data.get("llm")
+            data["llm"] = {**(section if isinstance(section, dict) else {}), **changes}
+            self._write_atomic(data)
+            self._mtime = self._stat()
+            return self._swap(load_llm_config(self.path))
+
+    def _write_atomic(self, data: Dict[str, Any]) -> None:
+        """先写临时文件再替换，监视方与其他进程不会读到写了一半的文件。"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    # ============ 文件监视 ============
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._stat() == self._mtime:
+                continue
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("重新加载 LLM 配置失败，继续使用 version=%d: %s", self._current.version, exc)
+
+    def start(self) -> None:
+        if self._task is None and self.poll_interval > 0:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
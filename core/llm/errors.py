@@ -0,0 +1,13 @@
+"""LLM 调用相关异常。"""
+
+
+class LLMRateLimitedError(RuntimeError):
+    """全局 LLM Token 预算已耗尽，本次调用被拒绝。"""
+
+
+class LLMBusyError(RuntimeError):
+    """LLM 并发已满且预计排队时间超过上限，本次调用被快速拒绝。"""
+
+
+class LLMUnavailableError(LLMBusyError):
+    """健康探测确认服务商端点不可用，本次调用被快速拒绝（调用方可按繁忙处理）。"""
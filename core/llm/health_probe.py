@@ -0,0 +1,144 @@
+"""LLM 服务商端点的主动健康探测。
+
+后台任务定期向每个已配置的端点发起一次免费请求（``GET {api_base}/models``），记录耗时与错误，
+结果保存为快照：就绪探针直接读取快照（O(1)），``LLMService`` 据此跳过已知不可用的端点，
+不必让玩家请求等到超时。
+
+探测节奏自适应：端点正常时每 ``interval`` 秒一次，失败后缩短为 ``failure_interval`` 秒，
+以便尽快发现恢复。连续失败达到 ``failure_threshold`` 次才判定端点不可用，避免偶发抖动误判。
+只有超时、连接失败与 5xx 计为失败；401/403 说明端点可达、只是全局 API Key 无效（请求可能自带有效的 Key），
+只在快照中标记，不影响快速拒绝。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Protocol
+
+from models.monitor import LLMEndpointHealth
+
+logger = logging.getLogger("core.llm.health_probe")
+
+# 认证失败的状态码：端点可达，只在快照中标记，不计为失败
+_AUTH_FAILURE_STATUS = frozenset({401, 403})
+
+
+class ProbeSource(Protocol):
+    """提供待探测端点及探测方法（由 ``LLMService`` 实现）。"""
+
+    def probe_targets(self) -> List[str]: ...
+
+    async def probe(self, endpoint: str) -> int: ...
+
+
+class LLMHealthProber:
+    """定期探测 LLM 端点并缓存结果。"""
+
+    def __init__(
+        self,
+        source: ProbeSource,
+        interval: float = 30.0,
+        failure_interval: float = 5.0,
+        timeout: float = 5.0,
+        failure_threshold: int = 2,
+    ) -> None:
+        """
+        Args:
+            source: 待探测端点与探测方法的提供者
+            interval: 端点正常时的探测间隔（秒）
+            failure_interval: 端点失败后的探测间隔（秒）
+            timeout: 单次探测时限（秒）
+            failure_threshold: 连续失败多少次后判定端点不可用
+        """
+        self.source = source
+        self.interval = interval
+        self.failure_interval = failure_interval
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self._health: Dict[str, LLMEndpointHealth] = {}
+        self._next_probe: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Dict[str, LLMEndpointHealth]:
+        """最近一次探测结果（按端点）。"""
+        return dict(self._health)
+
+    def is_available(self, endpoint: str) -> bool:
+        """端点是否可用；尚未探测的端点视为可用。"""
+        health = self._health.get(endpoint)
+        return health is None or health.consecutive_failures < self.failure_threshold
+
+    def record(
+        self,
+        endpoint: str,
+        status_code: Optional[int],
+        latency_ms: Optional[float],
+        error: Optional[str] = None,
+    ) -> LLMEndpointHealth:
+        """记录一次探测结果并安排下一次探测。"""
+        previous = self._health.get(endpoint)
+        failures = 0 if error is None else (previous.consecutive_failures if previous else 0) + 1
+        health = LLMEndpointHealth(
+            endpoint=endpoint,
+            healthy=failures < self.failure_threshold,
+            status_code=status_code,
+            latency_ms=latency_ms,
+            consecutive_failures=failures,
+            auth_failed=status_code in _AUTH_FAILURE_STATUS,
+            last_error=error if error is not None else (previous.last_error if previous else None),
+            checked_at=datetime.now(timezone.utc),
+        )
+        self._health[endpoint] = health
+        self._next_probe[endpoint] = time.monotonic() + (self.interval if error is None else self.failure_interval)
+
+        if previous is not None and previous.healthy and not health.healthy:
+            logger.warning("LLM 端点不可用: %s, 连续失败 %d 次: %s", endpoint, failures, error)
+        elif previous is not None and previous.healthy is False and health.healthy:
+            logger.info("LLM 端点已恢复: %s (%.0f ms)", endpoint, latency_ms or 0.0)
+        return health
+
+    async def probe_once(self, endpoint: str) -> LLMEndpointHealth:
+        started = time.perf_counter()
+        status_code: Optional[int] = None
+        error: Optional[str] = None
+        try:
+            status_code = await asyncio.wait_for(self.source.probe(endpoint), timeout=self.timeout)
+            if status_code >= 500:
+                error = f"HTTP {status_code}"
+        except asyncio.TimeoutError:
+            error = "timeout"
+        except Exception as exc:  # noqa: BLE001
+            error = str(exc) or type(exc).__name__
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        return self.record(endpoint, status_code, latency_ms, error)
+
+    async def _run(self) -> None:
+        while True:
+            targets = self.source.probe_targets()
+            # 配置变化后不再使用的端点不再保留结果
+            for endpoint in set(self._health) - set(targets):
+                self._health.pop(endpoint, None)
+                self._next_probe.pop(endpoint, None)
+            now = time.monotonic()
+            due = [endpoint for endpoint in targets if self._next_probe.get(endpoint, 0.0) <= now]
+            if due:
+                await asyncio.gather(*(self.probe_once(endpoint) for endpoint in due))
+            # 至少每 failure_interval 秒检查一次端点列表，新配置的端点能尽快得到探测
+            next_due = min((self._next_probe[endpoint] for endpoint in targets), default=float("inf"))
+            await asyncio.sleep(max(0.1, min(next_due - time.monotonic(), self.failure_interval)))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,230 @@
+"""LLM 语义缓存。
+
+精确缓存（``generate_cache_key``）只能命中完全相同的请求，“怎么做镐子”与“镐子怎么合成？”
+永远不会共享结果。语义缓存对最后一条用户消息做本地向量化（字符 n-gram 哈希，无需网络），
+在同一系统提示词（即同一伙伴人设）下做最近邻检索，相似度超过阈值时直接返回缓存回答。
+
+系统提示词含模组上报的伙伴名，命名空间数量不受服务端控制：最多保留 ``max_namespaces`` 个，
+超出后淘汰最久未使用的；条目全部过期的命名空间在访问或新建命名空间时移除。
+每个命名空间的向量数组按需扩容，不预先分配 ``capacity × dim``。
+
+安装 NumPy（``pip install .[semantic]``）时使用矩阵运算检索，否则退化为纯 Python 实现。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import serialization
+from core.interfaces import MetricsInterface
+
+try:
+    import numpy as _np
+except ImportError:  # pragma: no cover - 未安装可选依赖时使用纯 Python 实现
+    _np = None
+
+logger = logging.getLogger("core.llm.semantic_cache")
+
+# 模组会在玩家消息前加上 “[玩家名] ” 前缀，不参与语义比较
+_SPEAKER_PREFIX = re.compile(r"^\s*\[[^\]]*\]\s*")
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """归一化用户输入：全半角统一、小写、去掉说话人前缀与标点。"""
+    text = unicodedata.normalize("NFKC", text)
+    text = _SPEAKER_PREFIX.sub("", text).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+# NumPy 向量数组首次分配的行数，之后按倍数扩容到 capacity
+_INITIAL_ROWS = 16
+
+
+class _Index:
+    """单个命名空间的向量索引：环形槽位，写入时按需扩容，写满 ``capacity`` 后覆盖最早的条目。"""
+
+    __slots__ = ("capacity", "dim", "vectors", "payloads", "expires_at", "next_slot")
+
+    def __init__(self, capacity: int, dim: int) -> None:
+        self.capacity = capacity
+        self.dim = dim
+        self.vectors: Any = _np.zeros((0, dim), dtype=_np.float32) if _np is not None else []
+        self.payloads: List[bytes] = []
+        self.expires_at: List[float] = []
+        self.next_slot = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.payloads)
+
+    @property
+    def latest_expiry(self) -> float:
+        """最近写入条目的过期时间（有效期固定，即全部条目中最晚的）。"""
+        return self.expires_at[self.next_slot - 1] if self.payloads else 0.0
+
+    def put(self, vector: List[float], payload: bytes, expires_at: float) -> None:
+        slot = self.next_slot
+        if slot < self.size:
+            self.vectors[slot] = vector
+            self.payloads[slot] = payload
+            self.expires_at[slot] = expires_at
+        else:
+            if _np is None:
+                self.vectors.append(vector)
+            else:
+                if slot == len(self.vectors):
+                    grown = _np.zeros((min(self.capacity, max(_INITIAL_ROWS, slot * 2)), self.dim), dtype=_np.float32)
+                    grown[:slot] = self.vectors
+                    self.vectors = grown
+                self.vectors[slot] = vector
+            self.payloads.append(payload)
+            self.expires_at.append(expires_at)
+        self.next_slot = (slot + 1) % self.capacity
+
+
+class SemanticCache:
+    """基于本地哈希向量的近似问答缓存（单进程内存）。"""
+
+    # 过短的输入（“好”“嗯”）语义依赖上下文，不参与缓存
+    MIN_QUERY_CHARS = 4
+
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        ttl: float = 600.0,
+        capacity: int = 512,
+        dim: int = 512,
+        max_namespaces: int = 64,
+        metrics: Optional[MetricsInterface] = None,
+    ) -> None:
+        """
+        Args:
+            threshold: 余弦相似度阈值，达到后视为同一问题
+            ttl: 条目有效期（秒）
+            capacity: 每个命名空间的最大条目数，写满后覆盖最早写入的条目
+            dim: 哈希向量维度
+            max_namespaces: 最多保留的命名空间数，超出后淘汰最久未使用的
+            metrics: 可选的指标收集器，记录命中率与条目数
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.capacity = max(1, capacity)
+        self.dim = dim
+        self.max_namespaces = max(1, max_namespaces)
+        self.metrics = metrics
+        # 按最近使用的顺序排列
+        self._indexes: "OrderedDict[str, _Index]" = OrderedDict()
+
+    @staticmethod
+    def namespace_for(messages: List[Dict[str, Any]], model: str) -> str:
+        """按模型与系统提示词划分命名空间，不同伙伴人设互不命中。"""
+        digest = hashlib.blake2b(model.encode(), digest_size=16)
+        for message in messages:
+            if message.get("role") == "system":
+                digest.update(str(message.get("content", "")).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def query_for(messages: List[Dict[str, Any]]) -> Optional[str]:
+        """提取最后一条用户消息的归一化文本，过短时返回 None。"""
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                text = normalize_text(str(message.get("content", "")))
+                return text if len(text) >= SemanticCache.MIN_QUERY_CHARS else None
+        return None
+
+    def embed(self, text: str) -> List[float]:
+        """字符 2/3-gram 与词的带符号哈希向量（L2 归一化）。"""
+        vector = [0.0] * self.dim
+        padded = f" {text} "
+        features = [padded[i : i + n] for n in (2, 3) for i in range(len(padded) - n + 1)]
+        features.extend(text.split())
+        for feature in features:
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0:
+            return vector
+        return [v / norm for v in vector]
+
+    def _search(self, index: _Index, query: List[float], now: float) -> Tuple[int, float]:
+        """返回最相似且未过期条目的槽位与相似度，无可用条目时槽位为 -1。"""
+        if _np is not None:
+            scores = index.vectors[: index.size] @ _np.asarray(query, dtype=_np.float32)
+            # 过期条目的相似度置为 -inf，不参与比较
+            scores[_np.asarray(index.expires_at[: index.size]) <= now] = -_np.inf
+            best = int(_np.argmax(scores))
+            if not _np.isfinite(scores[best]):
+                return -1, 0.0
+            return best, float(scores[best])
+
+        best, best_score = -1, 0.0
+        for slot in range(index.size):
+            if index.expires_at[slot] <= now:
+                continue
+            score = sum(a * b for a, b in zip(index.vectors[slot], query))
+            if best < 0 or score > best_score:
+                best, best_score = slot, score
+        return best, best_score
+
+    def lookup(self, namespace: str, query: str) -> Optional[Dict[str, Any]]:
+        """查找语义相近的缓存回答，未命中返回 None。"""
+        now = time.monotonic()
+        index = self._indexes.get(namespace)
+        hit: Optional[Dict[str, Any]] = None
+        if index is not None and index.latest_expiry <= now:
+            self._drop(namespace)
+        elif index is not None:
+            self._indexes.move_to_end(namespace)
+            slot, score = self._search(index, self.embed(query), now)
+            if slot >= 0 and score >= self.threshold:
+                hit = serialization.loads(index.payloads[slot])
+                logger.info("✅ LLM 语义缓存命中: similarity=%.3f", score)
+        if self.metrics is not None:
+            self.metrics.record_semantic_cache_lookup(hit is not None)
+        return hit
+
+    def store(self, namespace: str, query: str, response: Dict[str, Any]) -> None:
+        """写入回答，命名空间写满时覆盖最早写入的条目。"""
+        now = time.monotonic()
+        index = self._indexes.get(namespace)
+        if index is None:
+            self._evict(now)
+            index = self._indexes[namespace] = _Index(self.capacity, self.dim)
+        else:
+            self._indexes.move_to_end(namespace)
+        index.put(self.embed(query), serialization.dumps(response), now + self.ttl)
+        if self.metrics is not None:
+            self.metrics.set_semantic_cache_size(self.entries())
+
+    def _evict(self, now: float) -> None:
+        """新建命名空间前：移除条目全部过期的命名空间，仍超出上限时淘汰最久未使用的。"""
+        for namespace in [name for name, index in self._indexes.items() if index.latest_expiry <= now]:
+            del self._indexes[namespace]
+        while len(self._indexes) >= self.max_namespaces:
+            self._indexes.popitem(last=False)
+
+    def _drop(self, namespace: str) -> None:
+        del self._indexes[namespace]
+        if self.metrics is not None:
+            self.metrics.set_semantic_cache_size(self.entries())
+
+    def entries(self) -> int:
+        """当前条目总数（含尚未被覆盖的过期条目）。"""
+        return sum(index.size for index in self._indexes.values())
+
+    def clear(self) -> None:
+        self._indexes.clear()
+        if self.metrics is not None:
+            self.metrics.set_semantic_cache_size(0)
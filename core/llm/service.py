@@ -1,40 +1,105 @@
 """LLM 服务核心实现。
 
 使用 LiteLLM 统一接口，支持 OpenAI、Anthropic、Gemini 以及兼容 OpenAI 格式的第三方服务。
+LiteLLM 导入耗时数秒，延迟到首次调用（或启动后的后台预热）时再导入，不拖慢服务启动。
 """
 
-import os
+import asyncio
 import json
 import logging
-from dataclasses import asdict, is_dataclass
-from typing import Any, Dict, List, Optional
-from pathlib import Path
-from dotenv import load_dotenv
-
-import litellm
-
-try:
-    from litellm.exceptions import LiteLLMException
-except Exception:  # noqa: BLE001
-    LiteLLMException = Exception
-
-from core.llm.cache import generate_cache_key
+import threading
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from core import serialization
+from core.interfaces import LLMHealthInterface, LLMSpendLimiterInterface
+from core.llm.admission import LLMAdmissionController, LLMPriority
+from core.llm.cache import build_cache_key
+from core.llm.client_pool import LLMClient, LLMClientPool
+from core.llm.config import LLMConfig, LLMConfigStore
+from core.llm.errors import LLMBusyError, LLMRateLimitedError, LLMUnavailableError
 from core.storage.interfaces import CacheStorage
 from config.settings import settings
 
-# 加载环境变量
-load_dotenv()
+if TYPE_CHECKING:
+    from core.llm.semantic_cache import SemanticCache
 
 logger = logging.getLogger("core.llm.service")
 
+_litellm: Any = None
+_litellm_lock = threading.Lock()
+
+
+def load_litellm() -> Any:
+    """导入并配置 LiteLLM（只执行一次，可在任意线程调用）。"""
+    global _litellm
+    if _litellm is None:
+        with _litellm_lock:
+            if _litellm is None:
+                import litellm
+
+                litellm.set_verbose = False  # 设置为 True 可开启详细调试日志
+                # 自动丢弃模型不支持的参数，避免 GPT-5 等模型报错
+                litellm.drop_params = True
+                logger.info("✅ LiteLLM 已加载：自动丢弃不支持的参数 (drop_params=True)")
+                _litellm = litellm
+    return _litellm
+
+
+async def get_litellm() -> Any:
+    """返回 LiteLLM 模块；尚未导入时在线程中导入，避免阻塞事件循环。"""
+    if _litellm is not None:
+        return _litellm
+    return await asyncio.to_thread(load_litellm)
+
+
+def _api_error_type() -> type:
+    """LiteLLM 异常基类（旧版本提供 LiteLLMException，新版本回退为 Exception）。"""
+    if _litellm is None:
+        return Exception
+    return getattr(_litellm.exceptions, "LiteLLMException", Exception)
+
+# 不影响模型输出的请求参数，不参与缓存键
+_CACHE_KEY_EXCLUDED = frozenset({"messages", "api_key", "extra_headers", "client"})
+
+
+@dataclass(frozen=True)
+class _RequestTemplate:
+    """由配置推导出的请求参数，同一配置的各请求共用（缓存在客户端池中）。"""
+
+    provider: str
+    params: Dict[str, Any]
+    extra_headers: Dict[str, str]
+    request_url: Optional[str]
+
 
 class LLMService:
     """LLM 服务类，封装 LiteLLM 调用。"""
 
-    def __init__(self, cache_storage: CacheStorage | None = None):
-        self.config = self._load_config()
+    def __init__(
+        self,
+        cache_storage: CacheStorage | None = None,
+        spend_limiter: LLMSpendLimiterInterface | None = None,
+        admission: LLMAdmissionController | None = None,
+        semantic_cache: "SemanticCache | None" = None,
+        config_store: LLMConfigStore | None = None,
+    ):
+        self.config_store = config_store if config_store is not None else LLMConfigStore(poll_interval=0)
         self.cache = cache_storage
-        self._setup_litellm()
+        self.spend_limiter = spend_limiter
+        self.admission = admission
+        self.semantic_cache = semantic_cache
+        # 按配置缓存请求模板与服务商连接，控制台按请求指定的配置也从池中取用
+        self.clients = LLMClientPool(
+            self._compile_template, self._new_http_session, max_size=settings.llm_client_pool_size
+        )
+        # 端点健康探测结果，由 lifespan 注入；已知不可用的端点直接快速拒绝
+        self.health: Optional[LLMHealthInterface] = None
+
+    @property
+    def config(self) -> LLMConfig:
+        """当前配置快照（不可变，读取无需加锁）。"""
+        return self.config_store.current
 
     @staticmethod
     def _mask_api_key(api_key: Optional[str]) -> str:
@@ -89,51 +154,147 @@ class LLMService:
             return parsed
         return {"data": parsed}
 
-    def _load_config(self) -> Dict[str, Any]:
-        """加载配置，优先使用环境变量，其次是 settings.json。"""
-        settings_path = Path("config/settings.json")
-        file_config = {}
-        
-        if settings_path.exists():
-            try:
-                with open(settings_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    file_config = data.get("llm", {})
-            except Exception as e:
-                logger.error(f"加载 settings.json 失败: {e}")
-
-        # 环境变量优先级更高
-        config = {
-            "provider": os.getenv("LLM_PROVIDER", file_config.get("provider", "openai")),
-            "model": os.getenv("LLM_MODEL", file_config.get("model", "gpt-4")),
-            "api_key": os.getenv("LLM_API_KEY", file_config.get("api_key", "")),
-            "base_url": os.getenv("LLM_BASE_URL", file_config.get("base_url", "")),
-            "api_version": os.getenv("LLM_API_VERSION", file_config.get("api_version", "")),
+    def _request_template(self, config: LLMConfig | None = None) -> _RequestTemplate:
+        """返回配置对应的请求模板（来自客户端池）。"""
+        return self.clients.get(config or self.config).template
+
+    def _compile_template(self, config: LLMConfig) -> _RequestTemplate:
+        """把与单次请求无关的参数（模型名、api_base、请求头、URL）一次性算好。"""
+        provider = config.provider
+        model = config.model
+
+        # 对于 custom provider（OpenAI 兼容的第三方 API），转换为 openai
+        # 这样 LiteLLM 会使用 OpenAI 的协议格式 + 自定义 api_base
+        if provider == "custom":
+            provider = "openai"
+            logger.info("📝 检测到 custom provider，转换为 openai 协议格式")
+
+        # 构建完整的模型名称
+        # 如果是 openai 兼容的第三方服务，通常不需要加 provider 前缀，或者直接用 model 名
+        # LiteLLM 约定：对于 openai 兼容接口，如果 provider 是 openai，可以直接用 model 名
+        # 如果是 anthropic/gemini 等，litellm 通常需要前缀，如 "anthropic/claude-3"
+        # 这里我们做一个简单的处理：如果 provider 不是 openai，且 model 不包含 /，则加上前缀
+        full_model_name = model
+        if provider == "openai":
+            normalized_model = model.split("/", 1)[-1]
+            full_model_name = f"openai/{normalized_model}"
+        elif "/" not in model:
+            full_model_name = f"{provider}/{model}"
+
+        params: Dict[str, Any] = {"model": full_model_name}
+
+        # 强制使用指定的 provider，防止 LiteLLM 根据模型名称自动切换
+        # 例如：模型名称包含 "claude" 时，LiteLLM 会自动切换到 anthropic provider
+        # 但如果用户明确指定了 openai provider（OpenAI 兼容 API），则应该尊重用户选择
+        if provider == "openai":
+            params["custom_llm_provider"] = "openai"
+
+        # 如果有 base_url (用于 DeepSeek, Moonshot, Local 等)
+        if config.base_url:
+            api_base = config.base_url.rstrip("/")
+            if provider == "openai" and not api_base.endswith("/v1"):
+                api_base = f"{api_base}/v1"
+            params["api_base"] = api_base
+
+        # 如果有 api_version
+        if config.api_version:
+            params["api_version"] = config.api_version
+
+        # 添加浏览器请求头以绕过中转站 block 检测
+        # 这些请求头模拟真实浏览器访问，避免被反爬虫机制拦截
+        extra_headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+            "Accept": "application/json",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
         }
-        
-        return config
-
-    def _setup_litellm(self):
-        """配置 LiteLLM。"""
-        # 设置 API Key
-        if self.config["api_key"]:
-            # LiteLLM 会自动查找环境变量，但这里显式设置更安全
-            # 注意：不同 provider 需要不同的环境变量名，但 LiteLLM 支持通过参数传递 api_key
-            pass
-        
-        # 配置日志
-        litellm.set_verbose = False  # 设置为 True 可开启详细调试日志
-        
-        # 自动丢弃模型不支持的参数，避免 GPT-5 等模型报错
-        litellm.drop_params = True
-        logger.info("✅ LiteLLM 配置：自动丢弃不支持的参数 (drop_params=True)")
-
-    def _resolve_request_url(self, provider: str, params: Dict[str, Any]) -> Optional[str]:
+
+        # 如果有 base_url，添加 Referer 和 Origin
+        if config.base_url:
+            base_domain = config.base_url.rstrip("/")
+            extra_headers["Referer"] = f"{base_domain}/"
+            extra_headers["Origin"] = base_domain
+
+        logger.info(
+            "📋 请求模板已编译: model=%s, User-Agent=%s, Referer=%s",
+            full_model_name,
+            extra_headers.get("User-Agent", "无")[:50],
+            extra_headers.get("Referer", "无"),
+        )
+        return _RequestTemplate(
+            provider=provider,
+            params=params,
+            extra_headers=extra_headers,
+            request_url=self._resolve_request_url(provider, params, config.base_url),
+        )
+
+    # ============ 预热 ============
+
+    async def warm_up(self) -> None:
+        """预热首次调用路径：导入 LiteLLM、编译请求模板、加载分词器并建立到服务商的连接。"""
+        litellm = await get_litellm()
+        config = self.config
+        client = self.clients.get(config)
+        # LiteLLM 统计用量时按模型加载 tiktoken 编码，首次加载需读取并解析词表
+        await asyncio.to_thread(litellm.token_counter, model=client.template.params["model"], text="warm up")
+        api_base = client.template.params.get("api_base")
+        if not api_base or not config.api_key:
+            return
+        # 向服务商发起一次免费请求，在客户端的连接池中完成 DNS 解析与 TLS 握手；任何 HTTP 状态都说明连接已就绪
+        client.sdk_client(config.api_key)
+        status_code = await self._get_models(client, api_base, config.api_key)
+        logger.info("服务商连接已建立: %s (HTTP %s)", api_base, status_code)
+
+    @staticmethod
+    def _new_http_session() -> Any:
+        import httpx  # LiteLLM 的依赖，按需导入
+
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(600.0, connect=10.0),
+            limits=httpx.Limits(keepalive_expiry=settings.llm_keepalive_expiry),
+        )
+
+    @staticmethod
+    async def _get_models(client: LLMClient, api_base: str, api_key: str) -> int:
+        """经客户端的连接池请求 OpenAI 兼容的 ``/models``：不计费，用于建立连接与健康探测。"""
+        response = await client.session.get(
+            f"{api_base.rstrip('/')}/models",
+            headers={**client.template.extra_headers, "Authorization": f"Bearer {api_key}"},
+        )
+        return response.status_code
+
+    # ============ 健康探测 ============
+
+    def probe_targets(self) -> List[str]:
+        """待探测的端点：OpenAI 兼容协议且已配置 api_base 与 API Key 时探测该端点。
+
+        其他服务商（anthropic、azure、gemini 等）的 ``/models`` 不接受 Bearer 认证，无法据此判断可用性。
+        """
+        config = self.config
+        template = self._request_template(config)
+        api_base = template.params.get("api_base")
+        return [api_base] if template.provider == "openai" and api_base and config.api_key else []
+
+    async def probe(self, endpoint: str) -> int:
+        """探测端点，返回 HTTP 状态码；复用当前配置客户端的连接池，顺带保持其中连接活跃。"""
+        config = self.config
+        client = self.clients.acquire(config)
+        try:
+            return await self._get_models(client, endpoint, config.api_key)
+        finally:
+            self.clients.release(client)
+
+    async def close(self) -> None:
+        """关闭客户端池中的连接。"""
+        await self.clients.close()
+
+    def _resolve_request_url(
+        self, provider: str, params: Dict[str, Any], base_url: str = ""
+    ) -> Optional[str]:
         """尝试推断真实的 HTTP 请求 URL。"""
         endpoint = self._guess_endpoint(provider, params)
         provider_lower = provider.lower()
 
-        api_base = params.get("api_base") or self.config.get("base_url")
+        api_base = params.get("api_base") or base_url
         if api_base:
             return self._compose_url(api_base, endpoint, provider_lower, params)
 
@@ -216,6 +377,9 @@ class LLMService:
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         use_cache: bool = True,
+        priority: LLMPriority = LLMPriority.BACKGROUND,
+        use_semantic_cache: bool = False,
+        config: LLMConfig | None = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -226,120 +390,121 @@ class LLMService:
             temperature: 温度参数
             max_tokens: 最大生成 token 数
             use_cache: 是否使用缓存（默认 True），对话场景建议设为 False
+            priority: 并发排队优先级，在线玩家对话应使用 ``LLMPriority.PLAYER``
+            use_semantic_cache: 是否查询语义缓存（按最后一条用户消息匹配相近问题）
+            config: 本次请求使用的配置（如带请求级覆盖的副本），默认使用当前共享快照
             **kwargs: 其他 LiteLLM 支持的参数
 
         Returns:
             LiteLLM 的响应对象（字典格式）
         """
-        provider = self.config.get("provider", "openai")
-        model = self.config.get("model", "gpt-4")
+        # 整个请求使用同一份快照，期间配置被替换也不受影响
+        config = config or self.config
+        provider = config.provider
+        model = config.model
         params: Dict[str, Any] | None = None
+        client = self.clients.acquire(config)
 
         try:
-            # 对于 custom provider（OpenAI 兼容的第三方 API），转换为 openai
-            # 这样 LiteLLM 会使用 OpenAI 的协议格式 + 自定义 api_base
-            if provider == "custom":
-                provider = "openai"
-                logger.info("📝 检测到 custom provider，转换为 openai 协议格式")
-
-            # 构建完整的模型名称
-            # 如果是 openai 兼容的第三方服务，通常不需要加 provider 前缀，或者直接用 model 名
-            # LiteLLM 约定：对于 openai 兼容接口，如果 provider 是 openai，可以直接用 model 名
-            # 如果是 anthropic/gemini 等，litellm 通常需要前缀，如 "anthropic/claude-3"
-            # 这里我们做一个简单的处理：如果 provider 不是 openai，且 model 不包含 /，则加上前缀
-
-            full_model_name = model
-            if provider == "openai":
-                normalized_model = model.split("/", 1)[-1]
-                full_model_name = f"openai/{normalized_model}"
-            elif "/" not in model:
-                full_model_name = f"{provider}/{model}"
-            
-            # 准备参数
+            template = client.template
+            provider = template.provider
+            # 准备参数：与配置相关的部分来自预编译模板，只需合并本次请求的参数
             params = {
-                "model": full_model_name,
+                **template.params,
                 "messages": messages,
                 "temperature": temperature,
-                "api_key": self.config["api_key"],
+                "api_key": config.api_key,
             }
 
             # GPT-5 系列模型只支持 temperature=1，必要时自动纠正
-            if "gpt-5" in full_model_name.lower() and temperature != 1.0:
+            if "gpt-5" in params["model"].lower() and temperature != 1.0:
                 logger.warning(
                     "⚠️  GPT-5 模型只支持 temperature=1，已从 %.1f 调整为 1.0",
                     temperature,
                 )
                 params["temperature"] = 1.0
 
-            # 强制使用指定的 provider，防止 LiteLLM 根据模型名称自动切换
-            # 例如：模型名称包含 "claude" 时，LiteLLM 会自动切换到 anthropic provider
-            # 但如果用户明确指定了 openai provider（OpenAI 兼容 API），则应该尊重用户选择
-            if provider == "openai":
-                params["custom_llm_provider"] = "openai"
-
             if max_tokens:
                 params["max_tokens"] = max_tokens
 
-            # 如果有 base_url (用于 DeepSeek, Moonshot, Local 等)
-            if self.config["base_url"]:
-                api_base = self.config["base_url"].rstrip("/")
-                if provider == "openai" and not api_base.endswith("/v1"):
-                    api_base = f"{api_base}/v1"
-                params["api_base"] = api_base
-            
-            # 如果有 api_version
-            if self.config["api_version"]:
-                params["api_version"] = self.config["api_version"]
-
             # 合并其他参数
             params.update(kwargs)
 
-            # 添加浏览器请求头以绕过中转站 block 检测
-            # 这些请求头模拟真实浏览器访问，避免被反爬虫机制拦截
-            extra_headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-                "Accept": "application/json",
-                "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            }
-
-            # 如果有 base_url，添加 Referer 和 Origin
-            if self.config["base_url"]:
-                base_domain = self.config["base_url"].rstrip("/")
-                extra_headers["Referer"] = f"{base_domain}/"
-                extra_headers["Origin"] = base_domain
-
             # 合并用户自定义请求头（如果有）
+            extra_headers = dict(template.extra_headers)
             if "extra_headers" in kwargs:
                 extra_headers.update(kwargs["extra_headers"])
-
             params["extra_headers"] = extra_headers
 
-            logger.info(
-                "📋 添加浏览器请求头: User-Agent=%s, Referer=%s",
-                extra_headers.get("User-Agent", "无")[:50],
-                extra_headers.get("Referer", "无"),
-            )
-
-            request_url = self._resolve_request_url(provider, params)
+            request_url = template.request_url if not kwargs else self._resolve_request_url(provider, params)
 
             cache_key = None
             if use_cache and settings.llm_cache_enabled and self.cache:
-                cache_key = generate_cache_key(messages, self.config["model"], temperature)
-                cached = await self.cache.get(cache_key)
-                if cached:
-                    logger.info("✅ LLM 缓存命中: %s", cache_key[:16])
-                    return json.loads(cached)
-
-            safe_params = params.copy()
-            safe_params["api_key"] = self._mask_api_key(safe_params.get("api_key"))
-            logger.info(
-                "发送 LLM 请求: url=%s, params=%s",
-                request_url or "未推断",
-                safe_params,
-            )
+                key_params = {k: v for k, v in params.items() if k not in _CACHE_KEY_EXCLUDED}
+                key_params["provider"] = provider
+                try:
+                    cache_key = build_cache_key(messages, key_params)
+                except TypeError as exc:
+                    logger.warning("请求参数无法参与缓存键计算，跳过缓存: %s", exc)
+                if cache_key:
+                    cached = await self.cache.get(cache_key)
+                    if cached:
+                        logger.info("✅ LLM 缓存命中: %s", cache_key[:26])
+                        return serialization.loads(cached)
+
+            # 语义缓存：按最后一条用户消息匹配同一人设下的相近问题
+            semantic_cache = self.semantic_cache if use_semantic_cache else None
+            semantic_query = semantic_cache.query_for(messages) if semantic_cache else None
+            semantic_namespace = ""
+            if semantic_cache is not None and semantic_query is not None:
+                semantic_namespace = semantic_cache.namespace_for(messages, config.model)
+                semantic_hit = semantic_cache.lookup(semantic_namespace, semantic_query)
+                if semantic_hit is not None:
+                    return semantic_hit
+
+            # 复制并脱敏参数有开销，仅在 DEBUG 级别输出
+            if logger.isEnabledFor(logging.DEBUG):
+                safe_params = params.copy()
+                safe_params["api_key"] = self._mask_api_key(safe_params.get("api_key"))
+                safe_params.pop("client", None)
+                logger.debug(
+                    "发送 LLM 请求: url=%s, params=%s",
+                    request_url or "未推断",
+                    safe_params,
+                )
 
-            # 调用 LiteLLM (异步)
-            raw_response = await litellm.acompletion(**params)
+            # 健康探测已确认端点不可用时快速拒绝，不让请求等到超时
+            api_base = params.get("api_base")
+            if self.health is not None and api_base and not self.health.is_available(api_base):
+                logger.warning("LLM 端点不可用，已快速拒绝: %s", api_base)
+                raise LLMUnavailableError(f"LLM 服务暂不可用: {api_base}")
+
+            # 全局 Token 预算：先按 prompt 估算值预扣，响应后补记差额；请求未完成时退还预扣额度
+            estimated_tokens = 0
+            if self.spend_limiter is not None:
+                estimated_tokens = self.spend_limiter.estimate_prompt_tokens(messages)
+                if not await self.spend_limiter.try_acquire(estimated_tokens):
+                    logger.warning("LLM Token 预算已耗尽，拒绝请求: estimated=%s", estimated_tokens)
+                    raise LLMRateLimitedError("LLM Token 预算已耗尽，请稍后再试")
+
+            # 调用 LiteLLM (异步)，并发已满时按优先级排队
+            litellm = await get_litellm()
+            # OpenAI 兼容协议下经客户端池中的 SDK 客户端发送，复用该配置的长连接
+            if params.get("api_base") == template.params.get("api_base"):
+                sdk_client = client.sdk_client(params["api_key"])
+                if sdk_client is not None:
+                    params["client"] = sdk_client
+            try:
+                if self.admission is not None:
+                    async with self.admission.slot(priority):
+                        raw_response = await litellm.acompletion(**params)
+                else:
+                    raw_response = await litellm.acompletion(**params)
+            except BaseException:
+                # 被准入控制削减、因截止时间取消或服务商报错：没有实际消耗
+                if self.spend_limiter is not None:
+                    await self.spend_limiter.record(-estimated_tokens)
+                raise
             response_payload: Any | None = None
             if hasattr(raw_response, "json") and callable(getattr(raw_response, "json", None)):
                 try:
@@ -394,28 +559,40 @@ class LLMService:
                 )
                 raise ValueError("LLM 响应缺少有效的 message.content")
 
-            choice_count = len(choices)
-            logger.info(
-                "LLM 响应结构: type=%s, keys=%s, choices=%s, usage=%s",
-                type(raw_response).__name__,
-                list(response.keys()),
-                choice_count,
-                response.get("usage"),
-            )
+            if self.spend_limiter is not None:
+                usage = response.get("usage") or {}
+                total_tokens = usage.get("total_tokens") if isinstance(usage, dict) else None
+                if isinstance(total_tokens, int):
+                    await self.spend_limiter.record(total_tokens - estimated_tokens)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "LLM 响应结构: type=%s, keys=%s, choices=%s, usage=%s",
+                    type(raw_response).__name__,
+                    list(response.keys()),
+                    len(choices),
+                    response.get("usage"),
+                )
 
             if use_cache and settings.llm_cache_enabled and self.cache and cache_key:
                 try:
-                    await self.cache.set(cache_key, json.dumps(response), ttl=settings.llm_cache_ttl)
+                    await self.cache.set(cache_key, serialization.dumps_text(response), ttl=settings.llm_cache_ttl)
                 except Exception as cache_exc:  # noqa: BLE001
                     logger.warning("写入缓存失败: %s", cache_exc)
 
+            if semantic_cache is not None and semantic_query is not None:
+                semantic_cache.store(semantic_namespace, semantic_query, response)
+
             return response
 
-        except LiteLLMException as api_error:
+        except (LLMRateLimitedError, LLMBusyError):
+            raise
+        except _api_error_type() as api_error:
             safe_params = {}
             if params:
                 safe_params = params.copy()
                 safe_params["api_key"] = self._mask_api_key(safe_params.get("api_key"))
+                safe_params.pop("client", None)
             logger.error(
                 "LLM API 错误: provider=%s, model=%s, params=%s, 错误=%s",
                 provider,
@@ -428,5 +605,7 @@ class LLMService:
         except Exception as e:  # noqa: BLE001
             logger.exception("LLM 请求失败: %s", e)
             raise
+        finally:
+            self.clients.release(client)
 
 # 不再导出模块级单例实例，实例由依赖注入工厂管理
@@ -1,27 +1,140 @@
 """统一日志配置。
 
-- 默认输出到控制台，并可选输出到轮转文件
+- 默认输出到控制台，并可选输出到轮转文件；
+- 业务代码只把日志记录放进内存队列，由独立线程（``QueueListener``）写控制台与文件，
+  stdout 或磁盘阻塞时不会卡住事件循环；
+- 可选 JSON 格式，每行一条，便于日志平台采集；
+- 同一 logger 的同一条日志模板按令牌桶限速，超出的记录被丢弃并在下次放行时附带抑制条数，
+  ERROR 及以上级别不限速。
+
+热路径上构造日志参数本身有开销的，应先用 ``logger.isEnabledFor`` 判断级别。
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from core import serialization
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s:%(lineno)d | %(message)s"
+
+# LogRecord 的标准属性，其余属性（logger.info(..., extra={...}) 传入）作为 JSON 附加字段输出
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+# 监听线程使用的输出 handler，重新配置时关闭
+_handlers: List[logging.Handler] = []
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return serialization.dumps_text(_json_safe(payload))
+
+
+def _json_safe(payload: Dict[str, object]) -> Dict[str, object]:
+    """无法编码的附加字段退化为 ``repr``，日志本身不应因此失败。"""
+    try:
+        serialization.dumps(payload)
+    except TypeError:
+        return {key: value if isinstance(value, (str, int, float, bool, type(None))) else repr(value) for key, value in payload.items()}
+    return payload
+
+
+class RateLimitFilter(logging.Filter):
+    """按 (logger, 日志模板) 限速的令牌桶过滤器。"""
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, max_keys: int = 1024) -> None:
+        """
+        Args:
+            rate: 每条模板每秒放行的记录数
+            burst: 突发容量
+            max_keys: 最多跟踪的模板数；用 f-string 拼出的日志每条都是新模板，
+                超出后淘汰最久未出现的模板（被淘汰的模板再次出现时按满桶处理）
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # (logger, 模板) → (令牌数, 上次补充时间, 已抑制条数)，按最近出现的顺序排列
+        self._buckets: "OrderedDict[Tuple[str, str], Tuple[float, float, int]]" = OrderedDict()
+        self._lock = Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(key, (float(self.burst), now, 0))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                self._buckets[key] = (tokens - 1.0, now, 0)
+            else:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            return False
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} [已抑制 {suppressed} 条相同日志]"
+        return True
 
 
-def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
-    """初始化结构化日志。
+def setup_logging(
+    level: str = "INFO",
+    log_file: Optional[str] = None,
+    json_format: bool = False,
+    rate_limit: float = 10.0,
+    rate_burst: int = 20,
+) -> logging.Logger:
+    """初始化异步日志管线。
 
     Args:
         level: 日志级别字符串，如 "DEBUG" / "INFO"
         log_file: 可选的日志文件路径，若提供则启用轮转输出
+        json_format: 是否输出 JSON 行
+        rate_limit: 同一日志模板每秒放行的记录数，0 表示不限速
+        rate_burst: 限速的突发容量
     """
-    formatter = logging.Formatter(
-        "%(asctime)s | %(levelname)-8s | %(name)s:%(lineno)d | %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    global _listener, _handlers
+    stop_logging()
+    root = logging.getLogger()
+    for handler in _handlers:
+        root.removeHandler(handler)
+        handler.close()
+
+    if json_format:
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S")
 
     handlers = []
 
@@ -39,12 +152,52 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> loggin
         file_handler.setFormatter(formatter)
         handlers.append(file_handler)
 
-    root = logging.getLogger()
+    # 调用线程只把记录放进队列，格式化与写入都在监听线程中完成
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    if rate_limit > 0:
+        queue_handler.addFilter(RateLimitFilter(rate_limit, rate_burst))
+
     root.setLevel(getattr(logging, level.upper(), logging.INFO))
 
     # 清理旧 handler，避免重复输出
     root.handlers.clear()
-    for h in handlers:
-        root.addHandler(h)
+    root.addHandler(queue_handler)
 
+    _handlers = handlers
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
     return root
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """入队前只合并参数，不做格式化（格式化由监听线程中的 handler 完成）。"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 参数可能是之后会被修改的可变对象，入队前先合并进消息；异常堆栈留给监听线程格式化
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def stop_logging() -> None:
+    """停止监听线程并写出队列中剩余的日志，之后的日志改由输出 handler 在调用线程中同步写出。
+
+    在进程退出、fork 子进程之前与应用关闭时调用：监听线程不会随 fork 复制到子进程，
+    以 ``os._exit`` 退出的 worker 也不会执行 atexit。
+    """
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    listener.stop()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        handler.flush()
+        root.addHandler(handler)
+
+
+atexit.register(stop_logging)
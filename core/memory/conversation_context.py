@@ -5,7 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from threading import RLock
-from typing import Dict, List, TypedDict
+from typing import Any, Dict, List, Optional, TypedDict
 import logging
 
 logger = logging.getLogger("core.memory.conversation_context")
@@ -86,6 +86,51 @@ class ConversationContext:
                 return []
             return list(session.messages)
 
+    def export_session(self, client_id: str) -> Optional[Dict[str, Any]]:
+        """导出会话快照（可 JSON 序列化），用于跨进程迁移；会话不存在时返回 None。"""
+
+        with self._lock:
+            session = self._sessions.get(client_id)
+            if session is None:
+                return None
+            return {
+                "player_name": session.player_name,
+                "started_at": session.started_at.isoformat(),
+                "messages": [
+                    {
+                        "role": message["role"],
+                        "content": message["content"],
+                        "timestamp": message["timestamp"].isoformat(),
+                    }
+                    for message in session.messages
+                ],
+            }
+
+    def restore_session(self, client_id: str, snapshot: Dict[str, Any]) -> ConversationSession:
+        """从 ``export_session`` 的快照恢复会话（覆盖已有会话）。"""
+
+        with self._lock:
+            session = ConversationSession(
+                player_name=snapshot.get("player_name") or "玩家",
+                started_at=datetime.fromisoformat(snapshot["started_at"]),
+                messages=[
+                    {
+                        "role": message["role"],
+                        "content": message["content"],
+                        "timestamp": datetime.fromisoformat(message["timestamp"]),
+                    }
+                    for message in snapshot.get("messages", [])
+                ],
+            )
+            self._sessions[client_id] = session
+            logger.info(
+                "恢复对话会话: client=%s, player=%s, messages=%d",
+                client_id,
+                session.player_name,
+                len(session.messages),
+            )
+            return session
+
     def clear_session(self, client_id: str) -> None:
         """清理指定客户端会话。"""
 
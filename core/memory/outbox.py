@@ -0,0 +1,93 @@
+"""未确认对话回复的发件箱。
+
+LLM 回复生成后、送达模组前连接断开，已付费的回复就会丢失。发件箱按 client_id 保存尚未被
+``conversation_ack`` 确认的 ``conversation_response``（键为请求 id），提供至少一次投递：
+
+- 模组凭恢复令牌重连后，发件箱中的回复按生成顺序重新发送；
+- 模组重试同一请求 id 时直接返回已保存的回复，不再调用 LLM；
+- 同一请求仍在生成中时，重试被忽略，原处理完成后经会话发送端回复到当前连接。
+
+模组应按 id 去重。每个客户端最多保留 ``max_pending`` 条，超出时丢弃最早的；条目在 ``ttl`` 秒后过期。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("core.memory.outbox")
+
+
+class PendingResponseOutbox:
+    """按 client_id 与请求 id 保存未确认的回复。"""
+
+    def __init__(self, max_pending: int = 32, ttl: float = 600.0) -> None:
+        self.max_pending = max_pending
+        self.ttl = ttl
+        # client_id → (请求 id → (保存时间, 回复))，按保存顺序排列
+        self._boxes: Dict[str, "OrderedDict[str, Tuple[float, Dict[str, Any]]]"] = {}
+        self._in_flight: Set[Tuple[str, str]] = set()
+        self._lock = RLock()
+
+    def claim(self, client_id: str, request_id: str) -> bool:
+        """登记请求开始生成；同一请求已在生成中时返回 False。"""
+        with self._lock:
+            key = (client_id, request_id)
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+            return True
+
+    def release(self, client_id: str, request_id: str) -> None:
+        """结束生成登记（无论成功与否）。"""
+        with self._lock:
+            self._in_flight.discard((client_id, request_id))
+
+    def put(self, client_id: str, request_id: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            box = self._boxes.setdefault(client_id, OrderedDict())
+            box[request_id] = (time.monotonic(), payload)
+            box.move_to_end(request_id)
+            while len(box) > self.max_pending:
+                dropped, _ = box.popitem(last=False)
+                logger.warning("发件箱已满，丢弃最早的未确认回复: client=%s, id=%s", client_id, dropped)
+
+    def get(self, client_id: str, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            box = self._boxes.get(client_id)
+            entry = box.get(request_id) if box else None
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del box[request_id]
+                return None
+            return entry[1]
+
+    def ack(self, client_id: str, request_id: str) -> bool:
+        """确认送达，移除对应回复。"""
+        with self._lock:
+            box = self._boxes.get(client_id)
+            if not box or request_id not in box:
+                return False
+            del box[request_id]
+            if not box:
+                del self._boxes[client_id]
+            return True
+
+    def pending(self, client_id: str) -> List[Dict[str, Any]]:
+        """返回未过期的未确认回复（按生成顺序），顺带清理过期条目。"""
+        with self._lock:
+            box = self._boxes.get(client_id)
+            if not box:
+                return []
+            deadline = time.monotonic() - self.ttl
+            for request_id in [rid for rid, (stored_at, _) in box.items() if stored_at < deadline]:
+                del box[request_id]
+            return [payload for _, payload in box.values()]
+
+    def clear(self, client_id: str) -> None:
+        with self._lock:
+            self._boxes.pop(client_id, None)
@@ -1,16 +1,20 @@
 """WebSocket 连接管理器的最小实现。
 
 首期用于替换散落的全局字典，后续可接入 Redis 等共享存储。
+连接可打上标签（如 ``player:Steve``），按标签分组发送时直接查索引，无需遍历全部连接。
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Dict
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 from fastapi import WebSocket
 
+from core import serialization
 from core.interfaces import ConnectionManagerInterface
+from models.monitor import SendResult
 
 
 logger = logging.getLogger(__name__)
@@ -19,14 +23,22 @@ logger = logging.getLogger(__name__)
 class ConnectionManager(ConnectionManagerInterface):
     """在内存中管理活跃 WebSocket 连接。"""
 
+    # 群发时单个连接的默认发送时限（秒），慢连接不拖慢整体
+    DEFAULT_SEND_TIMEOUT = 2.0
+
     def __init__(self) -> None:
         self._connections: Dict[str, WebSocket] = {}
+        # 标签 → 连接 ID，以及反向索引用于移除连接时清理
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._client_tags: Dict[str, Set[str]] = {}
 
-    def add(self, client_id: str, websocket: WebSocket) -> None:
+    def add(self, client_id: str, websocket: WebSocket, tags: Iterable[str] = ()) -> None:
         self._connections[client_id] = websocket
+        self.tag(client_id, *tags)
 
     def remove(self, client_id: str) -> None:
         self._connections.pop(client_id, None)
+        self.untag(client_id, *self._client_tags.get(client_id, ()))
 
     def get(self, client_id: str) -> WebSocket | None:
         return self._connections.get(client_id)
@@ -37,14 +49,118 @@ class ConnectionManager(ConnectionManagerInterface):
     def count(self) -> int:
         return len(self._connections)
 
+    # ============ 标签 ============
+
+    def tag(self, client_id: str, *tags: str) -> None:
+        """为已登记的连接添加标签。"""
+        if client_id not in self._connections:
+            return
+        for tag in tags:
+            self._tag_index.setdefault(tag, set()).add(client_id)
+            self._client_tags.setdefault(client_id, set()).add(tag)
+
+    def untag(self, client_id: str, *tags: str) -> None:
+        """移除连接的标签，标签下无连接时删除索引项。"""
+        client_tags = self._client_tags.get(client_id)
+        for tag in list(tags):
+            members = self._tag_index.get(tag)
+            if members is not None:
+                members.discard(client_id)
+                if not members:
+                    del self._tag_index[tag]
+            if client_tags is not None:
+                client_tags.discard(tag)
+        if client_tags is not None and not client_tags:
+            del self._client_tags[client_id]
+
+    def get_tags(self, client_id: str) -> Set[str]:
+        return set(self._client_tags.get(client_id, ()))
+
+    def ids_with_tags(self, *tags: str) -> Set[str]:
+        """返回带有任一标签的连接 ID。"""
+        result: Set[str] = set()
+        for tag in tags:
+            result |= self._tag_index.get(tag, set())
+        return result
+
+    # ============ 群发 ============
+
+    @staticmethod
+    async def _send_one(websocket: WebSocket, text: str, timeout: float) -> Optional[str]:
+        try:
+            await asyncio.wait_for(websocket.send_text(text), timeout=timeout)
+        except asyncio.TimeoutError:
+            return "timeout"
+        except Exception as exc:  # noqa: BLE001
+            return str(exc) or type(exc).__name__
+        return None
+
+    async def multicast(
+        self,
+        payload: Any,
+        client_ids: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        timeout: float | None = None,
+    ) -> SendResult:
+        """发送给指定连接以及带有任一指定标签的连接。
+
+        消息只编码一次，各连接并发发送并独立计时；不存在的连接记为失败。
+        """
+        targets = set(client_ids) | self.ids_with_tags(*tags)
+        return await self._send_many(payload, targets, timeout)
+
+    async def broadcast(
+        self,
+        payload: Any,
+        exclude: Iterable[str] = (),
+        timeout: float | None = None,
+    ) -> SendResult:
+        """发送给全部连接（可排除部分连接）。"""
+        targets = set(self._connections) - set(exclude)
+        return await self._send_many(payload, targets, timeout)
+
+    async def _send_many(self, payload: Any, targets: Set[str], timeout: float | None) -> SendResult:
+        result = SendResult()
+        if not targets:
+            return result
+        text = serialization.dumps_text(payload)
+        per_socket_timeout = self.DEFAULT_SEND_TIMEOUT if timeout is None else timeout
+
+        sending: List[str] = []
+        coros = []
+        for client_id in targets:
+            websocket = self._connections.get(client_id)
+            if websocket is None:
+                result.failed[client_id] = "not_connected"
+                continue
+            sending.append(client_id)
+            coros.append(self._send_one(websocket, text, per_socket_timeout))
+
+        for client_id, error in zip(sending, await asyncio.gather(*coros)):
+            if error is None:
+                result.delivered.append(client_id)
+            else:
+                result.failed[client_id] = error
+        if result.failed:
+            logger.warning("群发部分失败: delivered=%d, failed=%s", len(result.delivered), result.failed)
+        return result
+
+    async def _close_one(self, client_id: str, websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=1001, reason="服务端正在关闭"), timeout=self.DEFAULT_SEND_TIMEOUT
+            )
+            logger.debug("已关闭连接: %s", client_id)
+        except Exception as err:  # noqa: BLE001
+            logger.warning("关闭连接 %s 失败: %s", client_id, err or type(err).__name__)
+
     async def close_all(self) -> None:
-        """优雅关闭所有活跃连接。"""
+        """并发关闭所有活跃连接，单个连接的关闭时限为 ``DEFAULT_SEND_TIMEOUT``。"""
         logger.info("正在关闭 %d 个活跃连接...", len(self._connections))
-        for client_id, ws in list(self._connections.items()):
-            try:
-                await ws.close(code=1001, reason="服务端正在关闭")
-                logger.debug("已关闭连接: %s", client_id)
-            except Exception as err:  # noqa: BLE001
-                logger.warning("关闭连接 %s 失败: %s", client_id, err)
+        await asyncio.gather(
+            *(self._close_one(client_id, ws) for client_id, ws in list(self._connections.items()))
+        )
         self._connections.clear()
+        self._tag_index.clear()
+        self._client_tags.clear()
         logger.info("所有连接已关闭")
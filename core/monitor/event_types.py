@@ -17,3 +17,5 @@ class MonitorEventType(str, Enum):
     LLM_RESPONSE: "MonitorEventType" = "llm_response"
     LLM_ERROR: "MonitorEventType" = "llm_error"
     CHAT_MESSAGE: "MonitorEventType" = "chat_message"
+    LOOP_LAG: "MonitorEventType" = "loop_lag"
+    SLOW_CALLBACK: "MonitorEventType" = "slow_callback"
@@ -0,0 +1,122 @@
+"""模组连接的空闲回收。
+
+半开连接（对端掉线但 TCP 未断开）会让 ``websocket_endpoint`` 永远阻塞在 ``receive_text``，
+连接、限流与会话状态随之泄漏。``IdleReaper`` 用一个时间轮任务统一管理所有连接的空闲时限：
+
+- 每个连接只登记到一个槽位，收到消息时 ``touch`` 仅更新时间戳（O(1)，不移动槽位）；
+- 时间轮每个 tick 只检查到期槽位中的连接：仍然活跃的按最新时间戳重新入槽，
+  真正超时的调用回收回调。每次推进的开销与到期连接数成正比，而不是与连接总数成正比。
+
+协议层心跳（ping/pong）由 uvicorn 的 ``ws_ping_interval`` / ``ws_ping_timeout`` 负责。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("core.monitor.heartbeat")
+
+ExpireCallback = Callable[[], Awaitable[None]]
+
+
+class _Watch:
+    __slots__ = ("last_seen", "on_expire")
+
+    def __init__(self, last_seen: float, on_expire: ExpireCallback) -> None:
+        self.last_seen = last_seen
+        self.on_expire = on_expire
+
+
+class IdleReaper:
+    """基于时间轮的空闲连接回收器。"""
+
+    def __init__(self, idle_timeout: float, tick: float = 1.0) -> None:
+        """
+        Args:
+            idle_timeout: 连接无任何消息的最长时间（秒），超过后被回收
+            tick: 时间轮精度（秒），实际回收时间最多晚一个 tick
+        """
+        self.idle_timeout = idle_timeout
+        self.tick = tick
+        self._slots: List[Set[str]] = [set() for _ in range(math.ceil(idle_timeout / tick) + 1)]
+        self._watches: Dict[str, _Watch] = {}
+        self._cursor = 0
+        self._cursor_time = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def watched(self) -> int:
+        return len(self._watches)
+
+    def _schedule(self, client_id: str, deadline: float) -> None:
+        ticks_ahead = max(1, math.ceil((deadline - self._cursor_time) / self.tick))
+        ticks_ahead = min(ticks_ahead, len(self._slots) - 1)
+        self._slots[(self._cursor + ticks_ahead) % len(self._slots)].add(client_id)
+
+    def watch(self, client_id: str, on_expire: ExpireCallback) -> None:
+        """登记连接，空闲超时时调用 ``on_expire``。"""
+        now = time.monotonic()
+        self._watches[client_id] = _Watch(now, on_expire)
+        self._schedule(client_id, now + self.idle_timeout)
+
+    def touch(self, client_id: str) -> None:
+        """记录连接活跃，仅更新时间戳。"""
+        watch = self._watches.get(client_id)
+        if watch is not None:
+            watch.last_seen = time.monotonic()
+
+    def unwatch(self, client_id: str) -> None:
+        """取消登记；槽位中的残留条目在到期时被忽略。"""
+        self._watches.pop(client_id, None)
+
+    def advance(self, now: float) -> List[Tuple[str, ExpireCallback]]:
+        """推进时间轮到 ``now``，注销并返回已超时的连接及其回收回调。"""
+        expired: List[Tuple[str, ExpireCallback]] = []
+        while self._cursor_time + self.tick <= now:
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            self._cursor_time += self.tick
+            due, self._slots[self._cursor] = self._slots[self._cursor], set()
+            for client_id in due:
+                watch = self._watches.get(client_id)
+                if watch is None:
+                    continue
+                deadline = watch.last_seen + self.idle_timeout
+                if deadline <= self._cursor_time:
+                    del self._watches[client_id]
+                    expired.append((client_id, watch.on_expire))
+                else:
+                    # 期间有过消息：按最新时间戳重新入槽
+                    self._schedule(client_id, deadline)
+        return expired
+
+    async def _reap(self, client_id: str, on_expire: ExpireCallback) -> None:
+        logger.warning("连接空闲超过 %.0f 秒，正在回收: %s", self.idle_timeout, client_id)
+        try:
+            await on_expire()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("回收连接失败: client=%s, error=%s", client_id, exc)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick)
+            expired = self.advance(time.monotonic())
+            if expired:
+                await asyncio.gather(*(self._reap(client_id, on_expire) for client_id, on_expire in expired))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._cursor_time = time.monotonic()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
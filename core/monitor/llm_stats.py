@@ -0,0 +1,87 @@
+"""LLM 请求统计：排队耗时、并发水位、拒绝、中途放弃、浪费的 token 与语义缓存命中。"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict
+
+from models.monitor import LLMQueueWaitStats, LLMRequestStats, SemanticCacheStats
+
+
+class LLMStatsTracker:
+    """仅负责 LLM 请求相关指标（准入、放弃、语义缓存）的累积与查询。"""
+
+    def __init__(self) -> None:
+        self._in_flight = 0
+        self._queued = 0
+        self._wait: Dict[str, LLMQueueWaitStats] = {}
+        self._rejected: Dict[str, int] = {}
+        self._pending_tasks = 0
+        self._aborted: Dict[str, int] = {}
+        self._wasted_tokens = 0
+        self._semantic_hits = 0
+        self._semantic_misses = 0
+        self._semantic_entries = 0
+        self._last_reset_at = datetime.now(timezone.utc)
+
+    def set_queue_depth(self, in_flight: int, queued: int) -> None:
+        self._in_flight = in_flight
+        self._queued = queued
+
+    def record_queue_wait(self, priority: str, seconds: float) -> None:
+        stats = self._wait.get(priority)
+        if stats is None:
+            stats = self._wait[priority] = LLMQueueWaitStats()
+        stats.admitted += 1
+        stats.total_wait_seconds += seconds
+        stats.max_wait_seconds = max(stats.max_wait_seconds, seconds)
+
+    def record_rejected(self, priority: str) -> None:
+        self._rejected[priority] = self._rejected.get(priority, 0) + 1
+
+    def task_started(self) -> None:
+        self._pending_tasks += 1
+
+    def task_finished(self) -> None:
+        self._pending_tasks = max(0, self._pending_tasks - 1)
+
+    def record_aborted(self, reason: str, wasted_tokens: int) -> None:
+        self._aborted[reason] = self._aborted.get(reason, 0) + 1
+        self._wasted_tokens += max(0, wasted_tokens)
+
+    def record_semantic_lookup(self, hit: bool) -> None:
+        if hit:
+            self._semantic_hits += 1
+        else:
+            self._semantic_misses += 1
+
+    def set_semantic_entries(self, entries: int) -> None:
+        self._semantic_entries = entries
+
+    def get_stats(self) -> LLMRequestStats:
+        lookups = self._semantic_hits + self._semantic_misses
+        return LLMRequestStats(
+            in_flight=self._in_flight,
+            queued=self._queued,
+            queue_wait={k: v.model_copy() for k, v in self._wait.items()},
+            rejected=dict(self._rejected),
+            pending_tasks=self._pending_tasks,
+            aborted=dict(self._aborted),
+            wasted_tokens=self._wasted_tokens,
+            semantic_cache=SemanticCacheStats(
+                hits=self._semantic_hits,
+                misses=self._semantic_misses,
+                hit_rate=self._semantic_hits / lookups if lookups else 0.0,
+                entries=self._semantic_entries,
+            ),
+            last_reset_at=self._last_reset_at,
+        )
+
+    def reset(self) -> None:
+        self._wait.clear()
+        self._rejected.clear()
+        self._aborted.clear()
+        self._wasted_tokens = 0
+        self._semantic_hits = 0
+        self._semantic_misses = 0
+        self._last_reset_at = datetime.now(timezone.utc)
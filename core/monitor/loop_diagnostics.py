@@ -0,0 +1,235 @@
+"""事件循环诊断：持续采样循环延迟、检测慢回调、按协程统计存活任务。
+
+- 延迟采样：后台任务每 ``interval`` 秒休眠一次，实际醒来时间比预期晚多少即为当时的循环延迟；
+- 慢回调检测：看门狗线程定期向循环投递空回调，超过阈值仍未执行说明有回调在阻塞循环，
+  此时抓取循环线程的调用栈。比 asyncio 调试模式（``slow_callback_duration``）开销小得多，可在生产环境开启；
+- 任务统计：仅在查询时遍历 ``asyncio.all_tasks()``，不产生常驻开销。
+
+关闭时不创建任何任务或线程。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from core.monitor.event_types import MonitorEventType
+from models.monitor import LoopDiagnosticsStatus, LoopLagStats, SlowCallback
+
+logger = logging.getLogger("core.monitor.loop_diagnostics")
+
+# 两次 loop_lag 事件的最小间隔（秒），避免持续卡顿时刷屏
+LAG_EVENT_COOLDOWN = 10.0
+# 慢回调调用栈保留的最内层帧数
+STACK_LIMIT = 20
+
+PublishCallback = Callable[[MonitorEventType, Dict[str, Any], str], None]
+
+
+def _format_stack(frame: Any) -> List[str]:
+    return [
+        f"{entry.filename}:{entry.lineno} in {entry.name}"
+        for entry in traceback.extract_stack(frame, limit=STACK_LIMIT)
+    ]
+
+
+def _culprit(stack: List[str]) -> str:
+    """阻塞位置：调用栈最内层帧。
+
+    停在 selectors 的 select 说明循环本身空闲，却迟迟拿不到 GIL 醒来，
+    阻塞来自其他线程（例如在线程中导入大型模块）。
+    """
+    if not stack:
+        return "unknown"
+    if "selectors.py" in stack[-1] and stack[-1].endswith(" in select"):
+        return "其他线程占用 GIL（事件循环空闲于 select）"
+    return stack[-1]
+
+
+class LoopDiagnostics:
+    """事件循环延迟、慢回调与任务统计。"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        interval: float = 0.5,
+        window: int = 120,
+        lag_warn_ms: float = 100.0,
+        slow_callback_ms: float = 0.0,
+        max_slow_callbacks: int = 20,
+        publish: Optional[PublishCallback] = None,
+    ) -> None:
+        """
+        Args:
+            enabled: 是否启用；关闭时 ``start`` 不做任何事
+            interval: 延迟采样间隔（秒）
+            window: 保留最近多少次采样用于统计
+            lag_warn_ms: 延迟超过该值时发布 loop_lag 事件（0 表示不发布）
+            slow_callback_ms: 慢回调阈值（毫秒），0 表示不开启检测
+            max_slow_callbacks: 保留最近多少条慢回调记录
+            publish: 事件发布函数（通常为 ``EventBus.publish``）
+        """
+        self.enabled = enabled
+        self.interval = interval
+        self.lag_warn_ms = lag_warn_ms
+        self.slow_callback_ms = slow_callback_ms
+        self._publish = publish
+        self._lags: Deque[float] = deque(maxlen=window)
+        self._slow: Deque[SlowCallback] = deque(maxlen=max_slow_callbacks)
+        self._slow_total = 0
+        self._last_lag_event = -math.inf
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        """在事件循环内调用：启动延迟采样与（可选的）看门狗线程。"""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._sample(), name="loop-diagnostics")
+        if self.slow_callback_ms > 0:
+            self._watchdog = threading.Thread(
+                target=self._watch,
+                args=(threading.get_ident(),),
+                name="loop-watchdog",
+                daemon=True,
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 2.0)
+            self._watchdog = None
+
+    # ============ 延迟采样 ============
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record_lag(max(0.0, loop.time() - expected) * 1000)
+
+    def record_lag(self, lag_ms: float) -> None:
+        """记录一次延迟采样，超过告警值时发布事件（带冷却）。"""
+        self._lags.append(lag_ms)
+        if not self.lag_warn_ms or lag_ms < self.lag_warn_ms:
+            return
+        now = time.monotonic()
+        if now - self._last_lag_event < LAG_EVENT_COOLDOWN:
+            return
+        self._last_lag_event = now
+        logger.warning("事件循环延迟 %.1f ms（告警阈值 %.0f ms）", lag_ms, self.lag_warn_ms)
+        if self._publish is not None:
+            self._publish(
+                MonitorEventType.LOOP_LAG,
+                {"lag_ms": round(lag_ms, 1), "threshold_ms": self.lag_warn_ms},
+                "warning",
+            )
+
+    # ============ 慢回调检测 ============
+
+    def _watch(self, loop_thread_id: int) -> None:
+        """看门狗线程：投递空回调并等待执行，超时即抓取循环线程的调用栈。"""
+        threshold = self.slow_callback_ms / 1000
+        loop = self._loop
+        assert loop is not None
+        while not self._stopping.is_set():
+            answered = threading.Event()
+            probed_at = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                return
+            if answered.wait(threshold):
+                self._stopping.wait(threshold / 2)
+                continue
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = _format_stack(frame) if frame is not None else []
+            del frame
+            while not answered.wait(0.5):
+                if self._stopping.is_set() or loop.is_closed():
+                    return
+            entry = SlowCallback(
+                detected_at=datetime.now(timezone.utc),
+                duration_ms=round((time.monotonic() - probed_at) * 1000, 1),
+                stack=stack,
+            )
+            try:
+                loop.call_soon_threadsafe(self._report_slow, entry)
+            except RuntimeError:
+                return
+
+    def _report_slow(self, entry: SlowCallback) -> None:
+        self._slow.append(entry)
+        self._slow_total += 1
+        culprit = _culprit(entry.stack)
+        logger.warning(
+            "事件循环被阻塞 %.1f ms，阻塞位置: %s\n%s",
+            entry.duration_ms,
+            culprit,
+            "\n".join(entry.stack),
+        )
+        if self._publish is not None:
+            self._publish(
+                MonitorEventType.SLOW_CALLBACK,
+                {"duration_ms": entry.duration_ms, "culprit": culprit, "stack": entry.stack[-5:]},
+                "warning",
+            )
+
+    # ============ 查询 ============
+
+    @staticmethod
+    def task_counts() -> Counter:
+        """按协程名统计当前事件循环的存活任务（需在事件循环内调用）。"""
+        counts: Counter = Counter()
+        for task in asyncio.all_tasks():
+            coro = task.get_coro()
+            counts[getattr(coro, "__qualname__", None) or task.get_name()] += 1
+        return counts
+
+    def lag_stats(self) -> LoopLagStats:
+        lags = sorted(self._lags)
+        if not lags:
+            return LoopLagStats()
+        rank = max(1, math.ceil(len(lags) * 0.99))
+        return LoopLagStats(
+            samples=len(lags),
+            current_ms=round(self._lags[-1], 2),
+            mean_ms=round(sum(lags) / len(lags), 2),
+            p99_ms=round(lags[rank - 1], 2),
+            max_ms=round(lags[-1], 2),
+        )
+
+    def snapshot(self, top_tasks: int = 20) -> LoopDiagnosticsStatus:
+        counts = self.task_counts()
+        return LoopDiagnosticsStatus(
+            enabled=self._task is not None,
+            interval=self.interval,
+            lag=self.lag_stats(),
+            slow_callback_threshold_ms=self.slow_callback_ms if self._watchdog is not None else 0.0,
+            slow_callback_total=self._slow_total,
+            slow_callbacks=list(reversed(self._slow)),
+            tasks_total=sum(counts.values()),
+            tasks=dict(counts.most_common(top_tasks)),
+        )
@@ -5,16 +5,18 @@ from __future__ import annotations
 from core.monitor.message_stats import MessageStatsCollector
 from core.monitor.connection_tracker import ConnectionTracker
 from core.monitor.token_usage import TokenUsageTracker
-from models.monitor import MessageStats, ConnectionStatus, TokenTrendStats
+from core.monitor.llm_stats import LLMStatsTracker
+from models.monitor import MessageStats, ConnectionStatus, TokenTrendStats, LLMRequestStats
 
 
 class MetricsCollector:
-    """组合模式：聚合消息统计、连接状态、Token 趋势。"""
+    """组合模式：聚合消息统计、连接状态、Token 趋势、LLM 请求准入。"""
 
     def __init__(self) -> None:
         self.message_stats = MessageStatsCollector()
         self.connection_tracker = ConnectionTracker()
         self.token_usage = TokenUsageTracker()
+        self.llm_stats = LLMStatsTracker()
 
     # 兼容旧接口 —— 直接委派
     def record_message_received(self, message_type: str) -> None:
@@ -47,5 +49,33 @@ class MetricsCollector:
     def get_token_trend(self) -> TokenTrendStats:
         return self.token_usage.get_trend()
 
+    def set_llm_queue_depth(self, in_flight: int, queued: int) -> None:
+        self.llm_stats.set_queue_depth(in_flight, queued)
+
+    def record_llm_queue_wait(self, priority: str, seconds: float) -> None:
+        self.llm_stats.record_queue_wait(priority, seconds)
+
+    def record_llm_rejected(self, priority: str) -> None:
+        self.llm_stats.record_rejected(priority)
+
+    def record_llm_task_started(self) -> None:
+        self.llm_stats.task_started()
+
+    def record_llm_task_finished(self) -> None:
+        self.llm_stats.task_finished()
+
+    def record_llm_aborted(self, reason: str, wasted_tokens: int) -> None:
+        self.llm_stats.record_aborted(reason, wasted_tokens)
+
+    def record_semantic_cache_lookup(self, hit: bool) -> None:
+        self.llm_stats.record_semantic_lookup(hit)
+
+    def set_semantic_cache_size(self, entries: int) -> None:
+        self.llm_stats.set_semantic_entries(entries)
+
+    def get_llm_stats(self) -> LLMRequestStats:
+        return self.llm_stats.get_stats()
+
     def reset_stats(self) -> None:
         self.message_stats.reset()
+        self.llm_stats.reset()
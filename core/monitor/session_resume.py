@@ -0,0 +1,145 @@
+"""模组连接的会话恢复。
+
+每个连接都有一个恢复令牌，随 ``connection_ack`` 下发。连接断开后会话不立即清理，而是进入
+宽限期（``grace`` 秒）：会话历史、限流状态与仍在执行的对话处理都保留在原 client_id 下。
+模组在宽限期内重连并在 ``connection_init`` 中出示令牌，新连接即接管原 client_id，
+仍在执行的处理会把回复发到新连接。宽限期结束仍未恢复时才执行清理。
+
+半开连接（旧连接尚未被发现断开）同样可以被接管：旧连接的清理逻辑发现会话已转移后不做任何事。
+令牌每次使用后轮换，旧令牌随即失效。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import secrets
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger("core.monitor.session_resume")
+
+ReleaseCallback = Callable[[], Awaitable[None]]
+
+
+class SocketRelay:
+    """可重新绑定的发送端：处理器经它发送，会话被新连接接管后自动改发到新连接。"""
+
+    __slots__ = ("websocket",)
+
+    def __init__(self, websocket: Any) -> None:
+        self.websocket = websocket
+
+    async def send_text(self, text: str) -> None:
+        await self.websocket.send_text(text)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        await self.websocket.close(code=code, reason=reason)
+
+
+@dataclass(slots=True)
+class ResumableSession:
+    """一个可恢复的模组会话。"""
+
+    client_id: str
+    token: str
+    relay: SocketRelay
+    # 仍在执行的后台处理任务，会话被接管时一并转移
+    tasks: Set[asyncio.Task] = field(default_factory=set)
+    # 断开时保存的连接标签，恢复时重新打上
+    tags: Set[str] = field(default_factory=set)
+    # 串行执行后台处理：同一会话的对话按到达顺序逐个生成，后一轮能看到前一轮的回答
+    handler_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # 宽限期计时任务，非空表示会话处于断开待恢复状态
+    expiry: Optional[asyncio.Task] = None
+
+    @property
+    def parked(self) -> bool:
+        return self.expiry is not None
+
+    def track(self, task: asyncio.Task) -> None:
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+
+class SessionResumeRegistry:
+    """按恢复令牌索引的会话表。"""
+
+    def __init__(self, grace: float = 60.0) -> None:
+        """
+        Args:
+            grace: 断开后保留会话的时长（秒），0 表示断开即清理
+        """
+        self.grace = grace
+        self._by_token: Dict[str, ResumableSession] = {}
+        self._by_client: Dict[str, ResumableSession] = {}
+
+    @property
+    def parked(self) -> int:
+        return sum(1 for session in self._by_client.values() if session.parked)
+
+    def open(self, client_id: str, websocket: Any) -> ResumableSession:
+        """为新连接创建会话并签发令牌。"""
+        session = ResumableSession(client_id=client_id, token=secrets.token_urlsafe(24), relay=SocketRelay(websocket))
+        self._by_token[session.token] = session
+        self._by_client[client_id] = session
+        return session
+
+    def get(self, client_id: str) -> Optional[ResumableSession]:
+        return self._by_client.get(client_id)
+
+    def redeem(self, token: str) -> Optional[ResumableSession]:
+        """兑换令牌：停止宽限期计时并轮换令牌，令牌无效时返回 None。"""
+        session = self._by_token.pop(token, None)
+        if session is None:
+            return None
+        if session.expiry is not None:
+            session.expiry.cancel()
+            session.expiry = None
+        session.token = secrets.token_urlsafe(24)
+        self._by_token[session.token] = session
+        logger.info("会话已恢复: client=%s", session.client_id)
+        return session
+
+    def park(self, session: ResumableSession, release: ReleaseCallback) -> bool:
+        """连接断开后保留会话；宽限期为 0 时返回 False，由调用方立即清理。"""
+        if self.grace <= 0:
+            self.discard(session)
+            return False
+        session.expiry = asyncio.create_task(self._expire(session, release))
+        return True
+
+    def discard(self, session: ResumableSession) -> None:
+        """注销会话，令牌随之失效。"""
+        self._by_token.pop(session.token, None)
+        if self._by_client.get(session.client_id) is session:
+            del self._by_client[session.client_id]
+
+    async def _expire(self, session: ResumableSession, release: ReleaseCallback) -> None:
+        await asyncio.sleep(self.grace)
+        session.expiry = None
+        self.discard(session)
+        logger.info("会话宽限期已过，清理: client=%s", session.client_id)
+        for task in list(session.tasks):
+            task.cancel()
+        if session.tasks:
+            await asyncio.gather(*session.tasks, return_exceptions=True)
+        try:
+            await release()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("清理会话失败: client=%s, error=%s", session.client_id, exc)
+
+    async def close(self) -> None:
+        """停止全部宽限期计时并取消待恢复会话中的任务（服务关闭时调用）。"""
+        pending = []
+        for session in list(self._by_client.values()):
+            if session.expiry is not None:
+                session.expiry.cancel()
+                pending.append(session.expiry)
+                for task in list(session.tasks):
+                    task.cancel()
+                    pending.append(task)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._by_token.clear()
+        self._by_client.clear()
@@ -3,9 +3,10 @@
 提供简易 Token 计数与两种消息格式（标准/紧凑）的对比统计。
 """
 
-import json
 from typing import Any, Dict
 
+from core import serialization
+
 
 class TokenTracker:
     @staticmethod
@@ -19,8 +20,8 @@ class TokenTracker:
     @staticmethod
     def compare(standard_msg: Dict[str, Any], compact_msg: Dict[str, Any]) -> Dict[str, Any]:
         """对比两种格式的 token 消耗并返回统计结果。"""
-        standard_json: str = json.dumps(standard_msg, ensure_ascii=False)
-        compact_json: str = json.dumps(compact_msg, ensure_ascii=False)
+        standard_json: str = serialization.dumps_text(standard_msg)
+        compact_json: str = serialization.dumps_text(compact_msg)
 
         standard_tokens: int = TokenTracker.count_tokens(standard_json)
         compact_tokens: int = TokenTracker.count_tokens(compact_json)
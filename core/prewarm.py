@@ -0,0 +1,91 @@
+"""启动预热。
+
+lifespan 只构造对象，首个 ``conversation_request`` 仍要承担 LiteLLM 导入、DNS 解析、TLS 握手
+与 Redis 建连的开销。``Prewarmer`` 在服务开始监听后于后台并发执行各预热钩子，互不阻塞；
+单个钩子失败或超时只记录结果，不影响其他钩子，也不阻止服务就绪（首次调用时会再次建立）。
+
+预热期间就绪探针返回 ``warming``，负载均衡只把流量路由到已预热的实例。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("core.prewarm")
+
+PrewarmHook = Callable[[], Awaitable[Any]]
+
+
+class Prewarmer:
+    """并发执行预热钩子并记录每个钩子的结果。"""
+
+    def __init__(self, timeout: float = 30.0) -> None:
+        """
+        Args:
+            timeout: 单个钩子的最长执行时间（秒），超时视为失败
+        """
+        self.timeout = timeout
+        self._hooks: List[Tuple[str, PrewarmHook]] = []
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, hook: PrewarmHook) -> None:
+        """登记预热钩子，需在 ``start`` 之前调用。"""
+        self._hooks.append((name, hook))
+
+    @property
+    def warming(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """在后台启动预热；没有钩子时立即视为完成。"""
+        if self._task is None and self._hooks:
+            self._task = asyncio.create_task(self._run())
+
+    async def wait(self) -> None:
+        """等待预热结束（测试与脚本使用）。"""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def _run_hook(self, name: str, hook: PrewarmHook) -> None:
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"status": "ok"}
+        try:
+            await asyncio.wait_for(hook(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            result = {"status": "timeout"}
+            logger.warning("预热 %s 超时（%.0f 秒），将在首次调用时建立", name, self.timeout)
+        except Exception as exc:  # noqa: BLE001
+            result = {"status": "failed", "error": str(exc) or type(exc).__name__}
+            logger.warning("预热 %s 失败，将在首次调用时重试: %s", name, exc)
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self._results[name] = result
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        await asyncio.gather(*(self._run_hook(name, hook) for name, hook in self._hooks))
+        logger.info(
+            "预热完成，用时 %.0f ms: %s",
+            (time.perf_counter() - started) * 1000,
+            ", ".join(f"{name}={result['status']}" for name, result in self._results.items()),
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """预热状态：``warming`` / ``ready``，以及已完成钩子的结果。"""
+        return {
+            "status": "warming" if self.warming else "ready",
+            "hooks": {name: dict(result) for name, result in self._results.items()},
+            "pending": [name for name, _ in self._hooks if name not in self._results],
+        }
+
+    async def stop(self) -> None:
+        """取消未完成的预热（服务关闭时调用）。"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
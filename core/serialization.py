@@ -0,0 +1,83 @@
+"""统一的 JSON 编解码工具。
+
+WebSocket 收发、监控广播、日志预览与 Token 统计都通过本模块完成：
+- 优先使用 orjson（可选依赖，C 实现），不可用时回退到标准库 json；
+- 编码结果统一为 UTF-8 ``bytes``，发送与日志预览复用同一份编码，避免重复序列化。
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+# orjson.JSONDecodeError 继承自 json.JSONDecodeError，调用方统一捕获此异常即可
+JSONDecodeError = json.JSONDecodeError
+
+
+def _default(obj: Any) -> Any:
+    """处理两种编码器都不原生支持的类型。"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"对象 {type(obj).__name__} 无法被序列化")
+
+
+def dumps(obj: Any) -> bytes:
+    """编码为紧凑 JSON（UTF-8 bytes，不转义非 ASCII 字符）。"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+def dumps_canonical(obj: Any) -> bytes:
+    """编码为键排序的紧凑 JSON，相同内容总是得到相同字节（用于缓存键等摘要）。"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True, default=_default
+    ).encode("utf-8")
+
+
+def dumps_text(obj: Any) -> str:
+    """编码为紧凑 JSON 字符串，用于 ``send_text`` 与字符长度统计。"""
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data: str | bytes | bytearray | memoryview) -> Any:
+    """解析 JSON 文本或字节，失败时抛出 ``JSONDecodeError``。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def preview(encoded: bytes | str, limit: int = 100) -> str:
+    """从已编码数据中截取日志预览，不再重新序列化。"""
+    if isinstance(encoded, str):
+        return encoded[:limit]
+    # UTF-8 单字符最多 4 字节，先按字节截断再解码，避免解码整段大消息
+    return encoded[: limit * 4].decode("utf-8", "ignore")[:limit]
+
+
+async def send_encoded(websocket: Any, encoded: bytes) -> None:
+    """以文本帧发送已编码的 JSON（模组端只处理文本帧）。"""
+    await websocket.send_text(encoded.decode("utf-8"))
+
+
+async def send_payload(websocket: Any, payload: Any) -> bytes:
+    """编码一次并发送，返回编码结果供调用方复用（日志预览等）。"""
+    encoded = dumps(payload)
+    await send_encoded(websocket, encoded)
+    return encoded
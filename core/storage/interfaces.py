@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Protocol, Optional, Any
+from typing import Protocol, Optional, Any, List, Mapping, Tuple
 
 
 class CacheStorage(Protocol):
@@ -20,6 +20,14 @@ class CacheStorage(Protocol):
     async def delete(self, key: str) -> None:
         ...
 
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """批量读取，结果与 ``keys`` 一一对应，不存在的键为 None。"""
+        ...
+
+    async def mset(self, items: Mapping[str, str], ttl: int = 3600) -> None:
+        """批量写入，所有键使用相同的 TTL。"""
+        ...
+
 
 class StateStorage(Protocol):
     """状态存储接口（会话/连接状态等）"""
@@ -29,3 +37,35 @@ class StateStorage(Protocol):
 
     async def set_state(self, key: str, state: dict, ttl: Optional[int] = None) -> None:
         ...
+
+    async def delete_state(self, key: str) -> None:
+        ...
+
+
+class RateLimitStorage(Protocol):
+    """限流状态存储接口（GCRA），多个 worker 共享同一份限流状态。"""
+
+    async def acquire(
+        self,
+        key: str,
+        cost: float,
+        rate: float,
+        burst: float,
+        force: bool = False,
+    ) -> Tuple[bool, float]:
+        """尝试消耗 ``cost`` 个单位。
+
+        Args:
+            key: 限流键
+            cost: 本次消耗
+            rate: 每秒补充速率
+            burst: 突发容量
+            force: 为 True 时无论是否超限都记账（用于事后补记实际消耗）
+
+        Returns:
+            (是否放行, 需等待的秒数)
+        """
+        ...
+
+    async def reset(self, key: str) -> None:
+        ...
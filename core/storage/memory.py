@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Mapping, Tuple
 from datetime import datetime, timedelta, timezone
 
-from core.storage.interfaces import CacheStorage, StateStorage
+from core.storage.interfaces import CacheStorage, StateStorage, RateLimitStorage
 
 
 class MemoryCacheStorage(CacheStorage):
@@ -33,6 +34,13 @@ class MemoryCacheStorage(CacheStorage):
     async def delete(self, key: str) -> None:
         self._cache.pop(key, None)
 
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+
+    async def mset(self, items: Mapping[str, str], ttl: int = 3600) -> None:
+        for key, value in items.items():
+            await self.set(key, value, ttl=ttl)
+
 
 class MemoryStateStorage(StateStorage):
     """简单状态存储（无过期）。"""
@@ -46,3 +54,35 @@ class MemoryStateStorage(StateStorage):
     async def set_state(self, key: str, state: dict, ttl: Optional[int] = None) -> None:
         # 当前版本忽略 ttl
         self._state[key] = state
+
+    async def delete_state(self, key: str) -> None:
+        self._state.pop(key, None)
+
+
+class MemoryRateLimitStorage(RateLimitStorage):
+    """进程内 GCRA 限流存储，单 worker 部署与测试使用。"""
+
+    def __init__(self) -> None:
+        # key → 理论到达时间（TAT，基于 time.monotonic）
+        self._tat: Dict[str, float] = {}
+
+    async def acquire(
+        self,
+        key: str,
+        cost: float,
+        rate: float,
+        burst: float,
+        force: bool = False,
+    ) -> Tuple[bool, float]:
+        now = time.monotonic()
+        interval = 1.0 / rate
+        tat = max(self._tat.get(key, now), now)
+        new_tat = tat + interval * cost
+        allow_at = new_tat - interval * burst
+        if allow_at > now and not force:
+            return False, allow_at - now
+        self._tat[key] = new_tat
+        return True, 0.0
+
+    async def reset(self, key: str) -> None:
+        self._tat.pop(key, None)
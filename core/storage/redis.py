@@ -2,35 +2,315 @@
 
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, List, Mapping, Optional, Tuple
+from uuid import uuid4
 
 try:
-    import redis.asyncio as aioredis
-except ImportError as exc:  # pragma: no cover - 可选依赖
-    aioredis = None
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:  # pragma: no cover - 旧版本解释器回退到 zlib
+    _zstd = None
 
-from core.storage.interfaces import CacheStorage
+from core import serialization
+from core.storage.interfaces import CacheStorage, RateLimitStorage, StateStorage
+
+logger = logging.getLogger("core.storage.redis")
+
+
+def redis_from_url(url: str, **kwargs: Any) -> Any:
+    """按需导入 redis 并创建客户端；内存后端部署不必为导入 redis 付出启动耗时。"""
+    try:
+        import redis.asyncio as aioredis
+    except ImportError as exc:  # pragma: no cover - 可选依赖
+        raise ImportError("redis dependency not installed; install with extra 'redis'.") from exc
+    return aioredis.from_url(url, **kwargs)
+
+# 缓存值首字节标记（JSON 文本不会以这些字节开头，可与旧数据区分）
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+_ZSTD = b"\x02"
+
+# GCRA 原子脚本：使用 Redis 服务器时钟，避免多 worker 之间的时钟漂移
+# KEYS[1]=限流键  ARGV[1]=单位间隔(秒)  ARGV[2]=突发容量  ARGV[3]=消耗  ARGV[4]=强制记账(1/0)
+# 浮点数以字符串返回，Lua number 转 Redis 整数时会被截断
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == "1"
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then
+  tat = now
+end
+local new_tat = tat + interval * cost
+local allow_at = new_tat - interval * burst
+if allow_at > now and not force then
+  return {0, tostring(allow_at - now)}
+end
+redis.call("SET", KEYS[1], tostring(new_tat), "EX", math.max(1, math.ceil(new_tat - now)))
+return {1, "0"}
+"""
+
+
+class _LocalCache:
+    """热点键的进程内 LRU 副本（带 TTL），减少重复的网络往返。"""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _encode_value(value: str, compress_threshold: int) -> bytes:
+    """编码缓存值：超过阈值时压缩（优先 zstd），首字节标记编码方式。"""
+    data = value.encode("utf-8")
+    if compress_threshold <= 0 or len(data) < compress_threshold:
+        return _RAW + data
+    if _zstd is not None:
+        return _ZSTD + _zstd.compress(data)
+    return _ZLIB + zlib.compress(data)
+
+
+def _decode_value(raw: bytes) -> str:
+    """解码缓存值，兼容升级前写入的无标记 JSON 文本。"""
+    marker, body = raw[:1], raw[1:]
+    if marker == _RAW:
+        return body.decode("utf-8")
+    if marker == _ZLIB:
+        return zlib.decompress(body).decode("utf-8")
+    if marker == _ZSTD:
+        if _zstd is None:
+            raise ValueError("缓存值使用 zstd 压缩，但当前环境不支持 zstd")
+        return _zstd.decompress(body).decode("utf-8")
+    return raw.decode("utf-8")
 
 
 class RedisCacheStorage(CacheStorage):
-    """Redis 缓存实现。"""
+    """
+    Redis 缓存实现
+
+    - 以二进制存储，超过 ``compress_threshold`` 字节的值压缩后写入；
+    - ``mget``/``mset`` 通过单次往返（MGET / 非事务 pipeline）批量读写；
+    - 连接池大小显式配置，避免突发流量下无限创建连接；
+    - 热点键在进程内保留短 TTL 副本，写入/删除时通过 pub/sub 通知其他 worker 失效。
+    """
+
+    INVALIDATION_CHANNEL = "llm:cache:invalidate"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379",
+        max_connections: int = 20,
+        compress_threshold: int = 1024,
+        local_cache_size: int = 256,
+        local_cache_ttl: float = 30.0,
+        client: Any = None,
+    ):
+        """
+        Args:
+            url: Redis 连接地址
+            max_connections: 连接池上限
+            compress_threshold: 触发压缩的最小字节数，0 表示不压缩
+            local_cache_size: 进程内热点副本的最大条目数，0 表示关闭
+            local_cache_ttl: 进程内副本的有效期（秒），限制跨 worker 失效通知丢失时的陈旧时间
+            client: 预先构造的 Redis 客户端（需 ``decode_responses=False``），主要用于测试
+        """
+        if client is None:
+            client = redis_from_url(url, decode_responses=False, max_connections=max_connections)
+        self._redis = client
+        self.compress_threshold = compress_threshold
+        self._local = _LocalCache(local_cache_size, local_cache_ttl)
+        self._instance_id = uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    # ============ 跨 worker 失效通知 ============
+
+    def _ensure_listener(self) -> None:
+        if self._local.enabled and self._listener is None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
 
-    def __init__(self, url: str = "redis://localhost:6379"):
-        if aioredis is None:
-            raise ImportError("redis dependency not installed; install with extra 'redis'.")
-        self._redis = aioredis.from_url(url, decode_responses=True)
+    async def _listen_invalidations(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    sender, _, key = message["data"].decode("utf-8").partition(":")
+                    if sender != self._instance_id:
+                        self._local.invalidate(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                # 通知链路中断期间无法保证副本新鲜，全部丢弃后重连
+                logger.warning("缓存失效通知订阅中断，1 秒后重连: %s", exc)
+                self._local.clear()
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:  # noqa: BLE001
+                    pass
+
+    def _notify(self, pipe: Any, key: str) -> None:
+        if self._local.enabled:
+            pipe.publish(self.INVALIDATION_CHANNEL, f"{self._instance_id}:{key}")
+
+    # ============ CacheStorage ============
 
     async def get(self, key: str) -> Optional[str]:
-        return await self._redis.get(key)
+        return (await self.mget([key]))[0]
 
     async def set(self, key: str, value: str, ttl: int = 3600) -> None:
-        await self._redis.setex(key, ttl, value)
+        await self.mset({key: value}, ttl=ttl)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        self._ensure_listener()
+        results: List[Optional[str]] = [self._local.get(key) for key in keys]
+        missing = [i for i, value in enumerate(results) if value is None]
+        if not missing:
+            return results
+        raw_values = await self._redis.mget([keys[i] for i in missing])
+        for i, raw in zip(missing, raw_values):
+            if raw is None:
+                continue
+            value = _decode_value(raw)
+            results[i] = value
+            self._local.put(keys[i], value)
+        return results
+
+    async def mset(self, items: Mapping[str, str], ttl: int = 3600) -> None:
+        if not items:
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, _encode_value(value, self.compress_threshold), ex=ttl)
+                self._notify(pipe, key)
+            await pipe.execute()
+        for key, value in items.items():
+            self._local.put(key, value)
 
     async def exists(self, key: str) -> bool:
+        if self._local.get(key) is not None:
+            return True
         return await self._redis.exists(key) > 0
 
     async def delete(self, key: str) -> None:
+        self._local.invalidate(key)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(key)
+            self._notify(pipe, key)
+            await pipe.execute()
+
+    async def ping(self) -> None:
+        """建立连接池中的首个连接，并提前订阅失效通知（启动预热）。"""
+        await self._redis.ping()
+        self._ensure_listener()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._redis.aclose()
+
+
+class RedisStateStorage(StateStorage):
+    """Redis 状态存储，状态以 JSON 保存，供重启后或其他 worker 读取。"""
+
+    def __init__(self, url: str = "redis://localhost:6379", client: Any = None):
+        if client is None:
+            client = redis_from_url(url, decode_responses=False)
+        self._redis = client
+
+    async def get_state(self, key: str) -> Optional[dict]:
+        raw = await self._redis.get(key)
+        return None if raw is None else serialization.loads(raw)
+
+    async def set_state(self, key: str, state: dict, ttl: Optional[int] = None) -> None:
+        await self._redis.set(key, serialization.dumps(state), ex=ttl)
+
+    async def delete_state(self, key: str) -> None:
         await self._redis.delete(key)
 
+    async def ping(self) -> None:
+        await self._redis.ping()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class RedisRateLimitStorage(RateLimitStorage):
+    """Redis GCRA 限流实现，多 worker 共享限流状态。"""
+
+    def __init__(self, url: str = "redis://localhost:6379", client: Any = None):
+        if client is None:
+            client = redis_from_url(url, decode_responses=True)
+        self._redis = client
+        self._script = self._redis.register_script(_GCRA_SCRIPT)
+
+    async def acquire(
+        self,
+        key: str,
+        cost: float,
+        rate: float,
+        burst: float,
+        force: bool = False,
+    ) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(
+            keys=[key], args=[1.0 / rate, burst, cost, "1" if force else "0"]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+    async def reset(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def ping(self) -> None:
+        """建立连接并预先加载 GCRA 脚本，首次限流检查不必回退到 EVAL。"""
+        await self._redis.ping()
+        await self._redis.script_load(_GCRA_SCRIPT)
+
     async def close(self) -> None:
         await self._redis.close()
@@ -22,6 +22,8 @@ const typeLabels: Record<MonitorEventType, string> = {
   llm_response: "LLM 响应",
   llm_error: "LLM 错误",
   chat_message: "聊天消息",
+  loop_lag: "事件循环延迟",
+  slow_callback: "慢回调",
 };
 
 const severityLabels: Record<MonitorEvent["severity"], string> = {
@@ -0,0 +1,107 @@
+import { useEffect, useState } from 'react';
+import { Gauge, ListTree, Timer } from 'lucide-react';
+
+import { Card, CardHeader, CardContent, CardDescription, CardTitle } from '@/components/ui/card';
+import { Badge } from '@/components/ui/badge';
+import { api } from '@/lib/api';
+import type { LoopDiagnosticsStatus } from '@/types/monitor';
+
+// 轮询间隔（毫秒）；后端只在查询时统计任务，轮询本身开销很小
+const POLL_INTERVAL = 5000;
+const TOP_TASKS = 5;
+
+export const LoopDiagnostics = () => {
+  const [status, setStatus] = useState<LoopDiagnosticsStatus | null>(null);
+  const [error, setError] = useState(false);
+
+  useEffect(() => {
+    const fetchStatus = async () => {
+      try {
+        setStatus(await api.getLoopDiagnostics(TOP_TASKS));
+        setError(false);
+      } catch (err) {
+        console.error('Failed to fetch loop diagnostics:', err);
+        setError(true);
+      }
+    };
+
+    fetchStatus();
+    const interval = setInterval(fetchStatus, POLL_INTERVAL);
+    return () => clearInterval(interval);
+  }, []);
+
+  const lag = status?.lag;
+  const latestSlow = status?.slow_callbacks[0];
+  const slowDetection = Boolean(status && status.slow_callback_threshold_ms > 0);
+
+  return (
+    <Card aria-label='事件循环诊断'>
+      <CardHeader className='flex flex-row items-start justify-between space-y-0 pb-3'>
+        <div className='space-y-1'>
+          <CardTitle className='text-base'>事件循环</CardTitle>
+          <CardDescription>循环延迟、慢回调与存活任务（每 5 秒刷新）</CardDescription>
+        </div>
+        <Badge variant='outline'>
+          {error ? '获取失败' : !status ? '加载中' : status.enabled ? '采样中' : '采样未开启'}
+        </Badge>
+      </CardHeader>
+      <CardContent className='grid grid-cols-1 gap-4 text-sm md:grid-cols-3'>
+        <div className='space-y-2'>
+          <div className='flex items-center gap-2 font-medium'>
+            <Gauge className='h-4 w-4 text-muted-foreground' aria-hidden />
+            <span>延迟</span>
+          </div>
+          {lag && lag.samples > 0 ? (
+            <div className='space-y-1 tabular-nums text-muted-foreground'>
+              <div>P99：{lag.p99_ms} ms</div>
+              <div>最大：{lag.max_ms} ms</div>
+              <div>当前：{lag.current_ms} ms（{lag.samples} 次采样）</div>
+            </div>
+          ) : (
+            <div className='text-xs text-muted-foreground'>暂无采样</div>
+          )}
+        </div>
+
+        <div className='space-y-2'>
+          <div className='flex items-center gap-2 font-medium'>
+            <Timer className='h-4 w-4 text-muted-foreground' aria-hidden />
+            <span>慢回调</span>
+          </div>
+          {slowDetection ? (
+            <div className='space-y-1 text-muted-foreground'>
+              <div className='tabular-nums'>
+                累计 {status?.slow_callback_total} 次（阈值 {status?.slow_callback_threshold_ms} ms）
+              </div>
+              {latestSlow && (
+                <div className='break-all text-xs'>
+                  最近：{latestSlow.duration_ms} ms，{latestSlow.stack[latestSlow.stack.length - 1] ?? '调用栈未知'}
+                </div>
+              )}
+            </div>
+          ) : (
+            <div className='text-xs text-muted-foreground'>检测未开启</div>
+          )}
+        </div>
+
+        <div className='space-y-2'>
+          <div className='flex items-center gap-2 font-medium'>
+            <ListTree className='h-4 w-4 text-muted-foreground' aria-hidden />
+            <span>存活任务{status ? `（共 ${status.tasks_total}）` : ''}</span>
+          </div>
+          {status && Object.keys(status.tasks).length > 0 ? (
+            <ul className='space-y-1 text-muted-foreground'>
+              {Object.entries(status.tasks).map(([name, count]) => (
+                <li key={name} className='flex justify-between gap-2'>
+                  <span className='truncate' title={name}>{name}</span>
+                  <span className='tabular-nums'>{count}</span>
+                </li>
+              ))}
+            </ul>
+          ) : (
+            <div className='text-xs text-muted-foreground'>暂无数据</div>
+          )}
+        </div>
+      </CardContent>
+    </Card>
+  );
+};
@@ -28,6 +28,7 @@ import {
 } from '@/components/ui/dropdown-menu';
 import { ConnectionStatus } from './ConnectionStatus';
 import { EventLog } from './EventLog';
+import { LoopDiagnostics } from './LoopDiagnostics';
 
 export const MonitorPanel = () => {
   const {
@@ -63,6 +64,8 @@ export const MonitorPanel = () => {
     llm_response: 'LLM 响应',
     llm_error: 'LLM 错误',
     chat_message: '聊天消息',
+    loop_lag: '事件循环延迟',
+    slow_callback: '慢回调',
   };
 
   const totalMessages = useMemo(() => {
@@ -155,6 +158,9 @@ export const MonitorPanel = () => {
         {/* 连接状态 */}
         <ConnectionStatus isConnected={isConnected} connectionStatus={connectionStatus} />
 
+        {/* 事件循环诊断 */}
+        <LoopDiagnostics />
+
         {/* 工具栏 */}
         <Card>
           <CardHeader className='pb-3'>
@@ -192,6 +198,8 @@ export const MonitorPanel = () => {
                     <DropdownMenuRadioItem value='llm_response'>LLM 响应</DropdownMenuRadioItem>
                     <DropdownMenuRadioItem value='llm_error'>LLM 错误</DropdownMenuRadioItem>
                     <DropdownMenuRadioItem value='chat_message'>聊天消息</DropdownMenuRadioItem>
+                    <DropdownMenuRadioItem value='loop_lag'>事件循环延迟</DropdownMenuRadioItem>
+                    <DropdownMenuRadioItem value='slow_callback'>慢回调</DropdownMenuRadioItem>
                   </DropdownMenuRadioGroup>
                 </DropdownMenuContent>
               </DropdownMenu>
@@ -1,3 +1,5 @@
+import type { LoopDiagnosticsStatus } from "@/types/monitor";
+
 // TODO: 卡片类型后续按实际接口补全，这里先用最小占位类型
 export interface Card {
     id: string;
@@ -71,6 +73,12 @@ export const api = {
         }));
     },
 
+    async getLoopDiagnostics(topTasks = 5): Promise<LoopDiagnosticsStatus> {
+        const res = await fetch(`${API_BASE}/debug/loop?top_tasks=${topTasks}`);
+        if (!res.ok) throw new Error("Failed to fetch loop diagnostics");
+        return res.json();
+    },
+
     async healthCheck(): Promise<{ status: string; version: string }> {
         const res = await fetch(`${API_BASE}/health`);
         if (!res.ok) throw new Error("Health check failed");
@@ -12,7 +12,9 @@ export type MonitorEventType =
   | 'llm_request'
   | 'llm_response'
   | 'llm_error'
-  | 'chat_message';
+  | 'chat_message'
+  | 'loop_lag'
+  | 'slow_callback';
 
 // 监控事件结构，包含基础元数据与原始载荷
 export interface MonitorEvent {
@@ -73,3 +75,31 @@ export type WSMessage =
   | WSStatsMessage
   | WSEventMessage
   | WSAckMessage;
+
+// 事件循环延迟统计（毫秒），对应 GET /api/debug/loop 的 lag 字段
+export interface LoopLagStats {
+  samples: number;
+  current_ms: number;
+  mean_ms: number;
+  p99_ms: number;
+  max_ms: number;
+}
+
+// 一次慢回调：事件循环无响应的时长与当时的调用栈（由外到内）
+export interface SlowCallback {
+  detected_at: string;
+  duration_ms: number;
+  stack: string[];
+}
+
+// 事件循环诊断快照，对应 GET /api/debug/loop
+export interface LoopDiagnosticsStatus {
+  enabled: boolean;
+  interval: number;
+  lag: LoopLagStats;
+  slow_callback_threshold_ms: number;
+  slow_callback_total: number;
+  slow_callbacks: SlowCallback[];
+  tasks_total: number;
+  tasks: Record<string, number>;
+}
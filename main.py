@@ -3,67 +3,268 @@ from fastapi.responses import RedirectResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import asyncio
 import os
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from api import websocket, monitor_ws, stats
+from api import debug, websocket, monitor_ws, stats
 from api.routes import llm
 from api.middleware import SecurityHeadersMiddleware
 from api.monitor_ws import register_monitor_subscriptions
 from api.health import router as health_router
-from core.logging_config import setup_logging
+from api.rate_limiter import LLMSpendLimiter, SharedRateLimiter, WebSocketRateLimiter
+from api.traffic_capture import TrafficCapture
+from core.logging_config import setup_logging, stop_logging
 from config.settings import settings
 from core.monitor.event_bus import EventBus
 from core.monitor.metrics_collector import MetricsCollector
 from core.monitor.connection_manager import ConnectionManager
+from core.monitor.heartbeat import IdleReaper
+from core.monitor.loop_diagnostics import LoopDiagnostics
+from core.monitor.session_resume import SessionResumeRegistry
+from core.drain import DrainController
+from core.prewarm import Prewarmer
+from core.cluster.registry import LocalCluster, RedisCluster
+from core.llm.admission import LLMAdmissionController
+from core.llm.config import LLMConfigStore
+from core.llm.health_probe import LLMHealthProber
 from core.llm.service import LLMService
-from core.storage.memory import MemoryCacheStorage
-from core.storage.redis import RedisCacheStorage
+from core.storage.memory import MemoryCacheStorage, MemoryRateLimitStorage, MemoryStateStorage
+from core.storage.redis import RedisCacheStorage, RedisRateLimitStorage, RedisStateStorage
 from core.memory.conversation_context import ConversationContext
+from core.memory.outbox import PendingResponseOutbox
 
 
-logger = setup_logging(level=os.getenv("LOG_LEVEL", "INFO"), log_file=os.getenv("LOG_FILE"))
+logger = logging.getLogger("main")
+
+
+def configure_logging() -> None:
+    # settings 同时读取 .env；进程环境变量在运行期修改时（如压测脚本）优先
+    setup_logging(
+        level=os.getenv("LOG_LEVEL", settings.log_level),
+        log_file=os.getenv("LOG_FILE", settings.log_file) or None,
+        json_format=settings.log_format.lower() == "json",
+        rate_limit=settings.log_rate_limit,
+        rate_burst=settings.log_rate_burst,
+    )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: 初始化共享资源
+    # Startup: 初始化共享资源（日志在此配置而非模块导入时，导入 main 保持轻量）
+    configure_logging()
+    if STATIC_DIR.exists():
+        logger.info("✅ 生产模式：静态文件服务已启用 (路径: %s)", STATIC_DIR)
+    else:
+        logger.info("⚠️ 开发模式：未找到静态文件目录，根路径跳转到 /docs")
     cache_storage = (
-        RedisCacheStorage(settings.redis_url) if settings.storage_backend == "redis" else MemoryCacheStorage()
+        RedisCacheStorage(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            compress_threshold=settings.redis_cache_compress_threshold,
+            local_cache_size=settings.redis_local_cache_size,
+            local_cache_ttl=settings.redis_local_cache_ttl,
+        )
+        if settings.storage_backend == "redis"
+        else MemoryCacheStorage()
     )
     app.state.cache_storage = cache_storage
+    # 限流状态：redis 后端时多 worker 共享，内存后端时仅本地令牌桶
+    rate_limit_storage = (
+        RedisRateLimitStorage(settings.redis_url) if settings.storage_backend == "redis" else None
+    )
+    app.state.mod_rate_limiter = SharedRateLimiter(
+        WebSocketRateLimiter(
+            max_messages=settings.rate_limit_messages,
+            window_seconds=settings.rate_limit_window,
+            costs=settings.rate_limit_costs,
+        ),
+        rate_limit_storage,
+        namespace="mod",
+    )
+    app.state.monitor_rate_limiter = SharedRateLimiter(
+        WebSocketRateLimiter(
+            max_messages=settings.monitor_rate_limit_messages,
+            window_seconds=settings.monitor_rate_limit_window,
+        ),
+        rate_limit_storage,
+        namespace="monitor",
+    )
+    spend_limiter = (
+        LLMSpendLimiter(settings.llm_tokens_per_minute, rate_limit_storage or MemoryRateLimitStorage())
+        if settings.llm_tokens_per_minute > 0
+        else None
+    )
     app.state.event_bus = EventBus(history_size=settings.event_history_size)
     app.state.metrics = MetricsCollector()
+    # 事件循环诊断：持续采样循环延迟，可选检测阻塞循环的慢回调
+    loop_diagnostics = LoopDiagnostics(
+        enabled=settings.loop_diagnostics_enabled,
+        interval=settings.loop_lag_interval,
+        lag_warn_ms=settings.loop_lag_warn_ms,
+        slow_callback_ms=settings.loop_slow_callback_ms,
+        publish=app.state.event_bus.publish,
+    )
+    loop_diagnostics.start()
+    app.state.loop_diagnostics = loop_diagnostics
     app.state.connection_manager = ConnectionManager()
-    app.state.llm_service = LLMService(cache_storage=cache_storage)
+    idle_reaper = IdleReaper(idle_timeout=settings.ws_idle_timeout)
+    idle_reaper.start()
+    app.state.idle_reaper = idle_reaper
+    session_resume = SessionResumeRegistry(grace=settings.ws_resume_grace)
+    app.state.session_resume = session_resume
+    # 集群路由：redis 后端时跨 worker 登记连接并转发消息，内存后端时仅限本进程
+    cluster = (
+        RedisCluster(app.state.connection_manager, settings.redis_url)
+        if settings.storage_backend == "redis"
+        else LocalCluster(app.state.connection_manager)
+    )
+    await cluster.start()
+    app.state.cluster = cluster
+    admission = LLMAdmissionController(
+        max_in_flight=settings.llm_max_in_flight,
+        max_queue_wait=settings.llm_queue_timeout,
+        metrics=app.state.metrics,
+    )
+    semantic_cache = None
+    if settings.llm_semantic_cache_enabled:
+        from core.llm.semantic_cache import SemanticCache  # 可选功能，按需导入（numpy）
+
+        semantic_cache = SemanticCache(
+            threshold=settings.llm_semantic_cache_threshold,
+            ttl=settings.llm_semantic_cache_ttl,
+            capacity=settings.llm_semantic_cache_capacity,
+            max_namespaces=settings.llm_semantic_cache_max_namespaces,
+            metrics=app.state.metrics,
+        )
+    # LLM 配置快照：文件变化或保存配置时原子替换
+    llm_config = LLMConfigStore(poll_interval=settings.llm_config_poll_interval)
+    llm_config.start()
+    app.state.llm_service = LLMService(
+        cache_storage=cache_storage,
+        spend_limiter=spend_limiter,
+        admission=admission,
+        semantic_cache=semantic_cache,
+        config_store=llm_config,
+    )
+    # 服务商端点健康探测：结果供就绪探针读取，并让 LLMService 跳过已知不可用的端点
+    llm_health = LLMHealthProber(
+        app.state.llm_service,
+        interval=settings.llm_probe_interval,
+        failure_interval=settings.llm_probe_failure_interval,
+        timeout=settings.llm_probe_timeout,
+        failure_threshold=settings.llm_probe_failure_threshold,
+    )
+    if settings.llm_probe_enabled:
+        app.state.llm_service.health = llm_health
+        llm_health.start()
+    app.state.llm_health = llm_health
     app.state.conversation_context = ConversationContext()
+    app.state.outbox = PendingResponseOutbox(max_pending=settings.outbox_max_pending, ttl=settings.outbox_ttl)
+    # 会话快照：排空时写入，重连时凭恢复令牌取回；跨重启恢复需要 redis 后端
+    state_storage = (
+        RedisStateStorage(settings.redis_url) if settings.storage_backend == "redis" else MemoryStateStorage()
+    )
+    app.state.state_storage = state_storage
+    app.state.drain = DrainController(
+        app.state.connection_manager,
+        app.state.conversation_context,
+        state_storage,
+        timeout=settings.drain_timeout,
+        resume_ttl=settings.drain_resume_ttl,
+        close_timeout=settings.broadcast_send_timeout,
+    )
+    # 流量录制：记录 /ws 入站帧供 scripts/replay_traffic.py 回放
+    traffic_capture = TrafficCapture(
+        directory=settings.traffic_capture_dir,
+        redact=settings.traffic_capture_redact,
+        max_frames=settings.traffic_capture_max_frames,
+    )
+    if settings.traffic_capture_on_start:
+        try:
+            traffic_capture.start()
+        except OSError as exc:
+            logger.warning("无法开始流量录制: %s", exc)
+    app.state.traffic_capture = traffic_capture
 
     logger.info("存储后端: %s", settings.storage_backend)
+    # 启动预热：不阻塞启动，开始监听后在后台并发执行，完成前就绪探针返回 warming
+    prewarm = Prewarmer(timeout=settings.prewarm_timeout)
+    if settings.prewarm_enabled:
+        prewarm.add("llm", app.state.llm_service.warm_up)
+        for name, storage in (
+            ("cache_storage", cache_storage),
+            ("rate_limit_storage", rate_limit_storage),
+            ("state_storage", state_storage),
+        ):
+            if hasattr(storage, "ping"):
+                prewarm.add(name, storage.ping)  # type: ignore[union-attr]
+    prewarm.start()
+    app.state.prewarm = prewarm
     # 注册监控事件订阅，将事件广播到前端监控页面
-    register_monitor_subscriptions(app.state.event_bus)
+    register_monitor_subscriptions(
+        app.state.event_bus, cluster if isinstance(cluster, RedisCluster) else None
+    )
     yield
 
     # Shutdown: 清理资源
     logger.info("开始清理资源...")
+    await prewarm.stop()
+    await loop_diagnostics.stop()
+    await llm_health.stop()
+    await llm_config.stop()
 
-    # 1. 先关闭所有 WebSocket 连接
+    # 1. 停止空闲回收，排空（交接会话）后关闭剩余 WebSocket 连接
+    await idle_reaper.stop()
+    try:
+        await app.state.drain.drain()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("排空连接失败: %s", exc)
     connection_manager = getattr(app.state, "connection_manager", None)
     if connection_manager is not None:
         try:
             await connection_manager.close_all()
         except Exception as exc:  # noqa: BLE001
             logger.warning("关闭 WebSocket 连接失败: %s", exc)
+    await session_resume.close()
+    # 连接全部关闭后结束录制，等待剩余帧写入文件
+    await asyncio.to_thread(traffic_capture.join, 5.0)
+
+    # 2. 注销本 worker 的集群登记
+    try:
+        await cluster.stop()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("关闭集群路由失败: %s", exc)
 
-    # 2. 关闭缓存存储
+    # 3. 关闭缓存存储
     if hasattr(cache_storage, "close"):
         try:
             await cache_storage.close()  # type: ignore[attr-defined]
         except Exception as exc:  # noqa: BLE001
             logger.warning("关闭缓存存储失败: %s", exc)
 
+    if hasattr(state_storage, "close"):
+        try:
+            await state_storage.close()  # type: ignore[attr-defined]
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("关闭状态存储失败: %s", exc)
+
+    if rate_limit_storage is not None:
+        try:
+            await rate_limit_storage.close()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("关闭限流存储失败: %s", exc)
+
+    try:
+        await app.state.llm_service.close()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("关闭 LLM 连接池失败: %s", exc)
+
     logger.info("资源清理完成")
+    # 写出队列中剩余的日志：fork 出的 worker 以 os._exit 退出，不会执行 atexit
+    stop_logging()
 
 
 app = FastAPI(
@@ -87,6 +288,7 @@ app.add_middleware(SecurityHeadersMiddleware)
 app.include_router(websocket.router, tags=["WebSocket"])
 app.include_router(monitor_ws.router, tags=["Monitor"])
 app.include_router(stats.router, prefix="/api/stats", tags=["Statistics"])
+app.include_router(debug.router, prefix="/api/debug", tags=["Debug"])
 app.include_router(llm.router)
 app.include_router(health_router)
 
@@ -119,32 +321,38 @@ if STATIC_DIR.exists():
 
     # 挂载静态资源目录（CSS, JS, 字体等）
     app.mount("/assets", StaticFiles(directory=STATIC_DIR / "assets"), name="assets")
-    logger.info("✅ 生产模式：静态文件服务已启用 (路径: %s)", STATIC_DIR)
 else:
     # 开发模式：前端由 Vite 开发服务器提供，根路径跳转到 API 文档
     @app.get("/", include_in_schema=False)
     async def dev_mode_redirect():
         """开发模式：跳转到 API 文档"""
         return RedirectResponse(url="/docs")
-    logger.info("⚠️ 开发模式：未找到静态文件目录，根路径跳转到 /docs")
 
 
 if __name__ == "__main__":
-    import asyncio
+    import multiprocessing
+    import signal
     import socket
 
+    configure_logging()
+
     # 禁用 reload 避免子进程残留，由自定义 socket 控制端口复用
+    # 直接传入 app 对象：以 "main:app" 字符串传入会让 uvicorn 再导入一遍整个模块
     config = uvicorn.Config(
-        "main:app",
+        app,
         host="0.0.0.0",
         port=8080,
         reload=False,
         log_level="info",
+        # 不使用 uvicorn 自带的日志配置，让 uvicorn 日志经根 logger 进入同一条异步管线
+        log_config=None,
         access_log=False,
         timeout_keep_alive=5,
         limit_concurrency=100,
+        # 协议层心跳：对端在超时内未回 pong 时由 uvicorn 关闭连接
+        ws_ping_interval=settings.ws_ping_interval,
+        ws_ping_timeout=settings.ws_ping_timeout,
     )
-    server = uvicorn.Server(config)
 
     def create_reusable_socket() -> socket.socket:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -159,11 +367,60 @@ if __name__ == "__main__":
         sock.setblocking(False)
         return sock
 
-    async def serve() -> None:
-        sock = create_reusable_socket()
-        try:
-            await server.serve(sockets=[sock])
-        finally:
-            sock.close()
+    class DrainingServer(uvicorn.Server):
+        """收到退出信号时先排空连接、交接会话，再由 uvicorn 关闭监听与剩余连接。
+
+        uvicorn 自身的关闭流程会立即以 1012 断开全部 WebSocket，进行中的对话随之丢失。
+        """
+
+        async def shutdown(self, sockets=None) -> None:
+            drain = getattr(app.state, "drain", None)
+            if drain is not None:
+                try:
+                    await drain.drain()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("排空连接失败: %s", exc)
+            await super().shutdown(sockets=sockets)
+
+    def run_worker() -> None:
+        server = DrainingServer(config)
+
+        async def serve() -> None:
+            # 每个 worker 绑定自己的 SO_REUSEPORT socket，由内核在 worker 间分配新连接
+            sock = create_reusable_socket()
+            try:
+                await server.serve(sockets=[sock])
+            finally:
+                sock.close()
+
+        asyncio.run(serve())
+
+    workers = settings.workers
+    if workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        logger.warning("当前平台不支持 SO_REUSEPORT，改为单 worker 运行")
+        workers = 1
+    if workers > 1 and settings.storage_backend != "redis":
+        logger.warning("多 worker 未使用 redis 存储后端：连接路由、限流与缓存不会在 worker 间共享")
+
+    if workers <= 1:
+        run_worker()
+    else:
+        # 监听线程不会复制到子进程：fork 前先停止，worker 在 lifespan 中各自重新配置日志
+        stop_logging()
+        # 在启动事件循环之前 fork，子进程各自运行独立的事件循环
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=run_worker, name=f"worker-{i}") for i in range(workers)]
+        for process in processes:
+            process.start()
+        logger.info("已启动 %d 个 worker，共享端口 %s", workers, config.port)
+
+        def forward_signal(signum, frame) -> None:
+            for process in processes:
+                if process.is_alive():
+                    os.kill(process.pid, signum)
 
-    asyncio.run(serve())
+        # Ctrl+C 会直接发给整个进程组，主进程只需转发 SIGTERM
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, forward_signal)
+        for process in processes:
+            process.join()
@@ -80,10 +80,176 @@ class TokenTrendStats(BaseModel):
     )
 
 
+class LLMQueueWaitStats(BaseModel):
+    """单个优先级的 LLM 排队统计"""
+
+    # 获准执行的请求数
+    admitted: int = Field(default=0, description="获准执行的请求数")
+    # 累计排队耗时
+    total_wait_seconds: float = Field(default=0.0, description="累计排队耗时（秒）")
+    # 最长排队耗时
+    max_wait_seconds: float = Field(default=0.0, description="最长排队耗时（秒）")
+
+
+class TrafficCaptureStatus(BaseModel):
+    """流量录制状态模型"""
+
+    # 是否正在录制
+    enabled: bool = Field(default=False, description="是否正在录制")
+    # 最近一次录制的文件路径
+    path: Optional[str] = Field(default=None, description="录制文件路径")
+    # 最近一次录制的开始时间
+    started_at: Optional[datetime] = Field(default=None, description="录制开始时间")
+    # 最近一次录制已记录的入站帧数
+    frames: int = Field(default=0, description="已记录的入站帧数")
+    # 帧内容是否脱敏
+    redact: bool = Field(default=True, description="帧内容是否脱敏")
+
+
+class SendResult(BaseModel):
+    """群发结果模型"""
+
+    # 发送成功的连接 ID
+    delivered: List[str] = Field(default_factory=list, description="发送成功的连接 ID")
+    # 发送失败的连接 ID → 失败原因（timeout / not_connected / 异常信息）
+    failed: Dict[str, str] = Field(default_factory=dict, description="发送失败的连接及原因")
+
+
+class DrainStatus(BaseModel):
+    """排空状态模型"""
+
+    # 是否处于排空中（排空开始后不再接受新连接）
+    draining: bool = Field(default=False, description="是否处于排空中")
+    # 排空开始时间
+    started_at: Optional[datetime] = Field(default=None, description="排空开始时间")
+    # 排空是否已完成（全部连接已交接并关闭）
+    completed: bool = Field(default=False, description="排空是否已完成")
+    # 仍在执行的对话任务数
+    in_flight: int = Field(default=0, description="仍在执行的对话任务数")
+    # 当前连接数
+    connections: int = Field(default=0, description="当前连接数")
+    # 已签发的会话恢复令牌数
+    resume_tokens_issued: int = Field(default=0, description="已签发的恢复令牌数")
+
+
+class LoopLagStats(BaseModel):
+    """事件循环延迟统计（最近采样窗口）"""
+
+    # 窗口内采样数
+    samples: int = Field(default=0, description="窗口内采样数")
+    # 最近一次采样的延迟（毫秒）
+    current_ms: float = Field(default=0.0, description="最近一次采样的延迟（毫秒）")
+    # 平均延迟（毫秒）
+    mean_ms: float = Field(default=0.0, description="平均延迟（毫秒）")
+    # P99 延迟（毫秒）
+    p99_ms: float = Field(default=0.0, description="P99 延迟（毫秒）")
+    # 最大延迟（毫秒）
+    max_ms: float = Field(default=0.0, description="最大延迟（毫秒）")
+
+
+class SlowCallback(BaseModel):
+    """一次阻塞事件循环的慢回调"""
+
+    # 发现时间
+    detected_at: datetime = Field(..., description="发现时间")
+    # 事件循环无响应的时长（毫秒）
+    duration_ms: float = Field(..., description="事件循环无响应的时长（毫秒）")
+    # 超过阈值时事件循环线程的调用栈（由外到内）
+    stack: List[str] = Field(default_factory=list, description="超过阈值时事件循环线程的调用栈")
+
+
+class LoopDiagnosticsStatus(BaseModel):
+    """事件循环诊断模型"""
+
+    # 是否在持续采样延迟
+    enabled: bool = Field(default=False, description="是否在持续采样延迟")
+    # 采样间隔（秒）
+    interval: float = Field(default=0.0, description="采样间隔（秒）")
+    # 延迟统计
+    lag: LoopLagStats = Field(default_factory=LoopLagStats, description="延迟统计")
+    # 慢回调阈值（毫秒），0 表示未开启检测
+    slow_callback_threshold_ms: float = Field(default=0.0, description="慢回调阈值（毫秒），0 表示未开启")
+    # 启动以来发现的慢回调总数
+    slow_callback_total: int = Field(default=0, description="慢回调总数")
+    # 最近的慢回调（由新到旧）
+    slow_callbacks: List[SlowCallback] = Field(default_factory=list, description="最近的慢回调")
+    # 存活任务总数
+    tasks_total: int = Field(default=0, description="存活任务总数")
+    # 按协程名统计的存活任务数（由多到少）
+    tasks: Dict[str, int] = Field(default_factory=dict, description="按协程名统计的存活任务数")
+
+
+class LLMEndpointHealth(BaseModel):
+    """LLM 服务商端点探测结果"""
+
+    # 端点地址（api_base）
+    endpoint: str = Field(..., description="端点地址")
+    # 探测结论：None 表示尚未探测
+    healthy: Optional[bool] = Field(default=None, description="端点是否可用，None 表示尚未探测")
+    # 最近一次探测的 HTTP 状态码（连接失败时为空）
+    status_code: Optional[int] = Field(default=None, description="最近一次探测的 HTTP 状态码")
+    # 最近一次探测耗时（毫秒）
+    latency_ms: Optional[float] = Field(default=None, description="最近一次探测耗时（毫秒）")
+    # 连续失败次数
+    consecutive_failures: int = Field(default=0, description="连续失败次数")
+    # 最近一次探测返回 401/403：端点可达但全局 API Key 无效，不计入连续失败
+    auth_failed: bool = Field(default=False, description="最近一次探测是否认证失败（不计入连续失败）")
+    # 最近一次失败原因
+    last_error: Optional[str] = Field(default=None, description="最近一次失败原因")
+    # 最近一次探测时间
+    checked_at: Optional[datetime] = Field(default=None, description="最近一次探测时间")
+
+
+class SemanticCacheStats(BaseModel):
+    """LLM 语义缓存统计"""
+
+    # 命中次数
+    hits: int = Field(default=0, description="命中次数")
+    # 未命中次数
+    misses: int = Field(default=0, description="未命中次数")
+    # 命中率
+    hit_rate: float = Field(default=0.0, description="命中率（0-1）")
+    # 当前条目数
+    entries: int = Field(default=0, description="当前缓存条目数")
+
+
+class LLMRequestStats(BaseModel):
+    """LLM 请求准入统计模型"""
+
+    # 当前在途请求数
+    in_flight: int = Field(default=0, description="当前在途 LLM 请求数")
+    # 当前排队请求数
+    queued: int = Field(default=0, description="当前排队 LLM 请求数")
+    # 按优先级统计的排队耗时
+    queue_wait: Dict[str, LLMQueueWaitStats] = Field(default_factory=dict, description="按优先级统计的排队耗时")
+    # 按优先级统计的拒绝次数（负载削减）
+    rejected: Dict[str, int] = Field(default_factory=dict, description="按优先级统计的拒绝次数")
+    # 仍在执行的对话任务数（持续偏高说明存在卡住的任务）
+    pending_tasks: int = Field(default=0, description="执行中的对话任务数")
+    # 中途放弃的请求数：cancelled（客户端断开）/ timeout（超时）/ undelivered（回复无法送达）
+    aborted: Dict[str, int] = Field(default_factory=dict, description="按原因统计的中途放弃次数")
+    # 已消耗但未送达玩家的 token 估算
+    wasted_tokens: int = Field(default=0, description="浪费的 token 估算")
+    # 语义缓存命中情况（未启用时全部为 0）
+    semantic_cache: SemanticCacheStats = Field(default_factory=SemanticCacheStats, description="语义缓存统计")
+    # 最近一次重置时间
+    last_reset_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), description="最近一次统计重置时间")
+
+
 __all__ = [
     "MonitorEvent",
     "ConnectionStatus",
     "MessageStats",
     "TokenTrendPoint",
     "TokenTrendStats",
+    "LLMQueueWaitStats",
+    "SemanticCacheStats",
+    "SendResult",
+    "DrainStatus",
+    "TrafficCaptureStatus",
+    "LoopLagStats",
+    "SlowCallback",
+    "LoopDiagnosticsStatus",
+    "LLMEndpointHealth",
+    "LLMRequestStats",
 ]
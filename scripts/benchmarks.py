@@ -0,0 +1,358 @@
+"""热路径微基准。
+
+覆盖每条模组消息都会经过的函数：协议编解码、Token 统计、缓存键、事件总线、限流、
+Token 趋势、会话历史与 LLM 响应转换。负载取自真实场景的量级（大型游戏状态、长中文历史）。
+
+每项基准输出：
+- ``ns_per_op``：多轮计时中最快一轮的单次耗时（最稳定，用于回归比较）及中位数；
+- ``retained_bytes_per_op``：tracemalloc 统计的单次调用后仍被持有的内存；
+- ``peak_kb``：执行 ``alloc_iterations`` 次期间的分配峰值。
+
+    python scripts/benchmarks.py                                  # 运行全部并与基线比较
+    python scripts/benchmarks.py -k protocol cache                # 只运行名称包含关键字的基准
+    python scripts/benchmarks.py --save-baseline                  # 更新基线文件
+    python scripts/benchmarks.py --threshold 15 --output bench.json
+
+与基线比较时，任一基准的 ``ns_per_op`` 变慢超过 ``--threshold``（百分比）即以退出码 1 结束。
+基线与机器相关，更新基线应在同一台机器上进行。
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import json
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+
+
+@dataclass(slots=True)
+class Benchmark:
+    name: str
+    # 准备负载并返回待计时的无参函数（准备过程不计时）
+    setup: Callable[[], Callable[[], Any]]
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str) -> Callable[[Callable[[], Callable[[], Any]]], Callable[[], Callable[[], Any]]]:
+    def register(setup: Callable[[], Callable[[], Any]]) -> Callable[[], Callable[[], Any]]:
+        BENCHMARKS.append(Benchmark(name, setup))
+        return setup
+
+    return register
+
+
+# ============ 负载 ============
+
+CHINESE_SENTENCE = "天快黑了，我们先在村庄附近搭一个简易庇护所，再去矿洞里找一些铁矿和煤炭。"
+
+
+def big_game_state() -> Dict[str, Any]:
+    """满背包、周围有大量实体与方块信息的游戏状态（约 20KB）。"""
+    return {
+        "type": "game_state_update",
+        "id": "gs-1",
+        "playerName": "Steve",
+        "data": {
+            "position": {"x": 128.5, "y": 64.0, "z": -342.25},
+            "health": 17.5,
+            "hunger": 14,
+            "dimension": "minecraft:overworld",
+            "biome": "minecraft:plains",
+            "timeOfDay": 12800,
+            "weather": "rain",
+            "inventory": [
+                {
+                    "slot": slot,
+                    "item": f"minecraft:item_{slot}",
+                    "count": slot % 64 + 1,
+                    "enchantments": [{"id": "minecraft:unbreaking", "level": 3}] if slot % 5 == 0 else [],
+                }
+                for slot in range(36)
+            ],
+            "nearbyEntities": [
+                {
+                    "type": "minecraft:zombie" if i % 3 else "minecraft:villager",
+                    "uuid": f"00000000-0000-0000-0000-{i:012d}",
+                    "position": {"x": 128 + i, "y": 64, "z": -340 - i},
+                    "health": 20,
+                }
+                for i in range(50)
+            ],
+            "nearbyBlocks": [
+                {"block": "minecraft:oak_log", "position": {"x": x, "y": 64, "z": z}}
+                for x in range(10)
+                for z in range(10)
+            ],
+        },
+    }
+
+
+def conversation_request_compact() -> Dict[str, Any]:
+    return {"t": "cr", "i": "cr-1", "p": "Steve", "c": "AICompanion", "m": CHINESE_SENTENCE * 2, "hp": 17.5}
+
+
+def conversation_response() -> Dict[str, Any]:
+    return {
+        "id": "cr-1",
+        "type": "conversation_response",
+        "companionName": "AICompanion",
+        "message": CHINESE_SENTENCE * 6,
+        "action": [],
+    }
+
+
+def chinese_history(turns: int = 20) -> List[Dict[str, Any]]:
+    """长中文对话历史（``turns`` 轮，每条约 200 字）。"""
+    history: List[Dict[str, Any]] = [
+        {"role": "system", "content": "你是 Minecraft 世界中的 AI 伙伴，名字叫 AICompanion。"}
+    ]
+    for turn in range(turns):
+        history.append({"role": "user", "content": f"[Steve] 第 {turn} 轮：" + CHINESE_SENTENCE * 5})
+        history.append({"role": "assistant", "content": CHINESE_SENTENCE * 6})
+    return history
+
+
+def llm_response_payload() -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-123",
+        "object": "chat.completion",
+        "created": 1700000000,
+        "model": "gpt-4o-mini",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": CHINESE_SENTENCE * 6},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1800, "completion_tokens": 240, "total_tokens": 2040},
+    }
+
+
+# ============ 基准 ============
+
+@benchmark("protocol.parse.conversation_request")
+def _protocol_parse_conversation() -> Callable[[], Any]:
+    from api.protocol import CompactProtocol
+
+    message = conversation_request_compact()
+    return lambda: CompactProtocol.parse(message)
+
+
+@benchmark("protocol.parse.big_game_state")
+def _protocol_parse_game_state() -> Callable[[], Any]:
+    from api.protocol import CompactProtocol
+
+    message = big_game_state()
+    return lambda: CompactProtocol.parse(message)
+
+
+@benchmark("protocol.compact.conversation_response")
+def _protocol_compact_response() -> Callable[[], Any]:
+    from api.protocol import CompactProtocol
+
+    message = conversation_response()
+    return lambda: CompactProtocol.compact(message)
+
+
+@benchmark("token_tracker.compare")
+def _token_tracker_compare() -> Callable[[], Any]:
+    from api.protocol import CompactProtocol
+    from core.monitor.token_tracker import TokenTracker
+
+    standard = conversation_response()
+    compact = CompactProtocol.compact(standard)
+    return lambda: TokenTracker.compare(standard, compact)
+
+
+@benchmark("cache.generate_cache_key.chinese_history")
+def _generate_cache_key() -> Callable[[], Any]:
+    from core.llm.cache import generate_cache_key
+
+    messages = chinese_history()
+    return lambda: generate_cache_key(messages, "gpt-4o-mini", 0.7, max_tokens=512)
+
+
+@benchmark("event_bus.publish")
+def _event_bus_publish() -> Callable[[], Any]:
+    from core.monitor.event_bus import EventBus
+    from core.monitor.event_types import MonitorEventType
+
+    bus = EventBus(history_size=100)
+    received: List[Dict[str, Any]] = []
+    # 与监控广播订阅相当：回调只做一次轻量操作
+    bus.subscribe(MonitorEventType.MESSAGE_RECEIVED, received.append)
+    bus.subscribe(MonitorEventType.MESSAGE_RECEIVED, lambda event: received.clear())
+    data = {"client_id": "mod-1", "message_type": "game_state_update", "timestamp": "2025-01-01T00:00:00+00:00", "preview": "x" * 100}
+    return lambda: bus.publish(MonitorEventType.MESSAGE_RECEIVED, data)
+
+
+@benchmark("rate_limiter.check_rate_limit")
+def _rate_limiter_check() -> Callable[[], Any]:
+    from api.rate_limiter import WebSocketRateLimiter
+
+    limiter = WebSocketRateLimiter(max_messages=10**9, window_seconds=60, costs={"conversation_request": 5.0})
+    # 1000 个连接轮流发送
+    clients = itertools.cycle([f"mod-{i}" for i in range(1000)])
+    return lambda: limiter.check_rate_limit(next(clients), "game_state_update")
+
+
+@benchmark("token_usage.record")
+def _token_usage_record() -> Callable[[], Any]:
+    from core.monitor.token_usage import TokenUsageTracker
+
+    tracker = TokenUsageTracker()
+    return lambda: tracker.record(120)
+
+
+@benchmark("conversation_context.add_message")
+def _conversation_add_message() -> Callable[[], Any]:
+    from core.memory.conversation_context import ConversationContext
+
+    context = ConversationContext()
+    context.create_session("mod-1", "Steve")
+    content = f"[Steve] {CHINESE_SENTENCE * 5}"
+    return lambda: context.add_message("mod-1", "user", content)
+
+
+@benchmark("conversation_context.get_history.chinese_history")
+def _conversation_get_history() -> Callable[[], Any]:
+    from core.memory.conversation_context import ConversationContext
+
+    context = ConversationContext()
+    context.create_session("mod-1", "Steve")
+    for message in chinese_history()[1:]:
+        context.add_message("mod-1", message["role"], message["content"])
+    return lambda: context.get_history("mod-1")
+
+
+@benchmark("llm.response_to_dict.model_response")
+def _response_to_dict() -> Callable[[], Any]:
+    from core.llm.service import LLMService, load_litellm
+
+    response = load_litellm().ModelResponse(**llm_response_payload())
+    return lambda: LLMService._response_to_dict(response)
+
+
+# ============ 运行 ============
+
+def measure(bench: Benchmark, min_time: float = 0.2, repeat: int = 5, alloc_iterations: int = 1000) -> Dict[str, Any]:
+    """计时并统计内存分配。"""
+    op = bench.setup()
+    timer = timeit.Timer(op)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(number, int(number * min_time / max(elapsed, 1e-9)))
+    gc.collect()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+
+    # 内存单独统计：tracemalloc 会显著拖慢执行，不与计时混在一起
+    op = bench.setup()
+    op()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(alloc_iterations):
+            op()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ns_per_op": round(min(times) * 1e9, 1),
+        "median_ns_per_op": round(statistics.median(times) * 1e9, 1),
+        "iterations": number * repeat,
+        "retained_bytes_per_op": round((current - before) / alloc_iterations, 1),
+        "peak_kb": round((peak - before) / 1024, 1),
+    }
+
+
+def run(
+    keywords: Optional[List[str]] = None,
+    min_time: float = 0.2,
+    repeat: int = 5,
+    alloc_iterations: int = 1000,
+) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for bench in BENCHMARKS:
+        if keywords and not any(k in bench.name for k in keywords):
+            continue
+        results[bench.name] = measure(bench, min_time, repeat, alloc_iterations)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """``ns_per_op`` 相对基线的变化百分比；变慢超过 ``threshold`` 的基准记为回退。"""
+    deltas: Dict[str, float] = {}
+    regressions: List[str] = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("ns_per_op"):
+            continue
+        change = (result["ns_per_op"] - base["ns_per_op"]) / base["ns_per_op"] * 100
+        deltas[name] = round(change, 1)
+        if change > threshold:
+            regressions.append(name)
+    return {"threshold_percent": threshold, "delta_percent": deltas, "regressions": regressions}
+
+
+def _environment() -> Dict[str, str]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="热路径微基准")
+    parser.add_argument("-k", dest="keywords", nargs="*", help="只运行名称包含任一关键字的基准")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每轮计时的最短时长（秒）")
+    parser.add_argument("--repeat", type=int, default=5, help="计时轮数")
+    parser.add_argument("--alloc-iterations", type=int, default=1000, help="统计内存分配时的调用次数")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="基线文件")
+    parser.add_argument("--threshold", type=float, default=20.0, help="ns_per_op 允许变慢的百分比")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--list", action="store_true", help="只列出基准名称")
+    parser.add_argument("--output", type=Path, help="报告另存为 JSON 文件")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(bench.name for bench in BENCHMARKS))
+        return 0
+
+    results = run(args.keywords, args.min_time, args.repeat, args.alloc_iterations)
+    report: Dict[str, Any] = {"environment": _environment(), "results": results}
+    status = 0
+    if args.save_baseline:
+        # 只更新本次运行的基准，保留其余条目
+        existing = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+        merged = {"environment": report["environment"], "results": {**existing.get("results", {}), **results}}
+        args.baseline.write_text(json.dumps(merged, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        report["comparison"] = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        status = 1 if report["comparison"]["regressions"] else 0
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""本地 OpenAI 兼容 LLM 桩服务，用于压测与离线联调。
+
+与 ``api/routes/llm_mock.py`` 一样返回固定内容，但对外是 OpenAI 协议（``/v1/models``、
+``/v1/chat/completions``），后端把它当作 ``custom`` 服务商即可接入，无需改动调用链路。
+响应耗时 = 首 token 延迟 + 回复 token 数 / 生成速率，用来模拟真实服务商的排队与生成时间。
+
+    python scripts/llm_stub.py --port 9000 --latency 0.5 --tokens-per-second 40
+    # 后端：LLM_PROVIDER=custom LLM_BASE_URL=http://127.0.0.1:9000 LLM_API_KEY=sk-stub
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+
+STUB_MODEL = "stub-model"
+
+
+@dataclass(slots=True)
+class StubOptions:
+    # 首 token 延迟（秒）
+    latency: float = 0.5
+    # 生成速率（tokens/秒），0 表示瞬间生成
+    tokens_per_second: float = 40.0
+    # 每条回复的 token 数
+    reply_tokens: int = 40
+
+
+def _count_tokens(messages: List[Dict[str, Any]]) -> int:
+    # 粗略估算即可：桩服务只需给出量级合理的 usage
+    return sum(len(str(m.get("content", ""))) for m in messages) // 2 + 1
+
+
+def create_stub_app(options: StubOptions) -> FastAPI:
+    """创建桩服务应用；``app.state.durations`` 记录每次生成的服务端耗时（秒）。"""
+    app = FastAPI(title="LLM Stub")
+    app.state.options = options
+    app.state.durations = []
+    reply = "好的，" + "收到" * max(0, options.reply_tokens - 1)
+
+    @app.get("/v1/models")
+    async def list_models() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": STUB_MODEL, "object": "model", "owned_by": "stub"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Dict[str, Any]:
+        started = time.perf_counter()
+        body = await request.json()
+        delay = options.latency
+        if options.tokens_per_second > 0:
+            delay += options.reply_tokens / options.tokens_per_second
+        await asyncio.sleep(delay)
+        prompt_tokens = _count_tokens(body.get("messages", []))
+        app.state.durations.append(time.perf_counter() - started)
+        return {
+            "id": f"chatcmpl-{uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", STUB_MODEL),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": options.reply_tokens,
+                "total_tokens": prompt_tokens + options.reply_tokens,
+            },
+        }
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容 LLM 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="首 token 延迟（秒）")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="生成速率，0 表示瞬间生成")
+    parser.add_argument("--reply-tokens", type=int, default=40, help="每条回复的 token 数")
+    args = parser.parse_args()
+
+    options = StubOptions(args.latency, args.tokens_per_second, args.reply_tokens)
+    uvicorn.run(create_stub_app(options), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,516 @@
+"""WebSocket 端到端压测。
+
+在本进程内启动后端（完整 lifespan）与本地 OpenAI 兼容桩服务（``scripts/llm_stub.py``），
+用 N 个模拟模组按真实比例发送 ``game_state_update`` 与 ``conversation_request``，
+输出 JSON 报告：吞吐、各阶段 p50/p90/p99 延迟、内存增长与后端事件循环延迟。
+报告可写入文件，与历史结果比较以发现性能回退。
+
+    python scripts/load_test.py --mods 50 --duration 60
+    python scripts/load_test.py --mods 200 --llm-latency 1.0 --set llm_max_in_flight=32 --output load.json
+
+各阶段：
+- connect：建立连接到收到 connection_ack
+- game_state_update：发送到收到 game_state_ack
+- conversation_request：发送到收到 conversation_response（含排队、LLM 调用与回复）
+- llm_upstream：桩服务处理单次补全的耗时（服务端视角）
+
+注意：后端、桩服务与模拟模组共用一个进程，内存增长与事件循环延迟包含压测端自身的开销，
+应在同一台机器上与同参数的历史结果比较。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.llm_stub import STUB_MODEL, StubOptions, create_stub_app  # noqa: E402
+
+PLAYER_MESSAGES = (
+    "附近有村庄吗？",
+    "天快黑了，我该做什么？",
+    "钻石一般在第几层？",
+    "帮我看看背包里还缺什么",
+    "怎么做附魔台？",
+    "刚才那只苦力怕去哪了？",
+)
+
+
+@dataclass(slots=True)
+class LoadTestOptions:
+    # 模拟模组数量
+    mods: int = 20
+    # 发送流量的时长（秒），不含连接与收尾
+    duration: float = 30.0
+    # 所有模组在此时长内均匀建立连接（秒）
+    ramp_up: float = 2.0
+    # 每个模组发送 game_state_update 的间隔（秒）
+    state_interval: float = 2.0
+    # 每个模组发起对话的平均间隔（秒，按指数分布随机）
+    chat_interval: float = 15.0
+    # 流量结束后等待未完成对话的最长时间（秒）
+    drain_timeout: float = 30.0
+    # 桩服务：首 token 延迟、生成速率与回复长度
+    llm_latency: float = 0.5
+    llm_tokens_per_second: float = 40.0
+    llm_reply_tokens: int = 40
+    # 等待后端启动预热完成的最长时间（秒）
+    ready_timeout: float = 60.0
+    # 事件循环延迟的采样间隔（秒）
+    lag_interval: float = 0.05
+    # 压测期间覆盖的后端配置项（config.settings 字段名 → 值）
+    settings: Dict[str, Any] = field(default_factory=dict)
+    seed: Optional[int] = None
+
+
+# ============ 统计 ============
+
+def percentile(values: List[float], p: float) -> float:
+    """最近秩百分位数，``values`` 为空时返回 0。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(p / 100 * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        # 阶段 → 延迟（毫秒）
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.sent: Dict[str, int] = defaultdict(int)
+        self.received: Dict[str, int] = defaultdict(int)
+        # 被后端拒绝的请求（按请求类型）与其他错误
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] += 1
+
+
+def _rss_bytes() -> int:
+    """当前进程常驻内存，无法读取时返回 0。"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # 非 Linux 只能取峰值；macOS 单位为字节，其余为 KB
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return 0
+
+
+# ============ 进程内服务 ============
+
+class _ServerThread(threading.Thread):
+    """在独立线程（独立事件循环）中运行 uvicorn，监听随机端口。"""
+
+    def __init__(self, app: Any, name: str, lifespan: str = "on") -> None:
+        import uvicorn
+
+        super().__init__(name=name, daemon=True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port: int = self.sock.getsockname()[1]
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, lifespan=lifespan, log_config=None, access_log=False, log_level="warning")
+        )
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def run(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        await self.server.serve(sockets=[self.sock])
+
+    def start_and_wait(self, timeout: float = 60.0) -> None:
+        self.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"{self.name} 启动失败")
+            time.sleep(0.05)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self.server.should_exit = True
+        self.join(timeout)
+
+
+async def _wait_ready(app: Any, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while app.state.prewarm.warming:
+        if time.monotonic() > deadline:
+            raise RuntimeError("等待后端预热超时")
+        await asyncio.sleep(0.05)
+
+
+async def _sample_loop_lag(samples: List[float], interval: float) -> None:
+    """在被测事件循环中运行：实际醒来时间比预期晚多少即为循环延迟（毫秒）。"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - started - interval) * 1000)
+
+
+@contextmanager
+def _patched_environment(overrides: Dict[str, Any], env: Dict[str, str]) -> Iterator[None]:
+    """临时覆盖后端配置项与环境变量，结束后恢复（便于在测试进程中重复运行）。"""
+    from config.settings import settings
+
+    saved_settings = {name: getattr(settings, name) for name in overrides}
+    saved_env = {name: os.environ.get(name) for name in env}
+    try:
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        os.environ.update(env)
+        yield
+    finally:
+        for name, value in saved_settings.items():
+            setattr(settings, name, value)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+# ============ 模拟模组 ============
+
+class _Mod:
+    def __init__(self, index: int, url: str, options: LoadTestOptions, recorder: _Recorder, rng: random.Random) -> None:
+        self.index = index
+        self.url = url
+        self.options = options
+        self.recorder = recorder
+        self.rng = rng
+        self.player = f"Player{index:04d}"
+        # 请求 id → (类型, 发送时间)
+        self.pending: Dict[str, tuple[str, float]] = {}
+        self._seq = 0
+        self._drained = asyncio.Event()
+
+    def _next_id(self, prefix: str) -> str:
+        self._seq += 1
+        return f"{prefix}-{self.index}-{self._seq}"
+
+    async def _send(self, ws: Any, kind: str, payload: Dict[str, Any]) -> None:
+        self.pending[payload["id"]] = (kind, time.perf_counter())
+        self.recorder.sent[kind] += 1
+        await ws.send(json.dumps(payload, ensure_ascii=False))
+
+    def _game_state(self) -> Dict[str, Any]:
+        rng = self.rng
+        return {
+            "id": self._next_id("gs"),
+            "type": "game_state_update",
+            "playerName": self.player,
+            "data": {
+                "position": {"x": rng.randint(-500, 500), "y": rng.randint(50, 90), "z": rng.randint(-500, 500)},
+                "health": rng.randint(1, 20),
+                "hunger": rng.randint(0, 20),
+                "dimension": "overworld",
+                "timeOfDay": rng.randint(0, 24000),
+                "inventory": [{"item": "minecraft:oak_log", "count": rng.randint(1, 64)} for _ in range(8)],
+                "nearbyEntities": [{"type": "minecraft:zombie", "distance": rng.uniform(2, 30)} for _ in range(3)],
+            },
+        }
+
+    def _conversation(self) -> Dict[str, Any]:
+        return {
+            "id": self._next_id("cr"),
+            "type": "conversation_request",
+            "playerName": self.player,
+            "companionName": "AICompanion",
+            "message": f"{self.rng.choice(PLAYER_MESSAGES)}（#{self._seq}）",
+        }
+
+    async def run(self, start_delay: float, traffic_until: float, connected: asyncio.Event) -> None:
+        from websockets.asyncio.client import connect
+
+        await asyncio.sleep(start_delay)
+        started = time.perf_counter()
+        try:
+            ws = await connect(self.url, max_size=None, ping_interval=None)
+        except Exception as exc:  # noqa: BLE001
+            self.recorder.error(f"connect:{type(exc).__name__}")
+            return
+        try:
+            await ws.send(json.dumps({"type": "connection_init", "id": self._next_id("ci")}))
+            ack = json.loads(await ws.recv())
+            if ack.get("type") != "connection_ack":
+                self.recorder.error("connect:unexpected_reply")
+                return
+            self.recorder.latency["connect"].append((time.perf_counter() - started) * 1000)
+            connected.set()
+
+            receiver = asyncio.create_task(self._receive(ws))
+            try:
+                await self._send_traffic(ws, traffic_until)
+                # 等待未完成的请求，超时的计为 timeout
+                try:
+                    await asyncio.wait_for(self._wait_drained(), self.options.drain_timeout)
+                except TimeoutError:
+                    for kind, _ in self.pending.values():
+                        self.recorder.error(f"timeout:{kind}")
+            finally:
+                receiver.cancel()
+        except Exception as exc:  # noqa: BLE001
+            self.recorder.error(f"connection:{type(exc).__name__}")
+        finally:
+            await ws.close()
+
+    async def _send_traffic(self, ws: Any, traffic_until: float) -> None:
+        now = time.monotonic()
+        # 错开各模组的首次发送，避免所有模组同一时刻发送
+        next_state = now + self.rng.uniform(0, self.options.state_interval)
+        next_chat = now + self.rng.expovariate(1 / self.options.chat_interval)
+        while True:
+            wake = min(next_state, next_chat)
+            if wake >= traffic_until:
+                return
+            await asyncio.sleep(max(0.0, wake - time.monotonic()))
+            if next_state <= next_chat:
+                await self._send(ws, "game_state_update", self._game_state())
+                next_state += self.options.state_interval
+            else:
+                await self._send(ws, "conversation_request", self._conversation())
+                next_chat += self.rng.expovariate(1 / self.options.chat_interval)
+
+    async def _wait_drained(self) -> None:
+        while self.pending:
+            self._drained.clear()
+            await self._drained.wait()
+
+    def _resolve(self, message_id: str) -> Optional[tuple[str, float]]:
+        entry = self.pending.pop(message_id, None)
+        if not self.pending:
+            self._drained.set()
+        return entry
+
+    async def _receive(self, ws: Any) -> None:
+        async for raw in ws:
+            message = json.loads(raw)
+            message_type = message.get("type", "unknown")
+            self.recorder.received[message_type] += 1
+            entry = self._resolve(message.get("id") or "")
+            if message_type == "error":
+                if entry is not None:
+                    self.recorder.rejected[entry[0]] += 1
+                else:
+                    self.recorder.error("server_error")
+                continue
+            if entry is None:
+                continue
+            kind, sent_at = entry
+            self.recorder.latency[kind].append((time.perf_counter() - sent_at) * 1000)
+            if message_type == "conversation_response":
+                await ws.send(json.dumps({"type": "conversation_ack", "id": message["id"]}))
+
+
+# ============ 运行 ============
+
+@dataclass(slots=True)
+class InProcessBackend:
+    """进程内启动的后端与桩服务。"""
+
+    ws_url: str
+    app: Any
+    stub_app: Any
+    # 后端事件循环延迟采样（毫秒）
+    lag_samples: List[float]
+
+    def upstream_ms(self) -> List[float]:
+        """桩服务每次补全的耗时（毫秒）。"""
+        return [d * 1000 for d in self.stub_app.state.durations]
+
+
+@asynccontextmanager
+async def inprocess_backend(
+    stub_options: StubOptions,
+    settings_overrides: Optional[Dict[str, Any]] = None,
+    ready_timeout: float = 60.0,
+    lag_interval: float = 0.05,
+) -> AsyncIterator[InProcessBackend]:
+    """启动桩服务与后端（各自独立线程与事件循环），预热完成后交给调用方，退出时关闭。"""
+    stub_app = create_stub_app(stub_options)
+    stub = _ServerThread(stub_app, "llm-stub", lifespan="off")
+    stub.start_and_wait()
+    env = {
+        "LLM_PROVIDER": "custom",
+        "LLM_MODEL": STUB_MODEL,
+        "LLM_BASE_URL": f"http://127.0.0.1:{stub.port}",
+        "LLM_API_KEY": "sk-load-test",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+    try:
+        with _patched_environment(settings_overrides or {}, env):
+            from main import app
+
+            backend = _ServerThread(app, "backend")
+            backend.start_and_wait()
+            lag_future = None
+            try:
+                # 等待启动预热（导入 LiteLLM、建立到桩服务的连接）完成，避免冷启动开销计入结果
+                await _wait_ready(app, ready_timeout)
+                lag_samples: List[float] = []
+                assert backend.loop is not None
+                lag_future = asyncio.run_coroutine_threadsafe(
+                    _sample_loop_lag(lag_samples, lag_interval), backend.loop
+                )
+                yield InProcessBackend(f"ws://127.0.0.1:{backend.port}/ws", app, stub_app, lag_samples)
+            finally:
+                if lag_future is not None:
+                    lag_future.cancel()
+                backend.stop()
+    finally:
+        stub.stop()
+
+
+async def run_load_test(options: LoadTestOptions) -> Dict[str, Any]:
+    """运行一次压测并返回报告。"""
+    rng = random.Random(options.seed)
+    stub_options = StubOptions(options.llm_latency, options.llm_tokens_per_second, options.llm_reply_tokens)
+    async with inprocess_backend(
+        stub_options, options.settings, options.ready_timeout, options.lag_interval
+    ) as backend:
+        report = await _drive(options, backend.ws_url, rng, backend.lag_samples)
+        report["latency_ms"]["llm_upstream"] = summarize(backend.upstream_ms())
+    return report
+
+
+async def _drive(
+    options: LoadTestOptions, url: str, rng: random.Random, lag_samples: List[float]
+) -> Dict[str, Any]:
+    recorder = _Recorder()
+    mods = [_Mod(i, url, options, recorder, random.Random(rng.random())) for i in range(options.mods)]
+    connected = [asyncio.Event() for _ in mods]
+    step = options.ramp_up / options.mods if options.mods else 0.0
+    traffic_start = time.monotonic() + options.ramp_up
+    traffic_until = traffic_start + options.duration
+    tasks = [
+        asyncio.create_task(mod.run(i * step, traffic_until, connected[i])) for i, mod in enumerate(mods)
+    ]
+
+    await asyncio.sleep(max(0.0, traffic_start - time.monotonic()))
+    gc.collect()
+    rss_start = _rss_bytes()
+    lag_start = len(lag_samples)
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    rss_end = _rss_bytes()
+
+    completed = {kind: len(values) for kind, values in recorder.latency.items() if kind != "connect"}
+    return {
+        "options": asdict(options),
+        "elapsed_s": round(elapsed, 3),
+        "connected_mods": sum(event.is_set() for event in connected),
+        "throughput": {
+            "messages_sent_per_s": round(sum(recorder.sent.values()) / elapsed, 2) if elapsed else 0.0,
+            "completed_per_s": {kind: round(count / elapsed, 2) for kind, count in completed.items()} if elapsed else {},
+        },
+        "messages": {
+            "sent": dict(recorder.sent),
+            "received": dict(recorder.received),
+            "rejected": dict(recorder.rejected),
+            "errors": dict(recorder.errors),
+        },
+        "latency_ms": {stage: summarize(values) for stage, values in recorder.latency.items()},
+        "memory": {
+            "rss_start_mb": round(rss_start / 2**20, 2),
+            "rss_end_mb": round(rss_end / 2**20, 2),
+            "rss_growth_mb": round((rss_end - rss_start) / 2**20, 2),
+        },
+        "event_loop_lag_ms": summarize(lag_samples[lag_start:]),
+    }
+
+
+def parse_setting(item: str) -> tuple[str, Any]:
+    name, sep, raw = item.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"--set 需要 name=value 格式: {item}")
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = raw
+    return name.strip(), value
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = LoadTestOptions()
+    parser = argparse.ArgumentParser(description="WebSocket 端到端压测（进程内后端 + 本地 LLM 桩服务）")
+    parser.add_argument("--mods", type=int, default=defaults.mods, help="模拟模组数量")
+    parser.add_argument("--duration", type=float, default=defaults.duration, help="发送流量的时长（秒）")
+    parser.add_argument("--ramp-up", type=float, default=defaults.ramp_up, help="建立全部连接的时长（秒）")
+    parser.add_argument("--state-interval", type=float, default=defaults.state_interval, help="game_state_update 间隔（秒）")
+    parser.add_argument("--chat-interval", type=float, default=defaults.chat_interval, help="对话平均间隔（秒）")
+    parser.add_argument("--drain-timeout", type=float, default=defaults.drain_timeout, help="等待未完成对话的时长（秒）")
+    parser.add_argument("--llm-latency", type=float, default=defaults.llm_latency, help="桩服务首 token 延迟（秒）")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=defaults.llm_tokens_per_second, help="桩服务生成速率")
+    parser.add_argument("--llm-reply-tokens", type=int, default=defaults.llm_reply_tokens, help="桩服务回复 token 数")
+    parser.add_argument("--set", dest="settings", type=parse_setting, action="append", default=[],
+                        metavar="NAME=VALUE", help="覆盖后端配置项，如 llm_max_in_flight=32（可重复）")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，便于复现流量")
+    parser.add_argument("--output", type=Path, help="报告另存为 JSON 文件")
+    args = parser.parse_args(argv)
+
+    options = LoadTestOptions(
+        mods=args.mods,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        state_interval=args.state_interval,
+        chat_interval=args.chat_interval,
+        drain_timeout=args.drain_timeout,
+        llm_latency=args.llm_latency,
+        llm_tokens_per_second=args.llm_tokens_per_second,
+        llm_reply_tokens=args.llm_reply_tokens,
+        settings=dict(args.settings),
+        seed=args.seed,
+    )
+    report = asyncio.run(run_load_test(options))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""冷启动导入耗时分析。
+
+在独立进程中用 ``python -X importtime`` 导入 ``main``，汇总总耗时、``main`` 直接依赖的累计耗时
+以及自身耗时最高的模块，用于定位拖慢启动的导入。
+
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --runs 5 --top 20 --output docs/startup-profile.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 导入 main 时不应出现的重量级/可选依赖，均应按需导入
+LAZY_MODULES = ("litellm", "redis", "numpy")
+
+
+@dataclass(slots=True)
+class ImportRecord:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportRecord]:
+    """解析 ``-X importtime`` 输出（``import time: self | cumulative | name``）。"""
+    records: List[ImportRecord] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_part, cumulative_part, name_part = line[len("import time:") :].split("|", 2)
+        stripped = name_part.lstrip(" ")
+        depth = (len(name_part) - len(stripped) - 1) // 2
+        records.append(ImportRecord(stripped.strip(), int(self_part), int(cumulative_part), depth))
+    return records
+
+
+def profile_once(module: str = "main") -> tuple[List[ImportRecord], List[str]]:
+    """导入一次 ``module``，返回导入记录与被提前导入的重量级模块。"""
+    code = f"import sys, {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    env = {**os.environ, "LLM_API_KEY": ""}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    eager = [name for name in result.stdout.strip().split(",") if name]
+    return parse_importtime(result.stderr), eager
+
+
+def _top_level(records: List[ImportRecord], module: str) -> List[ImportRecord]:
+    """``module`` 的直接依赖：importtime 先输出子模块，向前找到上一个同级条目为止。"""
+    index = max(i for i, r in enumerate(records) if r.name == module)
+    depth = records[index].depth
+    children: List[ImportRecord] = []
+    for record in reversed(records[:index]):
+        if record.depth <= depth:
+            break
+        if record.depth == depth + 1:
+            children.append(record)
+    return children
+
+
+def render_report(records: List[ImportRecord], eager: List[str], module: str, top: int) -> str:
+    root = next(r for r in reversed(records) if r.name == module)
+    lines = [
+        f"# `{module}` 冷启动导入耗时",
+        "",
+        f"- Python: {sys.version.split()[0]}",
+        f"- 总导入耗时: {root.cumulative_us / 1000:.1f} ms",
+        f"- 提前导入的重量级模块: {', '.join(eager) if eager else '无'}",
+        "",
+        f"## `{module}` 直接依赖（按累计耗时）",
+        "",
+        "| 模块 | 累计 (ms) |",
+        "| --- | ---: |",
+    ]
+    direct = sorted(_top_level(records, module), key=lambda r: r.cumulative_us, reverse=True)[:top]
+    lines += [f"| `{r.name}` | {r.cumulative_us / 1000:.1f} |" for r in direct]
+    lines += ["", "## 自身耗时最高的模块", "", "| 模块 | 自身 (ms) |", "| --- | ---: |"]
+    heaviest = sorted(records, key=lambda r: r.self_us, reverse=True)[:top]
+    lines += [f"| `{r.name}` | {r.self_us / 1000:.1f} |" for r in heaviest]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="分析导入 main 的冷启动耗时")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数，取总耗时最短的一次")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", type=Path, help="写入 Markdown 报告的路径")
+    args = parser.parse_args()
+
+    runs = [profile_once(args.module) for _ in range(max(1, args.runs))]
+
+    def total(run: tuple[List[ImportRecord], List[str]]) -> int:
+        return next(r for r in reversed(run[0]) if r.name == args.module).cumulative_us
+
+    records, eager = min(runs, key=total)
+    report = render_report(records, eager, args.module, args.top)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(report, encoding="utf-8")
+    print(report)
+    return 1 if eager else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
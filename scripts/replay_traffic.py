@@ -0,0 +1,299 @@
+"""回放录制的模组流量，比较不同版本的响应延迟。
+
+录制文件由 ``/api/ws/capture`` 生成（见 ``api/traffic_capture.py``）。每个录制的连接按原始
+时间偏移重新建立，帧按原样发送；回放速度可选原速（``--speed 1``）、N 倍速（``--speed N``）
+或最快（``--speed 0``，不等待间隔）。目标可以是运行中的实例（``--url``），也可以是进程内
+启动的后端（默认，LLM 由本地桩服务代替，与 ``scripts/load_test.py`` 相同）。
+
+    python scripts/replay_traffic.py captures/traffic-20250101-120000-1234.jsonl.gz --speed 4 --output new.json
+    python scripts/replay_traffic.py capture.jsonl.gz --speed 4 --baseline old.json --threshold 20
+
+响应按请求 ``id`` 对应（``game_state_ack``、``conversation_response`` 与限流错误都会回显 id）；
+不带 id 的请求按期望的回复类型先进先出对应。指定 ``--baseline`` 时输出各消息类型 p50/p90/p99
+的变化百分比，任一 p50 或 p99 变慢超过 ``--threshold`` 时以退出码 1 结束，便于在 CI 中使用。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.protocol import CompactProtocol  # noqa: E402
+from api.traffic_capture import CAPTURE_FORMAT  # noqa: E402
+from scripts.llm_stub import StubOptions  # noqa: E402
+from scripts.load_test import inprocess_backend, parse_setting, summarize  # noqa: E402
+
+# 不带 id 的请求 → 期望的回复类型
+REPLY_TYPES = {
+    "connection_init": "connection_ack",
+    "game_state_update": "game_state_ack",
+    "conversation_request": "conversation_response",
+}
+
+# 一个连接的事件：(相对秒数, 事件类型, 帧文本)
+Event = Tuple[float, str, Optional[str]]
+
+
+@dataclass(slots=True)
+class Capture:
+    header: Dict[str, Any]
+    # 连接序号 → 按时间排序的事件
+    connections: Dict[int, List[Event]]
+
+    @property
+    def frames(self) -> int:
+        return sum(1 for events in self.connections.values() for _, kind, _ in events if kind == "in")
+
+    @property
+    def duration(self) -> float:
+        return max((events[-1][0] for events in self.connections.values() if events), default=0.0)
+
+
+def load_capture(path: Path) -> Capture:
+    """读取录制文件；录制开始前已建立的连接没有 open 事件，以第一帧为起点。"""
+    connections: Dict[int, List[Event]] = defaultdict(list)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != CAPTURE_FORMAT:
+            raise ValueError(f"不是流量录制文件: {path}")
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                connections[event["c"]].append((event["t"], event["k"], event.get("d")))
+    for events in connections.values():
+        events.sort(key=lambda e: e[0])
+    return Capture(header, dict(connections))
+
+
+def _request_key(data: str) -> Tuple[str, str]:
+    """帧的 (标准消息类型, id)；无法解析时类型为 invalid。"""
+    try:
+        raw = json.loads(data)
+    except json.JSONDecodeError:
+        return "invalid", ""
+    if not isinstance(raw, dict):
+        return "invalid", ""
+    message = CompactProtocol.parse(raw)
+    return str(message.get("type") or "unknown"), str(message.get("id") or "")
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        # 请求类型 → 延迟（毫秒）
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.sent: Dict[str, int] = defaultdict(int)
+        self.received: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self.unanswered: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+
+class _Connection:
+    """回放一个录制的连接。"""
+
+    def __init__(self, events: List[Event], recorder: _Recorder) -> None:
+        self.events = events
+        self.recorder = recorder
+        # id → (请求类型, 发送时间)
+        self.pending: Dict[str, Tuple[str, float]] = {}
+        # 期望的回复类型 → 不带 id 的请求发送时间（先进先出）
+        self.fifo: Dict[str, Deque[Tuple[str, float]]] = defaultdict(deque)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def _outstanding(self) -> int:
+        return len(self.pending) + sum(len(q) for q in self.fifo.values())
+
+    def _resolve(self, reply: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+        reply_type = reply.get("type", "")
+        entry = self.pending.pop(reply.get("id") or "", None)
+        if entry is None and self.fifo.get(reply_type):
+            entry = self.fifo[reply_type].popleft()
+        if not self._outstanding():
+            self._idle.set()
+        return entry
+
+    async def run(self, started: float, speed: float, drain_timeout: float, url: str) -> None:
+        from websockets.asyncio.client import connect
+
+        await _sleep_until(started, self.events[0][0], speed)
+        try:
+            ws = await connect(url, max_size=None, ping_interval=None)
+        except Exception as exc:  # noqa: BLE001
+            self.recorder.errors[f"connect:{type(exc).__name__}"] += 1
+            return
+        receiver = asyncio.create_task(self._receive(ws))
+        try:
+            for offset, kind, data in self.events:
+                if kind != "in" or data is None:
+                    continue
+                await _sleep_until(started, offset, speed)
+                request_type, request_id = _request_key(data)
+                now = time.perf_counter()
+                if request_id:
+                    self.pending[request_id] = (request_type, now)
+                elif request_type in REPLY_TYPES:
+                    self.fifo[REPLY_TYPES[request_type]].append((request_type, now))
+                if self._outstanding():
+                    self._idle.clear()
+                self.recorder.sent[request_type] += 1
+                await ws.send(data)
+            # 等待回复后再断开，避免断开取消仍在处理的对话
+            try:
+                await asyncio.wait_for(self._idle.wait(), drain_timeout)
+            except TimeoutError:
+                pass
+            for request_type, _ in [*self.pending.values(), *(e for q in self.fifo.values() for e in q)]:
+                self.recorder.unanswered[request_type] += 1
+        except Exception as exc:  # noqa: BLE001
+            self.recorder.errors[f"connection:{type(exc).__name__}"] += 1
+        finally:
+            receiver.cancel()
+            await ws.close()
+
+    async def _receive(self, ws: Any) -> None:
+        async for raw in ws:
+            reply = json.loads(raw)
+            reply_type = reply.get("type", "unknown")
+            self.recorder.received[reply_type] += 1
+            entry = self._resolve(reply)
+            if entry is None:
+                continue
+            request_type, sent_at = entry
+            if reply_type == "error":
+                self.recorder.rejected[request_type] += 1
+            else:
+                self.recorder.latency[request_type].append((time.perf_counter() - sent_at) * 1000)
+
+
+async def _sleep_until(started: float, offset: float, speed: float) -> None:
+    if speed > 0:
+        delay = started + offset / speed - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def replay(capture: Capture, url: str, speed: float = 1.0, drain_timeout: float = 30.0) -> Dict[str, Any]:
+    """按 ``speed`` 倍速回放到 ``url``，返回统计结果。"""
+    recorder = _Recorder()
+    # 以最早的事件为零点
+    origin = min((events[0][0] for events in capture.connections.values() if events), default=0.0)
+    connections = [
+        _Connection([(t - origin, k, d) for t, k, d in events], recorder)
+        for events in capture.connections.values()
+        if any(kind == "in" for _, kind, _ in events)
+    ]
+    started = time.monotonic()
+    await asyncio.gather(*(c.run(started, speed, drain_timeout, url) for c in connections))
+    elapsed = time.monotonic() - started
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "connections": len(connections),
+        "messages": {
+            "sent": dict(recorder.sent),
+            "received": dict(recorder.received),
+            "rejected": dict(recorder.rejected),
+            "unanswered": dict(recorder.unanswered),
+            "errors": dict(recorder.errors),
+        },
+        "latency_ms": {kind: summarize(values) for kind, values in recorder.latency.items()},
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """各消息类型 p50/p90/p99 相对基线的变化百分比；p50 或 p99 变慢超过 ``threshold`` 记为回退。"""
+    deltas: Dict[str, Dict[str, Optional[float]]] = {}
+    regressions: List[str] = []
+    for kind, current in report["latency_ms"].items():
+        base = baseline.get("latency_ms", {}).get(kind)
+        if not base:
+            continue
+        deltas[kind] = {}
+        for stat in ("p50", "p90", "p99"):
+            if not base[stat]:
+                deltas[kind][stat] = None
+                continue
+            change = (current[stat] - base[stat]) / base[stat] * 100
+            deltas[kind][stat] = round(change, 1)
+            if stat != "p90" and change > threshold:
+                regressions.append(f"{kind}.{stat}")
+    return {"threshold_percent": threshold, "delta_percent": deltas, "regressions": regressions}
+
+
+async def run_replay(
+    capture_path: Path,
+    speed: float = 1.0,
+    url: Optional[str] = None,
+    drain_timeout: float = 30.0,
+    stub_options: Optional[StubOptions] = None,
+    settings_overrides: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """回放到 ``url``；未指定时回放到进程内后端（LLM 为本地桩服务）。"""
+    capture = load_capture(capture_path)
+    info = {
+        "capture": str(capture_path),
+        "redacted": capture.header.get("redacted"),
+        "recorded_frames": capture.frames,
+        "recorded_duration_s": round(capture.duration, 3),
+        "speed": speed,
+    }
+    if url:
+        return {**info, "target": url, **await replay(capture, url, speed, drain_timeout)}
+    async with inprocess_backend(stub_options or StubOptions(), settings_overrides) as backend:
+        report = await replay(capture, backend.ws_url, speed, drain_timeout)
+        report["latency_ms"]["llm_upstream"] = summarize(backend.upstream_ms())
+        report["event_loop_lag_ms"] = summarize(backend.lag_samples)
+    return {**info, "target": "in-process", **report}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="回放录制的模组流量并比较响应延迟")
+    parser.add_argument("capture", type=Path, help="录制文件（.jsonl.gz）")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放倍速，0 表示不等待间隔")
+    parser.add_argument("--url", help="目标实例的 WebSocket 地址，如 ws://127.0.0.1:8080/ws；默认回放到进程内后端")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="每个连接发完后等待回复的时长（秒）")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="桩服务首 token 延迟（秒，仅进程内）")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=40.0, help="桩服务生成速率（仅进程内）")
+    parser.add_argument("--llm-reply-tokens", type=int, default=40, help="桩服务回复 token 数（仅进程内）")
+    parser.add_argument("--set", dest="settings", type=parse_setting, action="append", default=[],
+                        metavar="NAME=VALUE", help="覆盖后端配置项（仅进程内，可重复）")
+    parser.add_argument("--baseline", type=Path, help="用于比较的历史回放报告")
+    parser.add_argument("--threshold", type=float, default=20.0, help="p50/p99 允许变慢的百分比")
+    parser.add_argument("--output", type=Path, help="报告另存为 JSON 文件")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(
+        run_replay(
+            args.capture,
+            speed=args.speed,
+            url=args.url,
+            drain_timeout=args.drain_timeout,
+            stub_options=StubOptions(args.llm_latency, args.llm_tokens_per_second, args.llm_reply_tokens),
+            settings_overrides=dict(args.settings),
+        )
+    )
+    status = 0
+    if args.baseline:
+        report["comparison"] = compare(report, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        status = 1 if report["comparison"]["regressions"] else 0
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""对话处理器测试共用的替身：LLM 服务、记录发送内容的 WebSocket 与处理器上下文。"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+from api.handlers.context import HandlerContext
+from core.interfaces import OutboxInterface
+from core.memory.conversation_context import ConversationContext
+from core.monitor.event_bus import EventBus
+from core.monitor.metrics_collector import MetricsCollector
+
+
+class FakeLLMService:
+    """记录每次调用的 prompt，``delay`` 秒后回复“回答N”；设置 ``error`` 时直接抛出该异常。"""
+
+    def __init__(self, delay: float = 0.0, error: Optional[Exception] = None) -> None:
+        self.delay = delay
+        self.error = error
+        self.started = asyncio.Event()
+        self.prompts: List[List[Dict[str, Any]]] = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.prompts)
+
+    async def chat_completion(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        self.prompts.append(messages)
+        self.started.set()
+        if self.error is not None:
+            raise self.error
+        await asyncio.sleep(self.delay)
+        return {
+            "choices": [{"message": {"content": f"回答{self.calls}"}}],
+            "usage": {"total_tokens": 42},
+        }
+
+
+class RecordingWebSocket:
+    """记录发出的文本帧；``fail`` 为真时模拟连接已断开。"""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.sent: List[str] = []
+
+    @property
+    def payloads(self) -> List[Dict[str, Any]]:
+        return [json.loads(text) for text in self.sent]
+
+    async def send_text(self, text: str) -> None:
+        if self.fail:
+            raise RuntimeError("connection closed")
+        self.sent.append(text)
+
+
+@pytest.fixture
+def fake_llm() -> Callable[..., FakeLLMService]:
+    return FakeLLMService
+
+
+@pytest.fixture
+def recording_websocket() -> Callable[..., RecordingWebSocket]:
+    return RecordingWebSocket
+
+
+@pytest.fixture
+def make_context() -> Callable[..., HandlerContext]:
+    """构造处理器上下文，client_id 固定为 ``mod-test``。"""
+
+    def factory(
+        llm_service: FakeLLMService,
+        metrics: Optional[MetricsCollector] = None,
+        outbox: Optional[OutboxInterface] = None,
+    ) -> HandlerContext:
+        return HandlerContext(
+            client_id="mod-test",
+            event_bus=EventBus(),
+            metrics=metrics or MetricsCollector(),
+            llm_service=llm_service,
+            conversation_context=ConversationContext(),
+            outbox=outbox,
+        )
+
+    return factory
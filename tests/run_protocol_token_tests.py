@@ -19,9 +19,15 @@ import tracemalloc
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+from api.handlers.context import HandlerContext
+from api.handlers.conversation import ConversationHandler
+from api.messages import decode_message
 from api.protocol import CompactProtocol
+from core import serialization
+from core.memory.conversation_context import ConversationContext
+from core.monitor.event_bus import EventBus
+from core.monitor.metrics_collector import MetricsCollector
 from core.monitor.token_tracker import TokenTracker
-from api.websocket import handle_conversation_request
 
 
 # ============ 通用辅助 ============
@@ -199,35 +205,51 @@ def test_token_tracker_edge(report: TestReport) -> None:
         report.add("TokenTracker-空消息", False, str(e))
 
 
-# ============ 集成测试：websocket.handle_conversation_request ============
+# ============ 集成测试：ConversationHandler ============
 
 class DummyWS:
-    """最小可用的 WebSocket 假对象，用于捕获 send_json。"""
+    """最小可用的 WebSocket 假对象，用于捕获 send_text。"""
 
     def __init__(self) -> None:
         self.sent: List[Any] = []
 
-    async def send_json(self, payload: Any) -> None:
-        self.sent.append(payload)
+    async def send_text(self, text: str) -> None:
+        self.sent.append(serialization.loads(text))
+
+
+class EchoLLMService:
+    """复述玩家消息的 LLM 替身。"""
+
+    async def chat_completion(self, messages: List[Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+        return {"choices": [{"message": {"content": f"[Echo] 收到：{messages[-1]['content']}"}}]}
 
 
 async def _test_ws_conversation_flow(report: TestReport) -> None:
     ws = DummyWS()
     msg = {
-        # 注意：外层路由根据长类型判断，这里直接调用 handler，因此允许短或长
-        "type": "conversation_request",
-        "p": "Steve",  # 即便传了短键，parse 也应展开
+        # 紧凑短码：解码时展开为 conversation_request
+        "t": "cr",
+        "id": "42",
+        "p": "Steve",
         "m": "请复述这句话",
     }
-
-    preview = await handle_conversation_request(ws, msg, client_id="test-client")
+    context = HandlerContext(
+        client_id="test-client",
+        event_bus=EventBus(),
+        metrics=MetricsCollector(),
+        llm_service=EchoLLMService(),
+        conversation_context=ConversationContext(),
+    )
+
+    encoded = await ConversationHandler().handle(ws, decode_message(msg), context)
     try:
-        _assert(preview is not None, "handler 未返回预览字符串")
+        _assert(bool(encoded), "handler 未返回编码结果")
         _assert(len(ws.sent) == 1, "未捕获到发送数据")
         payload = ws.sent[0]
-        # 期望为紧凑格式，类型短码 cs
-        _assert(payload.get("t") == "cs", "响应类型应为 cs")
-        _assert("[Echo] 收到：" in payload.get("m", ""), "响应内容未包含 Echo 前缀")
+        _assert(payload.get("type") == "conversation_response", "响应类型应为 conversation_response")
+        _assert(payload.get("id") == "42", "响应未携带请求 id")
+        _assert("[Echo] 收到：" in payload.get("message", ""), "响应内容未包含 Echo 前缀")
+        _assert("请复述这句话" in payload.get("message", ""), "短键 m 未展开为 message")
         report.add("WS-对话请求-集成", True)
     except AssertionError as e:
         report.add("WS-对话请求-集成", False, str(e))
@@ -0,0 +1,30 @@
+"""微基准冒烟测试：每项基准都能运行，基线比较能识别回退。"""
+
+import json
+
+from scripts.benchmarks import BASELINE_PATH, BENCHMARKS, compare, run
+
+
+def test_every_benchmark_runs():
+    results = run(min_time=0.0, repeat=1, alloc_iterations=10)
+
+    assert set(results) == {bench.name for bench in BENCHMARKS}
+    for result in results.values():
+        assert result["ns_per_op"] > 0
+        assert result["peak_kb"] >= 0
+
+
+def test_baseline_covers_every_benchmark():
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+    assert set(baseline["results"]) == {bench.name for bench in BENCHMARKS}
+
+
+def test_compare_flags_regressions_over_threshold():
+    baseline = {"results": {"a": {"ns_per_op": 100.0}, "b": {"ns_per_op": 100.0}, "c": {"ns_per_op": 100.0}}}
+    results = {"a": {"ns_per_op": 125.0}, "b": {"ns_per_op": 110.0}, "c": {"ns_per_op": 80.0}, "new": {"ns_per_op": 1.0}}
+
+    comparison = compare(results, baseline, threshold=20.0)
+
+    assert comparison["regressions"] == ["a"]
+    assert comparison["delta_percent"] == {"a": 25.0, "b": 10.0, "c": -20.0}
@@ -20,3 +20,13 @@ def test_generate_cache_key_diff_by_model():
     k1 = generate_cache_key(messages, "gpt-4", 0.7)
     k2 = generate_cache_key(messages, "gpt-3.5-turbo", 0.7)
     assert k1 != k2
+
+
+def test_generate_cache_key_covers_output_params():
+    messages = [{"role": "user", "content": "hello"}]
+    base = generate_cache_key(messages, "gpt-4", 0.7)
+    assert generate_cache_key(messages, "gpt-4", 0.7, max_tokens=100) != base
+    assert generate_cache_key(messages, "gpt-4", 0.7, api_base="https://example.com/v1") != base
+    # 参数与消息的键顺序不影响结果
+    reordered = [{"content": "hello", "role": "user"}]
+    assert generate_cache_key(reordered, "gpt-4", 0.7) == base
@@ -0,0 +1,125 @@
+"""测试跨 worker 的连接登记与消息路由。"""
+
+import asyncio
+import json
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from api import websocket as websocket_module
+from core.cluster.registry import LocalCluster, RedisCluster
+from core.monitor.connection_manager import ConnectionManager
+from core.monitor.event_bus import EventBus
+from core.monitor.metrics_collector import MetricsCollector
+
+
+class RecordingWebSocket:
+    def __init__(self) -> None:
+        self.sent: List[dict] = []
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+
+async def _wait_for(predicate, timeout: float = 1.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "等待超时"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_local_cluster_sends_to_local_connection():
+    connections = ConnectionManager()
+    ws = RecordingWebSocket()
+    connections.add("mod-1", ws)
+    cluster = LocalCluster(connections, worker_id="w1")
+
+    assert await cluster.list_clients() == {"mod-1": "w1"}
+    assert await cluster.send_to_client("mod-1", {"type": "ping"})
+    assert not await cluster.send_to_client("missing", {"type": "ping"})
+    assert ws.sent == [{"type": "ping"}]
+
+
+@pytest.mark.asyncio
+async def test_redis_cluster_routes_between_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    conns_a, conns_b = ConnectionManager(), ConnectionManager()
+    worker_a = RedisCluster(conns_a, worker_id="a", client=fakeredis.FakeAsyncRedis(server=server))
+    worker_b = RedisCluster(conns_b, worker_id="b", client=fakeredis.FakeAsyncRedis(server=server))
+    await worker_a.start()
+    await worker_b.start()
+
+    ws = RecordingWebSocket()
+    conns_b.add("mod-1", ws)
+    await worker_b.register("mod-1")
+    assert await worker_a.list_clients() == {"mod-1": "b"}
+
+    # worker_a 上没有该连接，经 pub/sub 转交 worker_b 发送
+    assert await worker_a.send_to_client("mod-1", {"type": "ping"})
+    await _wait_for(lambda: ws.sent)
+    assert ws.sent == [{"type": "ping"}]
+
+    # 监控事件转发到其他 worker，不回送给自己
+    received_a: List[dict] = []
+    received_b: List[dict] = []
+
+    async def on_a(event):
+        received_a.append(event)
+
+    async def on_b(event):
+        received_b.append(event)
+
+    worker_a.set_event_handler(on_a)
+    worker_b.set_event_handler(on_b)
+    await worker_a.publish_event({"type": "llm_request"})
+    await _wait_for(lambda: received_b)
+    assert received_b == [{"type": "llm_request"}] and received_a == []
+
+    await worker_b.unregister("mod-1")
+    assert await worker_a.list_clients() == {}
+    await worker_a.stop()
+    await worker_b.stop()
+
+
+@pytest.mark.asyncio
+async def test_redis_cluster_drops_registration_of_dead_worker():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis()
+    cluster = RedisCluster(ConnectionManager(), worker_id="alive", client=client)
+    await client.hset(RedisCluster.CLIENTS_KEY, "mod-1", "gone")
+
+    assert not await cluster.send_to_client("mod-1", {"type": "ping"})
+    assert await cluster.list_clients() == {}
+
+
+class UnreachableCluster(LocalCluster):
+    async def register(self, client_id: str) -> None:
+        raise ConnectionError("redis unavailable")
+
+
+def test_failed_cluster_registration_closes_connection_without_leaking():
+    connections = ConnectionManager()
+    app = FastAPI()
+    app.include_router(websocket_module.router)
+    app.state.event_bus = EventBus()
+    app.state.metrics = MetricsCollector()
+    app.state.connection_manager = connections
+    app.state.cluster = UnreachableCluster(connections)
+    app.state.drain = type("Drain", (), {"draining": False})()
+    # 登记失败前不会用到的依赖
+    unused = ("llm_service", "conversation_context", "mod_rate_limiter", "idle_reaper", "session_resume", "outbox", "traffic_capture")
+    for name in unused:
+        setattr(app.state, name, None)
+
+    with TestClient(app) as client, client.websocket_connect("/ws") as ws:
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_text()
+
+    assert exc_info.value.code == 1011
+    assert connections.get_all_ids() == []
+
@@ -0,0 +1,71 @@
+"""测试连接管理器的标签索引与群发。"""
+
+import asyncio
+import json
+from typing import List
+
+import pytest
+
+from core.monitor.connection_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.sent: List[dict] = []
+
+    async def send_text(self, text: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("closed")
+        self.sent.append(json.loads(text))
+
+
+def test_tag_index_follows_connection_lifecycle():
+    manager = ConnectionManager()
+    manager.add("a", FakeWebSocket(), tags=["server:survival"])
+    manager.add("b", FakeWebSocket())
+    manager.tag("b", "server:survival", "player:Steve")
+
+    assert manager.ids_with_tags("server:survival") == {"a", "b"}
+    manager.untag("b", "server:survival")
+    assert manager.ids_with_tags("server:survival") == {"a"}
+
+    manager.remove("b")
+    assert manager.ids_with_tags("player:Steve") == set()
+    assert manager.get_tags("b") == set()
+    # 未登记的连接不能打标签
+    manager.tag("ghost", "player:Alex")
+    assert manager.ids_with_tags("player:Alex") == set()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reports_per_target_failures():
+    manager = ConnectionManager()
+    ok, slow, broken = FakeWebSocket(), FakeWebSocket(delay=1.0), FakeWebSocket(fail=True)
+    manager.add("ok", ok)
+    manager.add("slow", slow)
+    manager.add("broken", broken)
+
+    result = await manager.broadcast({"type": "notice"}, timeout=0.05)
+
+    assert result.delivered == ["ok"]
+    assert result.failed == {"slow": "timeout", "broken": "closed"}
+    assert ok.sent == [{"type": "notice"}]
+
+
+@pytest.mark.asyncio
+async def test_multicast_by_tags_and_ids():
+    manager = ConnectionManager()
+    sockets = {name: FakeWebSocket() for name in ("a", "b", "c")}
+    for name, ws in sockets.items():
+        manager.add(name, ws)
+    manager.tag("a", "player:Steve")
+
+    result = await manager.multicast({"type": "notice"}, client_ids=["c", "missing"], tags=["player:Steve"])
+
+    assert sorted(result.delivered) == ["a", "c"]
+    assert result.failed == {"missing": "not_connected"}
+    assert sockets["b"].sent == []
@@ -0,0 +1,96 @@
+"""测试对话请求的超时、取消、串行执行与浪费 token 统计。"""
+
+import asyncio
+
+import pytest
+
+from api.handlers.conversation import ConversationHandler
+from api.messages import ConversationRequest
+from api.websocket import _run_in_background
+from config.settings import settings
+from core.llm.errors import LLMBusyError
+from core.monitor.metrics_collector import MetricsCollector
+
+
+@pytest.mark.asyncio
+async def test_timeout_replies_and_records_abort(monkeypatch, fake_llm, recording_websocket, make_context):
+    monkeypatch.setattr(settings, "conversation_timeout", 0.05)
+    metrics = MetricsCollector()
+    websocket = recording_websocket()
+    message = ConversationRequest(id="m1", player_name="Steve", message="在吗")
+
+    context = make_context(fake_llm(delay=1.0), metrics)
+    await ConversationHandler().handle(websocket, message, context)
+
+    assert "想得太久" in websocket.sent[0]
+    # 没有得到回答的提问不写入历史
+    assert context.conversation_context.get_history("mod-test") == []
+    stats = metrics.get_llm_stats()
+    assert stats.aborted == {"timeout": 1}
+    assert stats.wasted_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_busy_reply_leaves_history_untouched(fake_llm, recording_websocket, make_context):
+    websocket = recording_websocket()
+    context = make_context(fake_llm(error=LLMBusyError("LLM 并发已满")))
+
+    await ConversationHandler().handle(websocket, ConversationRequest(id="m0", message="在吗"), context)
+
+    assert "有点忙" in websocket.sent[0]
+    assert context.conversation_context.get_history("mod-test") == []
+
+
+@pytest.mark.asyncio
+async def test_cancellation_stops_request_without_reply(fake_llm, recording_websocket, make_context):
+    metrics = MetricsCollector()
+    websocket = recording_websocket()
+    llm = fake_llm(delay=10.0)
+    message = ConversationRequest(id="m2", message="在吗")
+
+    context = make_context(llm, metrics)
+    task = asyncio.create_task(ConversationHandler().handle(websocket, message, context))
+    await llm.started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert websocket.sent == []
+    assert context.conversation_context.get_history("mod-test") == []
+    assert metrics.get_llm_stats().aborted == {"cancelled": 1}
+
+
+@pytest.mark.asyncio
+async def test_undelivered_reply_counts_usage_as_wasted(fake_llm, recording_websocket, make_context):
+    metrics = MetricsCollector()
+    message = ConversationRequest(id="m3", message="在吗")
+
+    with pytest.raises(RuntimeError):
+        await ConversationHandler().handle(
+            recording_websocket(fail=True), message, make_context(fake_llm(), metrics)
+        )
+
+    stats = metrics.get_llm_stats()
+    assert stats.aborted == {"undelivered": 1}
+    assert stats.wasted_tokens == 42
+
+
+@pytest.mark.asyncio
+async def test_background_conversations_of_one_session_run_in_order(fake_llm, recording_websocket, make_context):
+    llm = fake_llm(delay=0.02)
+    context = make_context(llm)
+    websocket = recording_websocket()
+    lock = asyncio.Lock()
+    handler = ConversationHandler()
+
+    tasks = [
+        asyncio.create_task(
+            _run_in_background(handler, websocket, ConversationRequest(id=f"m{i}", message=f"问题{i}"), context, lock)
+        )
+        for i in (1, 2)
+    ]
+    await asyncio.gather(*tasks)
+
+    # 第二个请求等第一个完成后才调用 LLM，prompt 中带有第一轮的问答
+    assert [m["content"] for m in llm.prompts[1][1:]] == ["[玩家] 问题1", "回答1", "[玩家] 问题2"]
+    assert [payload["id"] for payload in websocket.payloads] == ["m1", "m2"]
@@ -0,0 +1,101 @@
+"""测试优雅排空：等待进行中的处理、交接会话与并发关闭。"""
+
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import pytest
+
+from core.drain import DRAIN_CLOSE_CODE, DrainController, resume_key
+from core.memory.conversation_context import ConversationContext
+from core.monitor.connection_manager import ConnectionManager
+from core.storage.memory import MemoryStateStorage
+
+
+class ClosingWebSocket:
+    def __init__(self, close_delay: float = 0.0) -> None:
+        self.sent: List[dict] = []
+        self.close_code: Optional[int] = None
+        self.close_delay = close_delay
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        await asyncio.sleep(self.close_delay)
+        self.close_code = code
+
+
+def _controller(connections, context, storage, **kwargs) -> DrainController:
+    return DrainController(connections, context, storage, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_in_flight_and_hands_off_session():
+    connections = ConnectionManager()
+    context = ConversationContext()
+    storage = MemoryStateStorage()
+    ws = ClosingWebSocket()
+    connections.add("mod-1", ws)
+    context.create_session("mod-1", "Steve")
+    context.add_message("mod-1", "user", "你好")
+    drain = _controller(connections, context, storage, timeout=1.0)
+
+    async def conversation() -> None:
+        await asyncio.sleep(0.05)
+        context.add_message("mod-1", "assistant", "你好呀")
+
+    drain.track(asyncio.create_task(conversation()))
+    await drain.drain()
+
+    assert drain.draining and drain.status().completed
+    notice = ws.sent[-1]
+    assert notice["type"] == "server_draining"
+    snapshot = await storage.get_state(resume_key(notice["data"]["resume_token"]))
+    assert snapshot["player_name"] == "Steve"
+    assert [m["content"] for m in snapshot["messages"]] == ["你好", "你好呀"]
+    assert ws.close_code == DRAIN_CLOSE_CODE
+    assert drain.status().resume_tokens_issued == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_gives_up_on_stuck_tasks_and_closes_concurrently():
+    connections = ConnectionManager()
+    sockets = [ClosingWebSocket(close_delay=0.1) for _ in range(50)]
+    for index, ws in enumerate(sockets):
+        connections.add(f"mod-{index}", ws)
+    drain = _controller(connections, ConversationContext(), MemoryStateStorage(), timeout=0.05)
+    stuck = asyncio.create_task(asyncio.sleep(10))
+    drain.track(stuck)
+
+    started = time.perf_counter()
+    await drain.drain()
+    elapsed = time.perf_counter() - started
+    stuck.cancel()
+
+    assert elapsed < 1.0
+    assert all(ws.close_code == DRAIN_CLOSE_CODE for ws in sockets)
+    # 没有会话的连接不签发恢复令牌
+    assert sockets[0].sent[-1]["data"]["resume_token"] is None
+
+
+@pytest.mark.asyncio
+async def test_drain_token_restores_session_once():
+    connections = ConnectionManager()
+    context = ConversationContext()
+    storage = MemoryStateStorage()
+    ws = ClosingWebSocket()
+    connections.add("mod-1", ws)
+    context.create_session("mod-1", "Steve")
+    context.add_message("mod-1", "user", "你好")
+    drain = _controller(connections, context, storage)
+    await drain.drain()
+    token = ws.sent[-1]["data"]["resume_token"]
+
+    # 重启后的新进程：凭令牌把快照恢复到新的 client_id 下
+    restored = ConversationContext()
+    successor = _controller(ConnectionManager(), restored, storage)
+    assert await successor.redeem(token, "mod-2")
+    assert [m["content"] for m in restored.get_history("mod-2")] == ["你好"]
+    assert not await successor.redeem(token, "mod-3")
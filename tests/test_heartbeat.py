@@ -0,0 +1,63 @@
+"""测试空闲连接回收的时间轮。"""
+
+import asyncio
+
+import pytest
+
+from core.monitor import heartbeat as heartbeat_module
+from core.monitor.heartbeat import IdleReaper
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _noop() -> None:
+    return None
+
+
+def test_advance_expires_idle_and_reschedules_active(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(heartbeat_module.time, "monotonic", clock)
+    reaper = IdleReaper(idle_timeout=10.0, tick=1.0)
+    reaper.watch("idle", _noop)
+    reaper.watch("active", _noop)
+    reaper.watch("gone", _noop)
+    reaper.unwatch("gone")
+
+    clock.now += 6
+    reaper.touch("active")
+    assert reaper.advance(clock.now) == []
+
+    clock.now += 5
+    expired = reaper.advance(clock.now)
+    assert [client_id for client_id, _ in expired] == ["idle"]
+    assert reaper.watched == 1
+
+    # 活跃连接按最后一次消息的时间重新计时
+    clock.now += 4
+    assert reaper.advance(clock.now) == []
+    clock.now += 1
+    assert [client_id for client_id, _ in reaper.advance(clock.now)] == ["active"]
+    assert reaper.watched == 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_task_invokes_callback():
+    reaped = asyncio.Event()
+
+    async def on_expire() -> None:
+        reaped.set()
+
+    reaper = IdleReaper(idle_timeout=0.05, tick=0.01)
+    reaper.start()
+    reaper.watch("mod-1", on_expire)
+    try:
+        await asyncio.wait_for(reaped.wait(), timeout=1.0)
+    finally:
+        await reaper.stop()
+    assert reaper.watched == 0
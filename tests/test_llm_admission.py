@@ -0,0 +1,118 @@
+"""测试 LLM 准入控制（并发上限、优先级排队、负载削减）。"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from api.rate_limiter import LLMSpendLimiter
+from core.llm import service as service_module
+from core.llm.admission import LLMAdmissionController, LLMPriority
+from core.llm.config import LLMConfig, LLMConfigStore
+from core.llm.errors import LLMBusyError
+from core.llm.service import LLMService
+from core.monitor.metrics_collector import MetricsCollector
+from core.storage.memory import MemoryRateLimitStorage
+
+
+@pytest.mark.asyncio
+async def test_priority_order_when_slots_free_up():
+    controller = LLMAdmissionController(max_in_flight=1, max_queue_wait=5.0)
+    order: list[str] = []
+    gate = asyncio.Event()
+
+    async def call(name: str, priority: LLMPriority, hold: bool = False) -> None:
+        async with controller.slot(priority):
+            order.append(name)
+            if hold:
+                await gate.wait()
+
+    first = asyncio.create_task(call("first", LLMPriority.PLAYER, hold=True))
+    await asyncio.sleep(0)
+    background = asyncio.create_task(call("background", LLMPriority.BACKGROUND))
+    dashboard = asyncio.create_task(call("dashboard", LLMPriority.DASHBOARD))
+    player = asyncio.create_task(call("player", LLMPriority.PLAYER))
+    await asyncio.sleep(0)
+    assert controller.in_flight == 1 and controller.queued == 3
+
+    gate.set()
+    await asyncio.gather(first, background, dashboard, player)
+    assert order == ["first", "player", "dashboard", "background"]
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_sheds_load_and_records_metrics():
+    metrics = MetricsCollector()
+    controller = LLMAdmissionController(max_in_flight=1, max_queue_wait=0.05, metrics=metrics)
+    # 平均服务耗时较小，预计排队可接受，但真实等待超时
+    controller._avg_service_time = 0.01
+    await controller.acquire(LLMPriority.PLAYER)
+
+    with pytest.raises(LLMBusyError):
+        await controller.acquire(LLMPriority.DASHBOARD)
+
+    controller.release()
+    stats = metrics.get_llm_stats()
+    assert stats.rejected == {"dashboard": 1}
+    assert stats.queue_wait["player"].admitted == 1
+    assert stats.in_flight == 0 and stats.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_fast_reject_when_estimated_wait_exceeds_deadline():
+    controller = LLMAdmissionController(max_in_flight=1, max_queue_wait=1.0)
+    controller._avg_service_time = 5.0
+    await controller.acquire(LLMPriority.PLAYER)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(LLMBusyError):
+        await controller.acquire(LLMPriority.BACKGROUND)
+    # 预计排队超限时立即拒绝，不等待
+    assert loop.time() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_slot():
+    controller = LLMAdmissionController(max_in_flight=1, max_queue_wait=5.0)
+    await controller.acquire(LLMPriority.PLAYER)
+    waiter = asyncio.create_task(controller.acquire(LLMPriority.PLAYER))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    controller.release()
+    assert controller.in_flight == 0
+    assert await controller.acquire(LLMPriority.PLAYER) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_shed_or_failed_request_refunds_token_budget(monkeypatch):
+    async def failing_completion(**params):
+        raise ConnectionError("provider down")
+
+    async def fake_get_litellm():
+        return SimpleNamespace(acompletion=failing_completion)
+
+    monkeypatch.setattr(service_module, "get_litellm", fake_get_litellm)
+    spend = LLMSpendLimiter(tokens_per_minute=100, storage=MemoryRateLimitStorage())
+    controller = LLMAdmissionController(max_in_flight=1, max_queue_wait=1.0)
+    config = LLMConfig(provider="custom", model="gpt-4o", base_url="https://llm.example", api_key="sk-test")
+    service = LLMService(spend_limiter=spend, admission=controller, config_store=LLMConfigStore(config, poll_interval=0))
+    messages = [{"role": "user", "content": "x" * 200}]
+    assert spend.estimate_prompt_tokens(messages) == 51
+
+    # 并发已满且预计排队超限：请求被削减
+    controller._avg_service_time = 5.0
+    await controller.acquire(LLMPriority.PLAYER)
+    for _ in range(3):
+        with pytest.raises(LLMBusyError):
+            await service.chat_completion(messages, use_cache=False)
+    controller.release()
+
+    # 服务商报错同样没有实际消耗
+    with pytest.raises(ConnectionError):
+        await service.chat_completion(messages, use_cache=False)
+
+    # 预扣额度均已退还，预算仍是满的
+    assert await spend.try_acquire(100)
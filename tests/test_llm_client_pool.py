@@ -0,0 +1,116 @@
+"""测试按配置划分的 LLM 客户端池：LRU 淘汰、延迟关闭与请求级配置的连接复用。"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from core.llm.client_pool import LLMClientPool, client_key
+from core.llm.config import LLMConfig, LLMConfigStore
+from core.llm.service import LLMService
+
+BASE = LLMConfig(provider="custom", model="glm-4", api_key="sk-a", base_url="https://llm.test")
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 1,
+    "model": "glm-4",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "你好"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+}
+
+
+class ClosableSession:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def _pool(max_size: int) -> LLMClientPool:
+    return LLMClientPool(
+        lambda config: type("Template", (), {"provider": "openai", "params": {"model": config.model}})(),
+        ClosableSession,
+        max_size=max_size,
+    )
+
+
+def test_client_key_ignores_api_key():
+    assert client_key(BASE) == client_key(BASE.with_overrides(api_key="sk-b"))
+    assert client_key(BASE) != client_key(BASE.with_overrides(model="glm-4.6"))
+    assert client_key(BASE) != client_key(BASE.with_overrides(base_url="https://other.test"))
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_defers_close_until_released():
+    pool = _pool(max_size=2)
+    first = pool.acquire(BASE)
+    session = first.session
+    second = pool.get(BASE.with_overrides(model="m2"))
+
+    assert pool.get(BASE) is first  # 命中后成为最近使用
+    pool.get(BASE.with_overrides(model="m3"))
+    assert second.evicted and not first.evicted
+
+    pool.get(BASE.with_overrides(model="m4"))
+    assert first.evicted and not session.closed  # 仍有请求在使用
+
+    pool.release(first)
+    await asyncio.sleep(0)
+    assert session.closed
+    assert pool.stats() == {"size": 2, "max_size": 2, "hits": 1, "misses": 4, "evictions": 2}
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_sdk_clients_per_api_key_are_bounded():
+    pool = LLMClientPool(
+        lambda config: type("Template", (), {"provider": "openai", "params": {"api_base": "https://llm.test"}})(),
+        httpx.AsyncClient,
+    )
+    client = pool.get(BASE)
+    default = client.sdk_client("sk-a")
+
+    # 请求可以自带任意 API Key，按 Key 缓存的 SDK 客户端只保留最近使用的几个
+    for i in range(10):
+        client.sdk_client(f"sk-request-{i}")
+        assert client.sdk_client("sk-a") is default
+    assert len(client._sdk_clients) == 2
+    assert all(sdk.api_key in ("sk-a", "sk-request-9") for sdk in client._sdk_clients.values())
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_request_overrides_use_their_own_pooled_client():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((request.url.host, request.headers["authorization"]))
+        return httpx.Response(200, json=COMPLETION)
+
+    sessions = []
+
+    def session_factory() -> httpx.AsyncClient:
+        sessions.append(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return sessions[-1]
+
+    store = LLMConfigStore(BASE, poll_interval=0)
+    service = LLMService(config_store=store)
+    service.clients._session_factory = session_factory
+    messages = [{"role": "user", "content": "hi"}]
+    dashboard = BASE.with_overrides(model="glm-4.6", api_key="sk-b", base_url="https://dashboard.test")
+
+    await service.chat_completion(messages, use_cache=False)
+    await service.chat_completion(messages, use_cache=False, config=dashboard)
+    await service.chat_completion(messages, use_cache=False, config=dashboard)
+
+    assert requests == [
+        ("llm.test", "Bearer sk-a"),
+        ("dashboard.test", "Bearer sk-b"),
+        ("dashboard.test", "Bearer sk-b"),
+    ]
+    assert len(sessions) == 2  # 每种配置一个连接池，重复使用时不再创建
+    assert store.current is BASE
+    await service.close()
+    assert all(session.is_closed for session in sessions)
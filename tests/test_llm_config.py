@@ -0,0 +1,80 @@
+"""测试 LLM 配置快照：原子替换、请求级覆盖与文件热重载。"""
+
+import asyncio
+import json
+
+import pytest
+
+from core.llm.config import LLMConfigStore, load_llm_config
+
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    for var in ("LLM_PROVIDER", "LLM_MODEL", "LLM_API_KEY", "LLM_BASE_URL", "LLM_API_VERSION"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr("dotenv.load_dotenv", lambda *args, **kwargs: False)
+    path = tmp_path / "settings.json"
+    path.write_text(
+        json.dumps({"llm": {"provider": "custom", "model": "glm-4"}, "service": {"port": 8080}}),
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_env_overrides_file_and_defaults(settings_file, monkeypatch):
+    monkeypatch.setenv("LLM_MODEL", "gpt-4o")
+    config = load_llm_config(settings_file)
+
+    assert (config.provider, config.model, config.base_url) == ("custom", "gpt-4o", "")
+
+
+def test_request_overrides_never_touch_shared_snapshot(settings_file):
+    store = LLMConfigStore(path=settings_file, poll_interval=0)
+    shared = store.current
+
+    request_config = shared.with_overrides(model="claude-3", api_key="sk-player", base_url=None)
+
+    assert request_config.model == "claude-3" and request_config.api_key == "sk-player"
+    assert store.current is shared and shared.model == "glm-4" and shared.api_key == ""
+    assert shared.with_overrides(model=None) is shared
+    with pytest.raises(AttributeError):
+        shared.model = "mutated"  # type: ignore[misc]
+
+
+def test_update_persists_atomically_and_bumps_version(settings_file):
+    store = LLMConfigStore(path=settings_file, poll_interval=0)
+    before = store.current
+
+    after = store.update(model="glm-4.6", api_key="sk-new")
+
+    assert store.current is after and after.version == before.version + 1
+    assert before.model == "glm-4"  # 旧快照保持不变
+    saved = json.loads(settings_file.read_text(encoding="utf-8"))
+    assert saved["llm"] == {"provider": "custom", "model": "glm-4.6", "api_key": "sk-new"}
+    assert saved["service"] == {"port": 8080}
+    assert list(settings_file.parent.glob("*.tmp")) == []
+    # 内容未变化时不产生新版本
+    assert store.update(model="glm-4.6") is after
+    with pytest.raises(ValueError):
+        store.update(temperature="0.3")
+
+
+@pytest.mark.asyncio
+async def test_watcher_reloads_changed_file_and_keeps_snapshot_on_invalid_json(settings_file):
+    store = LLMConfigStore(path=settings_file, poll_interval=0.01)
+    store.start()
+    try:
+        settings_file.write_text(json.dumps({"llm": {"provider": "openai", "model": "gpt-4o"}}), encoding="utf-8")
+        for _ in range(100):
+            if store.current.model == "gpt-4o":
+                break
+            await asyncio.sleep(0.01)
+        reloaded = store.current
+        assert (reloaded.provider, reloaded.model, reloaded.version) == ("openai", "gpt-4o", 1)
+
+        settings_file.write_text("{ not json", encoding="utf-8")
+        await asyncio.sleep(0.1)
+        assert store.current is reloaded
+    finally:
+        await store.stop()
+
@@ -0,0 +1,136 @@
+"""测试 LLM 端点健康探测：自适应节奏、不可用判定与快速拒绝。"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.health import router as health_router
+from core.llm.errors import LLMBusyError, LLMUnavailableError
+from core.llm.health_probe import LLMHealthProber
+from core.llm.config import LLMConfig, LLMConfigStore
+from core.llm.service import LLMService
+
+ENDPOINT = "https://llm.example/v1"
+
+
+class ScriptedSource:
+    """按预设结果返回状态码或抛出异常的探测源。"""
+
+    def __init__(self, outcomes: List[object]) -> None:
+        self.outcomes = outcomes
+        self.calls = 0
+
+    def probe_targets(self) -> List[str]:
+        return [ENDPOINT]
+
+    async def probe(self, endpoint: str) -> int:
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome == "hang":
+            await asyncio.sleep(10)
+        return outcome  # type: ignore[return-value]
+
+
+@pytest.mark.asyncio
+async def test_endpoint_unavailable_only_after_consecutive_failures():
+    prober = LLMHealthProber(ScriptedSource([503, ConnectionError("refused"), 404]), failure_threshold=2)
+
+    first = await prober.probe_once(ENDPOINT)
+    assert first.healthy and first.consecutive_failures == 1 and first.last_error == "HTTP 503"
+    assert prober.is_available(ENDPOINT)
+
+    second = await prober.probe_once(ENDPOINT)
+    assert second.healthy is False and second.last_error == "refused"
+    assert not prober.is_available(ENDPOINT)
+
+    # 404 说明端点可达（部分兼容服务未实现 /models），视为恢复
+    third = await prober.probe_once(ENDPOINT)
+    assert third.healthy and third.consecutive_failures == 0 and third.status_code == 404
+    assert prober.is_available(ENDPOINT)
+
+
+@pytest.mark.asyncio
+async def test_auth_failure_is_flagged_but_not_counted():
+    prober = LLMHealthProber(ScriptedSource([401, 403]), failure_threshold=1)
+
+    for status_code in (401, 403):
+        health = await prober.probe_once(ENDPOINT)
+        assert health.status_code == status_code and health.auth_failed
+        assert health.healthy and health.consecutive_failures == 0
+    # 请求可能自带有效的 API Key，不因全局 Key 无效而快速拒绝
+    assert prober.is_available(ENDPOINT)
+
+
+@pytest.mark.parametrize("provider", ["anthropic", "azure", "gemini"])
+def test_only_openai_compatible_endpoints_are_probed(provider):
+    def probe_targets(provider: str) -> List[str]:
+        config = LLMConfig(provider=provider, model="model-x", base_url="https://proxy.example/v1", api_key="sk-test")
+        return LLMService(config_store=LLMConfigStore(config, poll_interval=0)).probe_targets()
+
+    # 这些服务商的 /models 不接受 Bearer 认证，探测只会得到 401/403
+    assert probe_targets(provider) == []
+    assert probe_targets("custom") == ["https://proxy.example/v1"]
+
+
+@pytest.mark.asyncio
+async def test_probe_cadence_speeds_up_while_failing():
+    prober = LLMHealthProber(ScriptedSource([200, "hang"]), interval=30.0, failure_interval=5.0, timeout=0.05)
+
+    await prober.probe_once(ENDPOINT)
+    assert prober._next_probe[ENDPOINT] - time.monotonic() > 25
+
+    health = await prober.probe_once(ENDPOINT)
+    assert health.last_error == "timeout" and health.status_code is None
+    assert prober._next_probe[ENDPOINT] - time.monotonic() < 5.1
+
+
+@pytest.mark.asyncio
+async def test_background_loop_probes_immediately_and_stops():
+    source = ScriptedSource([200])
+    prober = LLMHealthProber(source)
+    prober.start()
+    await asyncio.sleep(0.05)
+    await prober.stop()
+
+    assert source.calls == 1
+    assert prober.snapshot()[ENDPOINT].healthy
+
+
+@pytest.mark.asyncio
+async def test_llm_service_fast_rejects_known_bad_endpoint():
+    config = LLMConfig(provider="custom", model="gpt-4o", base_url="https://llm.example")
+    service = LLMService(config_store=LLMConfigStore(config, poll_interval=0))
+    service.health = SimpleNamespace(is_available=lambda endpoint: endpoint != ENDPOINT)
+
+    with pytest.raises(LLMUnavailableError) as exc_info:
+        await service.chat_completion([{"role": "user", "content": "你好"}], use_cache=False)
+    # 调用方沿用繁忙时的处理
+    assert isinstance(exc_info.value, LLMBusyError)
+
+
+def test_readiness_reports_unhealthy_endpoint_from_snapshot():
+    prober = LLMHealthProber(ScriptedSource([]), failure_threshold=1)
+    prober.record(ENDPOINT, None, 5000.0, "timeout")
+
+    app = FastAPI()
+    app.include_router(health_router)
+    app.state.prewarm = SimpleNamespace(warming=False, status=lambda: {"status": "ready", "hooks": {}, "pending": []})
+    app.state.drain = SimpleNamespace(draining=False)
+    app.state.metrics = SimpleNamespace(get_connection_status=lambda: SimpleNamespace(mod_client_id="mod-1"))
+    app.state.llm_service = SimpleNamespace(config=LLMConfig(api_key="sk-test"))
+    app.state.llm_health = prober
+
+    with TestClient(app) as client:
+        response = client.get("/health/readiness")
+
+    assert response.status_code == 503
+    llm = response.json()["checks"]["llm"]
+    assert llm["status"] == "unhealthy"
+    assert llm["endpoints"][ENDPOINT]["last_error"] == "timeout"
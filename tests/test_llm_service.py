@@ -24,12 +24,12 @@ async def test_llm_service():
     llm_service = LLMService()
 
     print(f"[配置检查]")
-    print(f"Provider: {llm_service.config['provider']}")
-    print(f"Model: {llm_service.config['model']}")
-    print(f"Base URL: {llm_service.config['base_url']}")
-    print(f"API Key: {'*' * 6 if llm_service.config['api_key'] else '未设置'}")
+    print(f"Provider: {llm_service.config.provider}")
+    print(f"Model: {llm_service.config.model}")
+    print(f"Base URL: {llm_service.config.base_url}")
+    print(f"API Key: {'*' * 6 if llm_service.config.api_key else '未设置'}")
     
-    if not llm_service.config['api_key'] or llm_service.config['api_key'] == "YOUR_API_KEY_HERE":
+    if not llm_service.config.api_key or llm_service.config.api_key == "YOUR_API_KEY_HERE":
         print("\n[警告] 未设置有效的 API Key，跳过真实调用测试。")
         print("请在 config/settings.json 或环境变量中配置 API Key。")
         return
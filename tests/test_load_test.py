@@ -0,0 +1,42 @@
+"""压测脚本冒烟测试：进程内后端 + LLM 桩服务跑通一轮，报告字段完整。"""
+
+import pytest
+
+from scripts.load_test import LoadTestOptions, percentile, run_load_test
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_load_test_reports_every_stage():
+    options = LoadTestOptions(
+        mods=3,
+        duration=1.0,
+        ramp_up=0.2,
+        state_interval=0.2,
+        chat_interval=0.3,
+        llm_latency=0.01,
+        llm_tokens_per_second=0,
+        seed=7,
+        settings={"rate_limit_messages": 1000},
+    )
+    report = await run_load_test(options)
+
+    assert report["connected_mods"] == 3
+    messages = report["messages"]
+    assert messages["errors"] == {} and messages["rejected"] == {}
+    assert messages["received"]["game_state_ack"] == messages["sent"]["game_state_update"]
+    assert messages["received"]["conversation_response"] == messages["sent"]["conversation_request"]
+    latency = report["latency_ms"]
+    assert set(latency) == {"connect", "game_state_update", "conversation_request", "llm_upstream"}
+    # 每条对话都经过桩服务（未走缓存），且端到端耗时不短于上游耗时
+    assert latency["llm_upstream"]["count"] == messages["sent"]["conversation_request"]
+    assert latency["conversation_request"]["p50"] >= latency["llm_upstream"]["p50"]
+    assert report["event_loop_lag_ms"]["count"] > 0
+    assert set(report["memory"]) == {"rss_start_mb", "rss_end_mb", "rss_growth_mb"}
@@ -0,0 +1,119 @@
+"""测试异步日志管线：队列投递、JSON 格式、限速与重复初始化。"""
+
+import json
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from core import logging_config
+from core.logging_config import JsonFormatter, RateLimitFilter, setup_logging, stop_logging
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def _read_lines(path) -> list:
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+def test_records_are_written_by_listener_thread_as_json(root_logger, tmp_path):
+    log_file = tmp_path / "app.log"
+    setup_logging(level="INFO", log_file=str(log_file), json_format=True, rate_limit=0)
+
+    assert [type(h) for h in root_logger.handlers] == [logging_config._DeferredQueueHandler]
+    payload = {"player": "Steve"}
+    logging.getLogger("tests.pipeline").info("玩家消息: %s", payload, extra={"client_id": "mod-1"})
+    # 入队前已合并参数，之后修改参数不影响输出
+    payload["player"] = "Alex"
+    logging.getLogger("tests.pipeline").debug("低于级别的日志不会入队")
+    stop_logging()
+
+    lines = _read_lines(log_file)
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["level"] == "INFO"
+    assert record["logger"] == "tests.pipeline"
+    assert record["message"] == "玩家消息: {'player': 'Steve'}"
+    assert record["client_id"] == "mod-1"
+
+
+def test_json_formatter_includes_exception_and_unencodable_extra():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("tests").makeRecord(
+            "tests", logging.ERROR, __file__, 1, "失败", None, __import__("sys").exc_info(), extra={"obj": object()}
+        )
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "失败"
+    assert "ValueError: boom" in data["exc_info"]
+    assert data["obj"].startswith("<object object")
+
+
+def test_rate_limit_filter_suppresses_repeats_per_template(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: clock[0])
+    limiter = RateLimitFilter(rate=1.0, burst=2)
+
+    def make(msg: str, level: int = logging.INFO, name: str = "tests") -> logging.LogRecord:
+        return logging.makeLogRecord({"name": name, "msg": msg, "levelno": level, "args": ("x",)})
+
+    assert [limiter.filter(make("重复: %s")) for _ in range(4)] == [True, True, False, False]
+    # 其他模板、其他 logger 与 ERROR 级别不受影响
+    assert limiter.filter(make("另一条: %s"))
+    assert limiter.filter(make("重复: %s", name="tests.other"))
+    assert limiter.filter(make("重复: %s", level=logging.ERROR))
+
+    # 令牌恢复后放行，并附带被抑制的条数
+    clock[0] += 1.0
+    record = make("重复: %s")
+    assert limiter.filter(record)
+    assert record.suppressed == 2
+    assert record.getMessage() == "重复: x [已抑制 2 条相同日志]"
+
+
+def test_setup_logging_is_idempotent(root_logger, tmp_path):
+    log_file = tmp_path / "app.log"
+    setup_logging(level="INFO", log_file=str(log_file))
+    first = logging_config._listener
+    setup_logging(level="WARNING", log_file=str(log_file))
+
+    assert logging_config._listener is not first
+    assert len([h for h in root_logger.handlers if isinstance(h, QueueHandler)]) == 1
+    assert root_logger.level == logging.WARNING
+    logging.getLogger("tests").warning("只输出一次")
+    stop_logging()
+    assert len([line for line in _read_lines(log_file) if "只输出一次" in line]) == 1
+
+
+def test_rate_limit_filter_evicts_least_recent_templates():
+    limiter = RateLimitFilter(rate=1.0, burst=1, max_keys=2)
+
+    def make(msg: str) -> logging.LogRecord:
+        return logging.makeLogRecord({"name": "tests", "msg": msg, "levelno": logging.INFO})
+
+    for msg in ("a", "b", "a", "c"):
+        limiter.filter(make(msg))
+
+    assert list(limiter._buckets) == [("tests", "a"), ("tests", "c")]
+
+
+def test_stop_logging_flushes_queue_and_falls_back_to_direct_output(root_logger, tmp_path):
+    log_file = tmp_path / "app.log"
+    setup_logging(level="INFO", log_file=str(log_file), rate_limit=0)
+    logging.getLogger("tests").info("停止前")
+    stop_logging()
+
+    assert "停止前" in log_file.read_text(encoding="utf-8")
+    assert not any(isinstance(h, QueueHandler) for h in root_logger.handlers)
+    # 停止后（如 uvicorn 关闭阶段）的日志同步写出，不会留在无人读取的队列中
+    logging.getLogger("tests").info("停止后")
+    assert "停止后" in log_file.read_text(encoding="utf-8")
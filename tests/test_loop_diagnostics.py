@@ -0,0 +1,98 @@
+"""事件循环诊断：延迟采样、慢回调调用栈、任务统计与诊断接口。"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import debug
+from core.monitor.event_types import MonitorEventType
+from core.monitor.loop_diagnostics import LoopDiagnostics
+
+
+def _block_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.events = []
+
+    def publish(self, event_type, data, severity="info"):
+        self.events.append((event_type, data, severity))
+
+
+@pytest.mark.asyncio
+async def test_lag_sampling_reports_blocked_loop():
+    recorder = _Recorder()
+    diagnostics = LoopDiagnostics(interval=0.02, lag_warn_ms=50, publish=recorder.publish)
+    diagnostics.start()
+    try:
+        await asyncio.sleep(0.05)
+        _block_loop(0.15)
+        await asyncio.sleep(0.1)
+    finally:
+        await diagnostics.stop()
+
+    lag = diagnostics.snapshot().lag
+    assert lag.samples >= 2
+    assert lag.max_ms >= 100
+    assert [event[0] for event in recorder.events] == [MonitorEventType.LOOP_LAG]
+
+
+@pytest.mark.asyncio
+async def test_slow_callback_captures_blocking_stack():
+    recorder = _Recorder()
+    diagnostics = LoopDiagnostics(interval=1.0, slow_callback_ms=50, publish=recorder.publish)
+    diagnostics.start()
+    try:
+        await asyncio.sleep(0.1)
+        _block_loop(0.3)
+        await asyncio.sleep(0.1)
+        status = diagnostics.snapshot()
+    finally:
+        await diagnostics.stop()
+
+    assert status.slow_callback_threshold_ms == 50
+    assert status.slow_callback_total == 1
+    slow = status.slow_callbacks[0]
+    assert slow.duration_ms >= 200
+    assert "_block_loop" in slow.stack[-1]
+    event_type, data, severity = recorder.events[0]
+    assert event_type == MonitorEventType.SLOW_CALLBACK and severity == "warning"
+    assert "_block_loop" in data["culprit"]
+
+
+@pytest.mark.asyncio
+async def test_disabled_diagnostics_start_nothing_but_count_tasks():
+    diagnostics = LoopDiagnostics(enabled=False, slow_callback_ms=50)
+    diagnostics.start()
+    sleepers = [asyncio.create_task(asyncio.sleep(1)) for _ in range(3)]
+    try:
+        status = diagnostics.snapshot()
+    finally:
+        for task in sleepers:
+            task.cancel()
+        await diagnostics.stop()
+
+    assert status.enabled is False and status.slow_callback_threshold_ms == 0
+    assert status.lag.samples == 0
+    assert status.tasks["sleep"] == 3
+    assert status.tasks_total >= 4
+
+
+def test_debug_loop_endpoint():
+    app = FastAPI()
+    app.include_router(debug.router, prefix="/api/debug")
+    app.state.loop_diagnostics = LoopDiagnostics(enabled=False)
+
+    with TestClient(app) as client:
+        response = client.get("/api/debug/loop", params={"top_tasks": 5})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["enabled"] is False
+    assert body["tasks_total"] >= 1
+    assert set(body["lag"]) == {"samples", "current_ms", "mean_ms", "p99_ms", "max_ms"}
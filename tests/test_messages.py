@@ -0,0 +1,61 @@
+"""测试模组协议的强类型解码。"""
+
+import pytest
+
+from api.messages import (
+    ConversationRequest,
+    GameStateUpdate,
+    MessageDecodeError,
+    PlayerConnected,
+    UnknownMessage,
+    decode_message,
+)
+
+
+def test_decode_compact_conversation_request():
+    msg = decode_message({"t": "cr", "i": "42", "p": "Steve", "m": "你好", "hp": 18})
+    assert isinstance(msg, ConversationRequest)
+    assert msg.id == "42"
+    assert msg.player_name == "Steve"
+    assert msg.message == "你好"
+    assert msg.companion_name == "AICompanion"
+    assert msg.health == 18.0
+
+
+def test_decode_legacy_data_and_defaults():
+    msg = decode_message({"type": "cr", "data": {"player_name": "Alex", "msg": "嗨"}, "message": "覆盖"})
+    assert isinstance(msg, ConversationRequest)
+    assert msg.player_name == "Alex"
+    # 顶层字段优先于 data 内同名字段
+    assert msg.message == "覆盖"
+
+    empty = decode_message({"type": "player_connected", "playerName": ""})
+    assert isinstance(empty, PlayerConnected)
+    assert empty.player_name == "玩家"
+
+
+def test_decode_game_state_keeps_data():
+    msg = decode_message({"t": "gs", "data": {"player_name": "Steve", "health": 20}})
+    assert isinstance(msg, GameStateUpdate)
+    assert msg.player_name == "Steve"
+    assert msg.data == {"player_name": "Steve", "health": 20}
+
+
+def test_decode_unknown_type():
+    assert decode_message({"type": "nope"}) == UnknownMessage(type="nope")
+    assert decode_message({}).type == "unknown"
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        ["not", "a", "dict"],
+        {"type": "conversation_request", "message": "x" * 1001},
+        {"type": "conversation_request", "playerName": {"bad": 1}},
+        {"type": "conversation_request", "health": "full"},
+        {"type": "game_state_update", "data": [1, 2]},
+    ],
+)
+def test_decode_rejects_invalid_fields(raw):
+    with pytest.raises(MessageDecodeError):
+        decode_message(raw)
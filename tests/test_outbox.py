@@ -0,0 +1,81 @@
+"""测试未确认对话回复的发件箱。"""
+
+import asyncio
+
+import pytest
+
+from api.handlers.conversation import ConversationAckHandler, ConversationHandler
+from api.messages import ConversationRequest, decode_message
+from config.settings import settings
+from core.memory import outbox as outbox_module
+from core.memory.outbox import PendingResponseOutbox
+
+
+def test_outbox_bounds_and_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(outbox_module.time, "monotonic", lambda: now[0])
+    outbox = PendingResponseOutbox(max_pending=2, ttl=10.0)
+    for request_id in ("a", "b", "c"):
+        outbox.put("mod-1", request_id, {"id": request_id})
+
+    assert outbox.pending("mod-1") == [{"id": "b"}, {"id": "c"}]
+    assert outbox.ack("mod-1", "b") and not outbox.ack("mod-1", "b")
+    now[0] += 11
+    assert outbox.get("mod-1", "c") is None and outbox.pending("mod-1") == []
+
+
+@pytest.mark.asyncio
+async def test_undelivered_reply_is_kept_and_retry_skips_llm(fake_llm, recording_websocket, make_context):
+    llm = fake_llm()
+    outbox = PendingResponseOutbox()
+    context = make_context(llm, outbox=outbox)
+    message = ConversationRequest(id="req-1", player_name="Steve", message="在吗")
+
+    with pytest.raises(RuntimeError):
+        await ConversationHandler().handle(recording_websocket(fail=True), message, context)
+    assert [p["message"] for p in outbox.pending("mod-test")] == ["回答1"]
+
+    # 模组重试同一请求：返回保存的回复，不再调用 LLM
+    websocket = recording_websocket()
+    await ConversationHandler().handle(websocket, message, context)
+    assert llm.calls == 1
+    assert [(p["id"], p["message"]) for p in websocket.payloads] == [("req-1", "回答1")]
+
+    await ConversationAckHandler().handle(websocket, decode_message({"type": "conversation_ack", "id": "req-1"}), context)
+    assert outbox.pending("mod-test") == []
+
+
+@pytest.mark.asyncio
+async def test_retry_while_generating_is_ignored(fake_llm, recording_websocket, make_context):
+    llm = fake_llm(delay=0.05)
+    context = make_context(llm, outbox=PendingResponseOutbox())
+    message = ConversationRequest(id="req-2", message="在吗")
+    websocket = recording_websocket()
+
+    first = asyncio.create_task(ConversationHandler().handle(websocket, message, context))
+    await asyncio.sleep(0.01)
+    assert await ConversationHandler().handle(websocket, message, context) == b""
+    await first
+
+    assert llm.calls == 1 and len(websocket.sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_after_unanswered_attempts_record_question_once(
+    monkeypatch, fake_llm, recording_websocket, make_context
+):
+    monkeypatch.setattr(settings, "conversation_timeout", 0.05)
+    llm = fake_llm(delay=1.0)
+    context = make_context(llm, outbox=PendingResponseOutbox())
+    message = ConversationRequest(id="req-3", message="在吗")
+    websocket = recording_websocket()
+
+    # 超时、调用失败都不进发件箱，模组用同一 id 重试，直到得到回答
+    await ConversationHandler().handle(websocket, message, context)
+    llm.error = RuntimeError("provider down")
+    await ConversationHandler().handle(websocket, message, context)
+    llm.error, llm.delay = None, 0.0
+    await ConversationHandler().handle(websocket, message, context)
+
+    history = context.conversation_context.get_history("mod-test")
+    assert [(m["role"], m["content"]) for m in history] == [("user", "[玩家] 在吗"), ("assistant", "回答3")]
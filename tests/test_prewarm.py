@@ -0,0 +1,111 @@
+"""测试启动预热：并发执行、失败隔离与就绪探针的 warming 状态。"""
+
+import asyncio
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.health import router as health_router
+from core.llm.config import LLMConfig, LLMConfigStore
+from core.llm.service import LLMService
+from core.prewarm import Prewarmer
+
+
+@pytest.mark.asyncio
+async def test_prewarm_runs_hooks_concurrently_and_isolates_failures():
+    prewarm = Prewarmer(timeout=0.2)
+    calls = []
+
+    async def slow() -> None:
+        await asyncio.sleep(0.1)
+        calls.append("slow")
+
+    async def broken() -> None:
+        raise ConnectionError("redis down")
+
+    async def stuck() -> None:
+        await asyncio.sleep(10)
+
+    prewarm.add("llm", slow)
+    prewarm.add("cache_storage", broken)
+    prewarm.add("state_storage", stuck)
+    started = time.perf_counter()
+    prewarm.start()
+    assert prewarm.warming and prewarm.status()["status"] == "warming"
+    await prewarm.wait()
+
+    assert time.perf_counter() - started < 0.4
+    assert calls == ["slow"]
+    status = prewarm.status()
+    assert status["status"] == "ready" and status["pending"] == []
+    assert status["hooks"]["llm"]["status"] == "ok"
+    assert status["hooks"]["cache_storage"] == {
+        "status": "failed",
+        "error": "redis down",
+        "duration_ms": status["hooks"]["cache_storage"]["duration_ms"],
+    }
+    assert status["hooks"]["state_storage"]["status"] == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_prewarm_without_hooks_is_ready_and_stop_cancels():
+    assert not Prewarmer().warming
+
+    prewarm = Prewarmer()
+    prewarm.add("llm", lambda: asyncio.sleep(10))
+    prewarm.start()
+    await prewarm.stop()
+    assert not prewarm.warming
+
+
+def test_readiness_reports_warming_until_prewarm_finishes():
+    app = FastAPI()
+    app.include_router(health_router)
+    gate = asyncio.Event()
+
+    class StubPrewarm:
+        @property
+        def warming(self) -> bool:
+            return not gate.is_set()
+
+        def status(self) -> dict:
+            return {"status": "warming" if self.warming else "ready", "hooks": {}, "pending": []}
+
+    app.state.prewarm = StubPrewarm()
+    app.state.drain = SimpleNamespace(draining=False)
+    app.state.metrics = SimpleNamespace(get_connection_status=lambda: SimpleNamespace(mod_client_id="mod-1"))
+    app.state.llm_service = SimpleNamespace(config=LLMConfig(api_key="sk-test"))
+    app.state.llm_health = SimpleNamespace(snapshot=dict)
+
+    with TestClient(app) as client:
+        response = client.get("/health/readiness")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming"
+        assert response.json()["checks"]["prewarm"]["status"] == "warming"
+
+        gate.set()
+        response = client.get("/health/readiness")
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
+
+
+def test_request_template_is_reused_until_config_changes():
+    store = LLMConfigStore(LLMConfig(provider="custom", model="gpt-4o", base_url="https://llm.example"), poll_interval=0)
+    service = LLMService(config_store=store)
+
+    template = service._request_template()
+    assert template.params == {
+        "model": "openai/gpt-4o",
+        "custom_llm_provider": "openai",
+        "api_base": "https://llm.example/v1",
+    }
+    assert template.request_url == "https://llm.example/v1/chat/completions"
+    assert template.extra_headers["Origin"] == "https://llm.example"
+    assert service._request_template() is template
+
+    store._swap(replace(store.current, model="gpt-4o-mini"))
+    assert service._request_template().params["model"] == "openai/gpt-4o-mini"
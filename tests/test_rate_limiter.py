@@ -0,0 +1,144 @@
+"""测试令牌桶速率限制器。"""
+
+import pytest
+
+import api.rate_limiter as rate_limiter_module
+from api.rate_limiter import LLMSpendLimiter, SharedRateLimiter, WebSocketRateLimiter
+from core.storage.memory import MemoryRateLimitStorage
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _patch_clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_limits_and_refills(monkeypatch):
+    clock = _patch_clock(monkeypatch)
+    limiter = WebSocketRateLimiter(max_messages=3, window_seconds=3)
+
+    assert all(limiter.check_rate_limit("c1") for _ in range(3))
+    assert not limiter.check_rate_limit("c1")
+    assert limiter.get_remaining_quota("c1") == 0
+
+    clock.now += 1.0  # 1 秒补充 1 个令牌
+    assert limiter.check_rate_limit("c1")
+    assert not limiter.check_rate_limit("c1")
+
+    # 其他客户端互不影响
+    assert limiter.check_rate_limit("c2")
+
+
+def test_message_type_costs(monkeypatch):
+    _patch_clock(monkeypatch)
+    limiter = WebSocketRateLimiter(
+        max_messages=10, window_seconds=60, costs={"conversation_request": 5}
+    )
+    assert limiter.check_rate_limit("c1", "conversation_request")
+    assert limiter.check_rate_limit("c1", "conversation_request")
+    assert not limiter.check_rate_limit("c1", "conversation_request")
+    # 两次对话已耗尽全部令牌：再发对话或廉价消息都会被拒绝
+    assert not limiter.check_rate_limit("c1", "game_state_update")
+    assert limiter.get_remaining_quota("c1") == 0
+
+
+def test_idle_clients_are_evicted(monkeypatch):
+    clock = _patch_clock(monkeypatch)
+    limiter = WebSocketRateLimiter(max_messages=2, window_seconds=2)
+    limiter.check_rate_limit("idle")
+    limiter.check_rate_limit("busy")
+    limiter.check_rate_limit("busy")
+    assert limiter.tracked_clients() == 2
+
+    clock.now += limiter.SWEEP_INTERVAL
+    limiter.check_rate_limit("busy")
+    # 清理时两个桶都已回满并被移除；busy 的这次请求重新建立了条目
+    assert limiter.tracked_clients() == 1
+    assert limiter.get_remaining_quota("idle") == 2
+
+
+def test_clear_resets_client():
+    limiter = WebSocketRateLimiter(max_messages=1, window_seconds=60)
+    assert limiter.check_rate_limit("c1")
+    assert not limiter.check_rate_limit("c1")
+    limiter.clear("c1")
+    assert limiter.check_rate_limit("c1")
+
+
+# ============ 共享限流（GCRA 存储） ============
+
+
+class CountingStorage(MemoryRateLimitStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def acquire(self, key, cost, rate, burst, force=False):
+        self.calls += 1
+        return await super().acquire(key, cost, rate, burst, force)
+
+
+@pytest.mark.asyncio
+async def test_memory_gcra_burst_then_reject():
+    storage = MemoryRateLimitStorage()
+    results = [(await storage.acquire("k", 1, rate=1.0, burst=3))[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+    allowed, retry_after = await storage.acquire("k", 1, rate=1.0, burst=3)
+    assert not allowed and 0 < retry_after <= 1.0
+    # force 记账不受限
+    assert (await storage.acquire("k", 5, rate=1.0, burst=3, force=True))[0]
+
+
+@pytest.mark.asyncio
+async def test_shared_limiter_local_precheck_skips_storage():
+    storage = CountingStorage()
+    limiter = SharedRateLimiter(WebSocketRateLimiter(max_messages=2, window_seconds=60), storage)
+    assert await limiter.check_rate_limit("c1")
+    assert await limiter.check_rate_limit("c1")
+    assert not await limiter.check_rate_limit("c1")
+    # 第三次被本地令牌桶拒绝，没有访问共享存储
+    assert storage.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_limiter_enforces_global_budget_across_workers():
+    storage = MemoryRateLimitStorage()
+    worker_a = SharedRateLimiter(WebSocketRateLimiter(max_messages=3, window_seconds=60), storage)
+    worker_b = SharedRateLimiter(WebSocketRateLimiter(max_messages=3, window_seconds=60), storage)
+    results = [await worker_a.check_rate_limit("c1"), await worker_b.check_rate_limit("c1")]
+    results += [await worker_a.check_rate_limit("c1"), await worker_b.check_rate_limit("c1")]
+    assert results.count(True) == 3
+
+
+@pytest.mark.asyncio
+async def test_llm_spend_limiter_budget():
+    spend = LLMSpendLimiter(tokens_per_minute=100, storage=MemoryRateLimitStorage())
+    assert spend.estimate_prompt_tokens([{"role": "user", "content": "x" * 40}]) == 11
+    assert await spend.try_acquire(60)
+    await spend.record(30)
+    assert not await spend.try_acquire(20)
+
+
+@pytest.mark.asyncio
+async def test_redis_gcra_script_with_fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from core.storage.redis import RedisRateLimitStorage
+
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    storage = RedisRateLimitStorage(client=client)
+    results = [(await storage.acquire("k", 1, rate=1.0, burst=2))[0] for _ in range(3)]
+    assert results == [True, True, False]
+    allowed, retry_after = await storage.acquire("k", 1, rate=1.0, burst=2)
+    assert not allowed and retry_after > 0
+    assert await client.ttl("k") > 0
+    await storage.reset("k")
+    assert (await storage.acquire("k", 1, rate=1.0, burst=2))[0]
@@ -0,0 +1,140 @@
+"""测试 LLM 语义缓存（近似问题命中、过期、容量、命名空间隔离与上限）。"""
+
+import pytest
+
+import core.llm.semantic_cache as semantic_cache_module
+from core.llm import service as service_module
+from core.llm.semantic_cache import SemanticCache, normalize_text
+from core.monitor.metrics_collector import MetricsCollector
+
+RESPONSE = {"choices": [{"message": {"content": "用三个铁锭和两根木棍合成"}}]}
+
+
+def _messages(question: str, companion: str = "AICompanion"):
+    return [
+        {"role": "system", "content": f"你是 {companion}"},
+        {"role": "user", "content": f"[Steve] {question}"},
+    ]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy" and semantic_cache_module._np is None:
+        pytest.skip("未安装 numpy")
+    if request.param == "python":
+        monkeypatch.setattr(semantic_cache_module, "_np", None)
+    return request.param
+
+
+def test_normalize_strips_speaker_and_punctuation():
+    assert normalize_text("[Steve]  How do I craft a Pickaxe？？") == "how do i craft a pickaxe"
+
+
+def test_near_duplicate_question_hits(backend):
+    metrics = MetricsCollector()
+    cache = SemanticCache(threshold=0.8, metrics=metrics)
+    messages = _messages("how do I craft an iron pickaxe?")
+    namespace = SemanticCache.namespace_for(messages, "gpt-4")
+    cache.store(namespace, SemanticCache.query_for(messages), RESPONSE)
+
+    similar = SemanticCache.query_for(_messages("How do I craft an iron pickaxe"))
+    assert cache.lookup(namespace, similar) == RESPONSE
+    assert cache.lookup(namespace, SemanticCache.query_for(_messages("where can I find diamonds"))) is None
+
+    stats = metrics.get_llm_stats().semantic_cache
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+    assert stats.hit_rate == 0.5
+
+
+def test_namespace_isolation_and_short_queries():
+    steve = SemanticCache.namespace_for(_messages("x", "Alex"), "gpt-4")
+    other = SemanticCache.namespace_for(_messages("x", "Bob"), "gpt-4")
+    assert steve != other
+    assert SemanticCache.query_for(_messages("好")) is None
+
+
+def test_expired_entries_are_ignored(backend, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache_module.time, "monotonic", lambda: now[0])
+    cache = SemanticCache(threshold=0.8, ttl=10)
+    cache.store("ns", "怎么合成铁镐", RESPONSE)
+    assert cache.lookup("ns", "怎么合成铁镐") == RESPONSE
+
+    now[0] += 11
+    assert cache.lookup("ns", "怎么合成铁镐") is None
+
+
+def test_capacity_overwrites_oldest(backend):
+    cache = SemanticCache(threshold=0.95, capacity=2)
+    cache.store("ns", "how to craft a bed", {"id": 1})
+    cache.store("ns", "how to tame a wolf", {"id": 2})
+    cache.store("ns", "how to brew potions", {"id": 3})
+
+    assert cache.entries() == 2
+    assert cache.lookup("ns", "how to craft a bed") is None
+    assert cache.lookup("ns", "how to brew potions") == {"id": 3}
+
+
+def test_namespace_count_is_capped_lru(backend):
+    metrics = MetricsCollector()
+    cache = SemanticCache(threshold=0.95, max_namespaces=2, metrics=metrics)
+    cache.store("alex", "how to craft a bed", {"id": 1})
+    cache.store("bob", "how to tame a wolf", {"id": 2})
+    # 访问 alex 后，最久未使用的是 bob
+    assert cache.lookup("alex", "how to craft a bed") == {"id": 1}
+    cache.store("carol", "how to brew potions", {"id": 3})
+
+    assert list(cache._indexes) == ["alex", "carol"]
+    assert cache.lookup("bob", "how to tame a wolf") is None
+    assert metrics.get_llm_stats().semantic_cache.entries == 2
+
+
+def test_fully_expired_namespaces_are_dropped(backend, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache_module.time, "monotonic", lambda: now[0])
+    cache = SemanticCache(threshold=0.8, ttl=10)
+    cache.store("alex", "怎么合成铁镐", RESPONSE)
+    cache.store("bob", "怎么驯服狼", RESPONSE)
+
+    now[0] += 11
+    assert cache.lookup("alex", "怎么合成铁镐") is None
+    assert list(cache._indexes) == ["bob"]
+    # 新建命名空间时顺带清理其余过期的命名空间
+    cache.store("carol", "怎么酿造药水", RESPONSE)
+    assert list(cache._indexes) == ["carol"]
+
+
+def test_vectors_grow_on_demand(backend):
+    cache = SemanticCache(threshold=0.95, capacity=40, dim=8)
+    cache.store("ns", "how to craft a bed", {"id": 1})
+    index = cache._indexes["ns"]
+    assert len(index.vectors) < cache.capacity
+
+    for i in range(45):
+        cache.store("ns", f"question number {i}", {"id": i})
+    assert index.size == 40 and len(index.vectors) == 40
+    assert cache.lookup("ns", "question number 44") == {"id": 44}
+
+
+@pytest.mark.asyncio
+async def test_service_skips_llm_call_on_semantic_hit(monkeypatch):
+    calls = []
+
+    async def fake_acompletion(**params):
+        calls.append(params)
+        return RESPONSE
+
+    monkeypatch.setattr(service_module.load_litellm(), "acompletion", fake_acompletion)
+    llm = service_module.LLMService(semantic_cache=SemanticCache(threshold=0.8))
+
+    first = await llm.chat_completion(
+        _messages("how do I craft an iron pickaxe?"), use_cache=False, use_semantic_cache=True
+    )
+    second = await llm.chat_completion(
+        _messages("How do I craft an iron pickaxe"), use_cache=False, use_semantic_cache=True
+    )
+    # 未显式开启时不查询语义缓存
+    await llm.chat_completion(_messages("How do I craft an iron pickaxe"), use_cache=False)
+
+    assert first == second == RESPONSE
+    assert len(calls) == 2
@@ -0,0 +1,45 @@
+"""测试统一 JSON 编解码工具。"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from core import serialization
+
+
+class DummyWS:
+    def __init__(self) -> None:
+        self.sent: list[str] = []
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+
+def test_dumps_loads_roundtrip_keeps_unicode():
+    payload = {"type": "conversation_response", "message": "你好，世界", "n": 1}
+    encoded = serialization.dumps(payload)
+    assert isinstance(encoded, bytes)
+    assert "你好".encode("utf-8") in encoded
+    assert serialization.loads(encoded) == payload
+    assert serialization.loads(encoded.decode("utf-8")) == payload
+
+
+def test_dumps_datetime_and_invalid_json():
+    ts = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert serialization.loads(serialization.dumps({"ts": ts}))["ts"].startswith("2025-01-01T00:00:00")
+    with pytest.raises(serialization.JSONDecodeError):
+        serialization.loads("{not json")
+
+
+def test_preview_slices_bytes_without_breaking_utf8():
+    encoded = serialization.dumps({"message": "方块" * 100})
+    text = serialization.preview(encoded, limit=10)
+    assert len(text) == 10
+    assert text == encoded.decode("utf-8")[:10]
+
+
+@pytest.mark.asyncio
+async def test_send_payload_encodes_once():
+    ws = DummyWS()
+    encoded = await serialization.send_payload(ws, {"type": "ack"})
+    assert ws.sent == [encoded.decode("utf-8")]
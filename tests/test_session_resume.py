@@ -0,0 +1,79 @@
+"""测试断线重连的会话恢复。"""
+
+import asyncio
+from typing import List
+
+import pytest
+
+from api.messages import decode_message
+from core.monitor.session_resume import SessionResumeRegistry
+
+
+class RecordingWebSocket:
+    def __init__(self) -> None:
+        self.sent: List[str] = []
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(text)
+
+
+def test_connection_init_carries_resume_token():
+    message = decode_message({"type": "connection_init", "resumeToken": "abc"})
+    assert message.resume_token == "abc"
+    assert decode_message({"type": "connection_init"}).resume_token == ""
+
+
+@pytest.mark.asyncio
+async def test_redeem_within_grace_keeps_session_and_rotates_token():
+    registry = SessionResumeRegistry(grace=1.0)
+    old_ws, new_ws = RecordingWebSocket(), RecordingWebSocket()
+    session = registry.open("mod-1", old_ws)
+    token = session.token
+    released = []
+
+    async def release() -> None:
+        released.append(True)
+
+    in_flight = asyncio.create_task(asyncio.sleep(0.05))
+    session.track(in_flight)
+    assert registry.park(session, release) and registry.parked == 1
+
+    resumed = registry.redeem(token)
+    assert resumed is session and not session.parked
+    assert session.token != token and registry.redeem(token) is None
+
+    # 进行中的处理未被取消，回复经发送端发到新连接
+    session.relay.websocket = new_ws
+    await session.relay.send_text("reply")
+    await in_flight
+    assert new_ws.sent == ["reply"] and old_ws.sent == []
+    assert released == []
+
+
+@pytest.mark.asyncio
+async def test_grace_expiry_cancels_tasks_and_releases_state():
+    registry = SessionResumeRegistry(grace=0.02)
+    session = registry.open("mod-1", RecordingWebSocket())
+    stuck = asyncio.create_task(asyncio.sleep(10))
+    session.track(stuck)
+    released = asyncio.Event()
+
+    async def release() -> None:
+        released.set()
+
+    registry.park(session, release)
+    await asyncio.wait_for(released.wait(), timeout=1.0)
+    assert stuck.cancelled()
+    assert registry.get("mod-1") is None and registry.redeem(session.token) is None
+
+
+@pytest.mark.asyncio
+async def test_zero_grace_does_not_park():
+    registry = SessionResumeRegistry(grace=0)
+    session = registry.open("mod-1", RecordingWebSocket())
+
+    async def release() -> None:
+        return None
+
+    assert not registry.park(session, release)
+    assert registry.get("mod-1") is None
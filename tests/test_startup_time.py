@@ -0,0 +1,34 @@
+"""启动耗时回归测试：导入 main 不应拉入重量级依赖，且总耗时在预算内。"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 导入 main 的耗时预算（秒）。延迟导入 LiteLLM 之前约 4 秒，之后约 0.5 秒；预算留足机器差异
+IMPORT_BUDGET_SECONDS = 2.0
+LAZY_MODULES = ("litellm", "redis", "numpy")
+
+
+def _import_main() -> tuple[str, int]:
+    code = f"import sys, main; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "LLM_API_KEY": ""},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    main_line = [line for line in result.stderr.splitlines() if line.endswith("| main")][-1]
+    cumulative_us = int(main_line.split("|")[1])
+    return result.stdout.strip(), cumulative_us
+
+
+def test_import_main_is_lazy_and_within_budget():
+    eager, cumulative_us = _import_main()
+
+    assert eager == "", f"导入 main 时提前导入了: {eager}"
+    assert cumulative_us / 1_000_000 < IMPORT_BUDGET_SECONDS
@@ -29,3 +29,79 @@ async def test_memory_state_storage():
     state = MemoryStateStorage()
     await state.set_state("s1", {"a": 1})
     assert await state.get_state("s1") == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_mget_mset():
+    cache = MemoryCacheStorage()
+    await cache.mset({"a": "1", "b": "2"}, ttl=10)
+    assert await cache.mget(["a", "missing", "b"]) == ["1", None, "2"]
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_compression_and_batch():
+    fakeredis = pytest.importorskip("fakeredis")
+    from core.storage.redis import RedisCacheStorage
+
+    client = fakeredis.FakeAsyncRedis()
+    storage = RedisCacheStorage(client=client, compress_threshold=64, local_cache_size=0)
+    large = "缓存" * 200
+    await storage.mset({"small": "hi", "large": large}, ttl=60)
+
+    assert await storage.mget(["small", "large", "missing"]) == ["hi", large, None]
+    raw_large = await client.get("large")
+    assert len(raw_large) < len(large.encode("utf-8"))
+    assert await client.ttl("large") > 0
+
+    # 升级前写入的无标记 JSON 仍可读取
+    await client.set("legacy", '{"a": 1}')
+    assert await storage.get("legacy") == '{"a": 1}'
+    await storage.close()
+
+
+async def _write_raw(storage, key: str, value: str) -> None:
+    """绕过存储层直接改写 Redis 中的值。"""
+    await storage._redis.set(key, b"\x00" + value.encode("utf-8"))
+
+
+@pytest.mark.asyncio
+async def test_redis_local_cache_invalidated_by_other_worker():
+    fakeredis = pytest.importorskip("fakeredis")
+    from core.storage.redis import RedisCacheStorage
+
+    server = fakeredis.FakeServer()
+    worker_a = RedisCacheStorage(client=fakeredis.FakeAsyncRedis(server=server))
+    worker_b = RedisCacheStorage(client=fakeredis.FakeAsyncRedis(server=server))
+
+    await worker_a.set("k", "v1")
+    assert await worker_b.get("k") == "v1"
+    await asyncio.sleep(0.05)  # 等待 worker_b 的失效订阅建立
+
+    # 本地副本命中时不访问 Redis
+    await _write_raw(worker_b, "k", "stale")
+    assert await worker_b.get("k") == "v1"
+
+    await worker_a.delete("k")
+    for _ in range(50):
+        if await worker_b.get("k") is None:
+            break
+        await asyncio.sleep(0.01)
+    assert await worker_b.get("k") is None
+
+    await worker_a.close()
+    await worker_b.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_state_storage_roundtrip_with_ttl():
+    fakeredis = pytest.importorskip("fakeredis")
+    from core.storage.redis import RedisStateStorage
+
+    client = fakeredis.FakeAsyncRedis()
+    storage = RedisStateStorage(client=client)
+    await storage.set_state("session:resume:t", {"player_name": "Steve", "messages": []}, ttl=60)
+
+    assert await storage.get_state("session:resume:t") == {"player_name": "Steve", "messages": []}
+    assert 0 < await client.ttl("session:resume:t") <= 60
+    assert await storage.get_state("missing") is None
+    await storage.close()
@@ -0,0 +1,105 @@
+"""测试流量录制（脱敏、文件格式、自动停止）与回放脚本。"""
+
+import json
+
+import pytest
+
+from api.traffic_capture import TrafficCapture, redact_frame
+from scripts.llm_stub import StubOptions
+from scripts.replay_traffic import compare, load_capture, run_replay
+
+
+def test_redact_frame_keeps_structure_and_masks_content():
+    frame = json.dumps(
+        {"t": "cr", "i": "m1", "p": "Steve", "m": "Hi 你好", "data": {"player_name": "Steve", "hp": 20}},
+        ensure_ascii=False,
+    )
+    redacted = json.loads(redact_frame(frame))
+
+    assert redacted["t"] == "cr" and redacted["i"] == "m1"
+    assert redacted["m"] == "xxx中中"
+    # 同一名字得到同一假名，数字原样保留
+    assert redacted["p"].startswith("p-") and redacted["p"] == redacted["data"]["player_name"]
+    assert redacted["data"]["hp"] == 20
+    assert redact_frame("not json") == "xxxxxxxx"
+
+
+def test_capture_writes_frames_and_stops_at_limit(tmp_path):
+    capture = TrafficCapture(directory=str(tmp_path), max_frames=3)
+    before = capture.open_connection()
+    capture.record(before, "ignored")
+    assert not capture.enabled
+
+    capture.start("run.jsonl.gz")
+    conn = capture.open_connection()
+    for i in range(4):
+        capture.record(conn, json.dumps({"type": "game_state_update", "id": f"gs-{i}", "playerName": "Alex"}))
+    assert not capture.enabled and capture.status().frames == 3
+    capture.close_connection(conn)
+    capture.join(5)
+
+    recorded = load_capture(tmp_path / "run.jsonl.gz")
+    assert recorded.header["redacted"] is True
+    assert list(recorded.connections) == [conn]
+    kinds = [kind for _, kind, _ in recorded.connections[conn]]
+    assert kinds == ["open", "in", "in", "in"]
+    assert "Alex" not in recorded.connections[conn][1][2]
+
+    with pytest.raises(ValueError):
+        capture.start("../escape.jsonl.gz")
+
+
+def test_compare_flags_regressions():
+    baseline = {"latency_ms": {"game_state_update": {"p50": 10.0, "p90": 20.0, "p99": 40.0}}}
+    report = {"latency_ms": {"game_state_update": {"p50": 11.0, "p90": 30.0, "p99": 60.0}}}
+    result = compare(report, baseline, threshold=20)
+    assert result["delta_percent"]["game_state_update"] == {"p50": 10.0, "p90": 50.0, "p99": 50.0}
+    assert result["regressions"] == ["game_state_update.p99"]
+
+
+@pytest.mark.asyncio
+async def test_replay_against_inprocess_backend(tmp_path):
+    capture = TrafficCapture(directory=str(tmp_path))
+    capture.start("replay.jsonl.gz")
+    for player in ("Steve", "Alex"):
+        conn = capture.open_connection()
+        capture.record(conn, json.dumps({"type": "connection_init"}))
+        capture.record(conn, json.dumps({"type": "game_state_update", "id": f"gs-{player}", "playerName": player}))
+        # 紧凑格式、不带 id 的对话请求按回复类型对应
+        capture.record(conn, json.dumps({"t": "cr", "p": player, "m": "附近有村庄吗？"}, ensure_ascii=False))
+        capture.close_connection(conn)
+    capture.join(5)
+
+    report = await run_replay(
+        tmp_path / "replay.jsonl.gz",
+        speed=0,
+        stub_options=StubOptions(latency=0.01, tokens_per_second=0),
+        drain_timeout=10,
+    )
+
+    assert report["connections"] == 2 and report["recorded_frames"] == 6
+    assert report["messages"]["unanswered"] == {} and report["messages"]["errors"] == {}
+    latency = report["latency_ms"]
+    for kind in ("connection_init", "game_state_update", "conversation_request"):
+        assert latency[kind]["count"] == 2
+    assert latency["llm_upstream"]["count"] == 2
+
+
+def test_capture_endpoints_toggle_recording(tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.websocket import router
+
+    app = FastAPI()
+    app.include_router(router)
+    app.state.traffic_capture = TrafficCapture(directory=str(tmp_path))
+
+    with TestClient(app) as client:
+        assert client.get("/api/ws/capture").json()["enabled"] is False
+        started = client.post("/api/ws/capture", json={"enabled": True, "name": "api.jsonl.gz"}).json()
+        assert started["enabled"] is True and started["path"].endswith("api.jsonl.gz")
+        assert client.post("/api/ws/capture", json={"enabled": True, "name": "a/b.gz"}).status_code == 400
+        assert client.post("/api/ws/capture", json={"enabled": False}).json()["enabled"] is False
+    app.state.traffic_capture.join(5)
+    assert load_capture(tmp_path / "api.jsonl.gz").connections == {}